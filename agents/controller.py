@@ -1,5 +1,6 @@
 import os
 import operator
+import threading
 from typing import TypedDict, Annotated, List
 from functools import partial
 
@@ -8,17 +9,27 @@ from langgraph.graph import StateGraph, END
 from langchain_core.agents import AgentAction
 from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda
 from langchain_openai import ChatOpenAI
-from agents.web_agent.web_tool import web_search
+from agents.web_agent.web_tool import web_search, async_web_search
 
-from agents.rag_agent.rag_tool import vector_search
+from agents.rag_agent.rag_tool import vector_search, embedding_cache_stats, retrieval_cache_stats
 from agents.snowflake_agent.snowflake_tool import (
     snowflake_stress_analysis,
     snowflake_job_satisfaction_vs_stress,
     snowflake_education_vs_stress,
     snowflake_income_vs_stress,
     snowflake_cognition_vs_stress,
-    snowflake_primarycare_vs_stress
+    snowflake_primarycare_vs_stress,
+    snowflake_dashboard,
+    snowflake_metrics,
+    prefill_snowflake_pool,
+    invalidate_snowflake_cache,
+    warm_chart_cache,
+    describe_chart,
+    get_chart_image,
+    get_chart_data,
+    CHART_SPECS
 )
 
 # Load environment
@@ -26,6 +37,7 @@ load_dotenv()
 
 # 🔐 Keys
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+RAG_MODEL = os.getenv("RAG_MODEL", "gpt-4o-mini")
 
 # ---------------------------
 # 📆 Define Agent State
@@ -49,6 +61,7 @@ def init_rag_oracle():
     - If the user asks for a chart, metric comparison, or correlation, prefer the **Snowflake tools**.
     - If the user asks **why a metric is high or low**, or **how to improve it**, or **what frameworks exist**, use the **vector_search tool**.
     - Use vector_search to retrieve guidance from embedded documents, especially the one containing chart-based frameworks and solutions (e.g., additional2_0).
+    - Only pass vector_search `sources` when the question is about a specific report (CDC: cdc1/cdc2, WHO: who1/who2, SDOH strategies: sdoh_strategies1/sdoh_strategies2); otherwise leave it out.
     - Summarize clearly, and include actionable steps or known models (e.g., PERMA Model, CBT, PCMH) if available in retrieved context.
     - If no relevant data is found, respond with "No relevant context found."
 
@@ -63,7 +76,7 @@ def init_rag_oracle():
     ])
 
     llm = ChatOpenAI(
-        model="gpt-4o-mini",
+        model=RAG_MODEL,
         temperature=0,
         openai_api_key=OPENAI_API_KEY
     )
@@ -111,6 +124,20 @@ def run_oracle(state: AgentState, oracle):
         ]
     }
 
+async def arun_oracle(state: AgentState, oracle):
+    print("🚀 Running Oracle (async) with query:", state["input"])
+    output = await oracle.ainvoke(state)
+
+    tool_name = output.tool_calls[0]["name"]
+    tool_args = output.tool_calls[0]["args"]
+
+    return {
+        **state,
+        "intermediate_steps": [
+            AgentAction(tool=tool_name, tool_input=tool_args, log="TBD")
+        ]
+    }
+
 def run_tool(state: AgentState):
     tool_name = state["intermediate_steps"][-1].tool
     tool_args = state["intermediate_steps"][-1].tool_input or {}
@@ -155,7 +182,13 @@ def create_rag_graph():
     oracle = init_rag_oracle()
     graph = StateGraph(AgentState)
 
-    graph.add_node("oracle", partial(run_oracle, oracle=oracle))
+    # Sync invoke() and async ainvoke() each get a native oracle implementation;
+    # the blocking tool nodes are run in LangGraph's executor under ainvoke().
+    graph.add_node("oracle", RunnableLambda(
+        partial(run_oracle, oracle=oracle),
+        afunc=partial(arun_oracle, oracle=oracle),
+        name="oracle"
+    ))
     graph.add_node("vector_search", run_tool)
     graph.add_node("snowflake_stress_analysis", run_tool)
     graph.add_node("snowflake_job_satisfaction_vs_stress", run_tool)
@@ -178,11 +211,50 @@ def create_rag_graph():
 
     return graph.compile()
 
+# ---------------------------
+# ♻️ Compiled Graph Registry
+# ---------------------------
+# The compiled graph is immutable and safe to invoke from several threads, so
+# it is built once per process and shared. The config fingerprint lets a
+# changed key or model trigger a rebuild without restarting the server.
+_graph_lock = threading.Lock()
+_compiled_graph = None
+_compiled_fingerprint = None
+
+def _graph_fingerprint():
+    return (OPENAI_API_KEY, RAG_MODEL)
+
+def get_rag_graph():
+    """Return the process-wide compiled RAG graph, building it on first use."""
+    global _compiled_graph, _compiled_fingerprint
+    fingerprint = _graph_fingerprint()
+    graph = _compiled_graph
+    if graph is not None and _compiled_fingerprint == fingerprint:
+        return graph
+
+    with _graph_lock:
+        if _compiled_graph is None or _compiled_fingerprint != fingerprint:
+            print("🧠 Compiling RAG graph...")
+            _compiled_graph = create_rag_graph()
+            _compiled_fingerprint = fingerprint
+        return _compiled_graph
+
+def reload_rag_graph(openai_api_key: str = None, model: str = None):
+    """Apply new LLM settings and rebuild the shared graph on next use."""
+    global OPENAI_API_KEY, RAG_MODEL, _compiled_graph, _compiled_fingerprint
+    with _graph_lock:
+        if openai_api_key is not None:
+            OPENAI_API_KEY = openai_api_key
+        if model is not None:
+            RAG_MODEL = model
+        _compiled_graph = None
+        _compiled_fingerprint = None
+
 # ---------------------------
 # 🏁 Run Entry Function
 # ---------------------------
 def run_rag_agent(query: str):
-    graph = create_rag_graph()
+    graph = get_rag_graph()
     final_state = graph.invoke({
         "input": query,
         "chat_history": [],
@@ -190,6 +262,15 @@ def run_rag_agent(query: str):
     })
     return final_state["intermediate_steps"][-1].log
 
+async def arun_rag_agent(query: str):
+    graph = get_rag_graph()
+    final_state = await graph.ainvoke({
+        "input": query,
+        "chat_history": [],
+        "intermediate_steps": []
+    })
+    return final_state["intermediate_steps"][-1].log
+
 def run_snowflake_agent():
     return snowflake_stress_analysis.invoke(input={})
 
@@ -208,9 +289,41 @@ def run_snowflake_cognition_vs_stress():
 def run_snowflake_primarycare_vs_stress_agent():
     return snowflake_primarycare_vs_stress.invoke(input={})
 
+SNOWFLAKE_CHARTS = list(CHART_SPECS)
+
+def describe_snowflake_chart(name: str, fmt: str = "png"):
+    return describe_chart(name, fmt)
+
+def get_snowflake_chart_image(name: str, fmt: str = "png", if_none_match: str = None):
+    return get_chart_image(name, fmt, if_none_match)
+
+def get_snowflake_chart_data(name: str, fmt: str = "json"):
+    return get_chart_data(name, fmt)
+
+def run_snowflake_dashboard_agent(mode: str = "chart"):
+    return snowflake_dashboard(mode)
+
+def get_rag_metrics():
+    return {"embedding_cache": embedding_cache_stats(), "retrieval_cache": retrieval_cache_stats()}
+
+def get_snowflake_metrics():
+    return snowflake_metrics()
+
+def warm_snowflake_pool():
+    return prefill_snowflake_pool()
+
+def clear_snowflake_cache():
+    return invalidate_snowflake_cache()
+
+def warm_snowflake_charts():
+    return warm_chart_cache()
+
 def run_web_search_agent(query: str):
     return web_search.invoke(input={"query": query})
 
+async def arun_web_search_agent(query: str):
+    return await async_web_search(query)
+
 if __name__ == "__main__":
     question = "What is the stress level across income groups?"
     answer = run_rag_agent(question)
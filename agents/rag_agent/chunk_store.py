@@ -0,0 +1,83 @@
+"""
+Local chunk-text store keyed by chunk ID, shared by ingestion (writes) and rag_tool (reads).
+
+Chunk bodies used to travel in the vector index's metadata, so every query
+response carried up to top_k full chunks over the wire and the index paid to
+store them. Now ingestion writes each chunk once, zlib-compressed, to SQLite
+(CHUNK_STORE_PATH). Vector searches return only IDs and scores, and rag_tool
+looks the winners up here with one indexed SELECT.
+
+Chunk IDs are content hashes, so a stored body never changes under its ID and
+readers can cache freely.
+"""
+import os
+import zlib
+import sqlite3
+import threading
+
+CHUNK_STORE_PATH = os.getenv("CHUNK_STORE_PATH", ".cache/chunk_store.sqlite")
+_SQLITE_MAX_PARAMS = 500  # stay well under SQLite's bound-parameter limit
+
+
+class ChunkStore:
+    def __init__(self, path: str = CHUNK_STORE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, source TEXT NOT NULL, "
+                           "body BLOB NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_source ON chunks (source)")
+        self._conn.commit()
+
+    def add(self, entries):
+        """entries: iterable of (chunk_id, text, source); re-adding an ID replaces it."""
+        rows = [(chunk_id, source, zlib.compress(text.encode("utf-8"))) for chunk_id, text, source in entries]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+
+    def delete(self, ids):
+        ids = list(ids)
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(chunk_id,) for chunk_id in ids])
+            self._conn.commit()
+
+    def get(self, ids) -> dict:
+        """{chunk_id: text} for the IDs that are stored; unknown IDs are left out."""
+        ids = list(ids)
+        rows = []
+        with self._lock:
+            for start in range(0, len(ids), _SQLITE_MAX_PARAMS):
+                batch = ids[start:start + _SQLITE_MAX_PARAMS]
+                rows += self._conn.execute(
+                    f"SELECT id, body FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+        return {chunk_id: zlib.decompress(body).decode("utf-8") for chunk_id, body in rows}
+
+    def ids(self, source: str) -> set:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT id FROM chunks WHERE source = ?", (source,))}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_chunk_store() -> ChunkStore:
+    """Process-wide chunk-text store, created on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ChunkStore()
+        return _store
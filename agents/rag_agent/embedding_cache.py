@@ -0,0 +1,223 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "4096"))
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", ".cache/embeddings.sqlite")
+EMBED_CACHE_MAX_DISK_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_DISK_ENTRIES", "200000"))
+EMBED_CACHE_EVICTION = os.getenv("EMBED_CACHE_EVICTION", "lru")  # "lru" or "fifo"
+
+EVICTION_COLUMNS = {"lru": "last_used", "fifo": "created_at"}
+
+
+class EmbeddingCache:
+    """
+    Embedding vectors keyed by sha256(model + text).
+
+    A bounded in-memory LRU sits in front of an optional SQLite file holding
+    float32 blobs, so repeated questions and re-ingested chunks skip the API
+    even across restarts. The disk tier is trimmed to max_disk_entries by
+    least-recent use ("lru") or insertion order ("fifo").
+    """
+
+    def __init__(self, max_entries: int = EMBED_CACHE_MAX_ENTRIES, db_path: str = EMBED_CACHE_PATH,
+                 max_disk_entries: int = EMBED_CACHE_MAX_DISK_ENTRIES, eviction: str = EMBED_CACHE_EVICTION):
+        if eviction not in EVICTION_COLUMNS:
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        self.max_entries = max_entries
+        self.db_path = db_path or None
+        self.max_disk_entries = max_disk_entries
+        self.eviction = eviction
+
+        self._entries = OrderedDict()  # key -> np.float32 array
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()  # disk I/O never blocks memory hits
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._db = self._open_db() if self.db_path else None
+        # Upper bound on disk rows (replacements over-count); COUNT(*) only runs when it crosses the cap
+        self._disk_rows = self._disk_count() if self._db is not None else 0
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\x1f{text}".encode("utf-8")).hexdigest()
+
+    # ───────────── Lookup ─────────────
+
+    def get(self, model: str, text: str):
+        return self.get_many(model, [text])[0]
+
+    def get_many(self, model: str, texts) -> list:
+        """Cached vectors (as lists) for texts, None where missing."""
+        keys = [self.make_key(model, text) for text in texts]
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = vector
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        from_disk = self._read_disk(missing) if missing else {}
+        for key, vector in from_disk.items():
+            self._store_memory(key, vector)
+        found.update(from_disk)
+
+        with self._lock:
+            hits = sum(1 for key in keys if key in found)
+            self._stats["hits"] += hits
+            self._stats["disk_hits"] += sum(1 for key in keys if key in from_disk)
+            self._stats["misses"] += len(keys) - hits
+        return [found[key].tolist() if key in found else None for key in keys]
+
+    def put(self, model: str, text: str, vector):
+        self.put_many(model, [(text, vector)])
+
+    def put_many(self, model: str, items):
+        """items: iterable of (text, vector). Empty vectors (failed embeddings) are not cached."""
+        rows = []
+        for text, vector in items:
+            if vector is None or len(vector) == 0:
+                continue
+            key = self.make_key(model, text)
+            array = np.asarray(vector, dtype=np.float32)
+            self._store_memory(key, array)
+            rows.append((key, model, array))
+        if rows:
+            self._write_disk(rows)
+
+    def get_or_embed(self, model: str, text: str, embed) -> list:
+        """Cached vector for text, or embed(text) stored on success."""
+        vector = self.get(model, text)
+        if vector is None:
+            vector = embed(text)
+            self.put(model, text, vector)
+        return vector
+
+    # ───────────── Maintenance ─────────────
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+                self._disk_rows = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        with self._db_lock:
+            stats["disk_entries"] = self._disk_count() if self._db is not None else 0
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["max_disk_entries"] = self.max_disk_entries
+        stats["eviction"] = self.eviction
+        stats["disk_enabled"] = self._db is not None
+        return stats
+
+    def report(self) -> str:
+        s = self.stats()
+        return (f"🗃️ Embedding cache: {s['hits']}/{s['hits'] + s['misses']} hits ({s['hit_rate']:.0%}), "
+                f"{s['disk_hits']} from disk, {s['entries']} in memory, {s['disk_entries']} on disk")
+
+    # ───────────── Tiers ─────────────
+
+    def _store_memory(self, key: str, vector: np.ndarray):
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _open_db(self):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.db_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, model TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL,"
+            " created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        db.execute("CREATE INDEX IF NOT EXISTS embeddings_created_at ON embeddings (created_at)")
+        db.commit()
+        return db
+
+    def _disk_count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _read_disk(self, keys) -> dict:
+        if self._db is None:
+            return {}
+        found = {}
+        with self._db_lock:
+            # SQLite caps bound parameters; look keys up in slices
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found and self.eviction == "lru":
+                now = time.time()
+                self._db.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                     [(now, key) for key in found])
+                self._db.commit()
+        return found
+
+    def _write_disk(self, rows):
+        if self._db is None:
+            return
+        now = time.time()
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, model, len(array), array.tobytes(), now, now) for key, model, array in rows]
+            )
+            self._disk_rows += len(rows)
+            evicted = self._prune_disk() if self._disk_rows > self.max_disk_entries else 0
+            self._db.commit()
+        with self._lock:
+            self._stats["writes"] += len(rows)
+            self._stats["evictions"] += evicted
+
+    def _prune_disk(self):
+        # Trim in slabs (10% headroom) so eviction isn't paid on every write
+        count = self._disk_rows = self._disk_count()
+        if count <= self.max_disk_entries:
+            return 0
+        target = int(self.max_disk_entries * 0.9)
+        column = EVICTION_COLUMNS[self.eviction]
+        self._db.execute(
+            f"DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY {column} LIMIT ?)",
+            (count - target,)
+        )
+        self._disk_rows = target
+        return count - target
+
+
+_cache_lock = threading.Lock()
+_cache = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide cache shared by the ingestion and query paths."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
@@ -0,0 +1,172 @@
+"""
+Local BM25 index over ingested chunks, shared by ingestion (writes) and rag_tool (queries).
+
+Dense embeddings blur exact terms such as "PERMA", "PCMH" or a CDC program
+name; BM25 ranks chunks that literally contain them. Ingestion writes each
+chunk's term counts to SQLite (LEXICAL_INDEX_PATH) next to the chunk-text
+store; the index references chunk IDs only and the bodies live in chunk_store.
+Readers keep the postings in memory as NumPy arrays and reload them when
+another process bumps the generation. A query concatenates the precomputed
+BM25 weights of its terms and sums them per chunk with one np.bincount.
+"""
+import os
+import re
+import json
+import math
+import sqlite3
+import threading
+from collections import Counter
+
+import numpy as np
+
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", ".cache/lexical_index.sqlite")
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+_TOKEN = re.compile(r"\w+")
+STOPWORDS = frozenset("""
+a an and are as at be been but by can do does for from has have how i if in into is it its of on or
+our so than that the their them then there these they this to was we were what when where which who
+why will with you your
+""".split())
+
+
+def tokenize(text: str) -> list:
+    """Lowercased word tokens without stopwords; acronyms and numbers are kept as-is."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, path: str = LEXICAL_INDEX_PATH, k1: float = BM25_K1, b: float = BM25_B):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS chunk_terms (id TEXT PRIMARY KEY, source TEXT NOT NULL, "
+                           "terms TEXT NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunk_terms_source ON chunk_terms (source)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+        self._loaded = None  # generation the in-memory postings were built from
+
+    # ───────────── Writes ─────────────
+
+    def add(self, entries):
+        """entries: iterable of (chunk_id, text, source); only the ID, source and term counts are kept."""
+        rows = [(chunk_id, source, json.dumps(Counter(tokenize(text)))) for chunk_id, text, source in entries]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO chunk_terms VALUES (?, ?, ?)", rows)
+            self._commit()
+
+    def delete(self, ids):
+        ids = list(ids)
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM chunk_terms WHERE id = ?", [(chunk_id,) for chunk_id in ids])
+            self._commit()
+
+    def _commit(self):
+        generation = str(int(self.version()) + 1)
+        self._conn.execute("INSERT OR REPLACE INTO settings VALUES ('generation', ?)", (generation,))
+        self._conn.commit()
+
+    # ───────────── Reads ─────────────
+
+    def version(self) -> str:
+        """Changes on every write, from any process."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM settings WHERE key = 'generation'").fetchone()
+            return row[0] if row else "0"
+
+    def ids(self, source: str) -> set:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT id FROM chunk_terms WHERE source = ?",
+                                                         (source,))}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunk_terms").fetchone()[0]
+
+    def search(self, query: str, top_k: int = 10, sources=None) -> list:
+        """[(chunk_id, bm25_score)] best first; only chunks sharing a term with the query."""
+        terms = set(tokenize(query))
+        with self._lock:
+            self._refresh()
+            if not terms or not self._chunk_ids:
+                return []
+            weights = [self._term_weights(term) for term in terms if term in self._postings]
+            if not weights:
+                return []
+            docs = np.concatenate([w[0] for w in weights])
+            scores = np.bincount(docs, weights=np.concatenate([w[1] for w in weights]),
+                                 minlength=len(self._chunk_ids))
+            if sources:
+                codes = [self._source_codes[s] for s in sources if s in self._source_codes]
+                scores[~np.isin(self._chunk_sources, codes)] = 0.0
+
+            k = min(top_k, int(np.count_nonzero(scores)))
+            if k <= 0:
+                return []
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            return [(self._chunk_ids[i], float(scores[i])) for i in best]
+
+    # ───────────── In-memory postings ─────────────
+
+    def _refresh(self):
+        generation = self.version()
+        if generation != self._loaded:
+            self._load()
+            self._loaded = generation
+
+    def _load(self):
+        postings, chunk_ids, sources, lengths, source_codes = {}, [], [], [], {}
+        rows = self._conn.execute("SELECT id, source, terms FROM chunk_terms")
+        for doc, (chunk_id, source, terms) in enumerate(rows):
+            counts = json.loads(terms)
+            chunk_ids.append(chunk_id)
+            sources.append(source_codes.setdefault(source, len(source_codes)))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(doc)
+                postings[term][1].append(tf)
+        self._chunk_ids = chunk_ids
+        self._chunk_sources = np.asarray(sources, dtype=np.int32)
+        self._source_codes = source_codes
+        self._lengths = np.asarray(lengths, dtype=np.float32)
+        self._avg_length = float(self._lengths.mean()) if lengths else 0.0
+        self._postings = {term: (np.asarray(docs, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+                          for term, (docs, tfs) in postings.items()}
+        self._weights = {}
+
+    def _term_weights(self, term: str):
+        """(chunk rows, BM25 contribution per row) for one term, computed once per load."""
+        cached = self._weights.get(term)
+        if cached is None:
+            docs, tfs = self._postings[term]
+            n = len(self._chunk_ids)
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[docs] / max(self._avg_length, 1e-9))
+            cached = self._weights[term] = (docs, idf * tfs * (self.k1 + 1) / (tfs + norm))
+        return cached
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> BM25Index:
+    """Process-wide BM25 index, created on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = BM25Index()
+        return _index
@@ -1,28 +1,60 @@
 import os
+import time
 import openai
-from typing import List
+import numpy as np
+from typing import List, Optional
 from dotenv import load_dotenv
-from pinecone import Pinecone
 from langchain.tools import tool
 
+from agents.rag_agent.embedding_cache import get_embedding_cache
+from agents.rag_agent.vector_store import get_vector_store
+from agents.rag_agent.lexical_index import get_lexical_index
+from agents.rag_agent.chunk_store import get_chunk_store
+from agents.rag_agent.retrieval_cache import get_retrieval_cache, manifest_version
+from parsing_chunks.tokenizer import count_tokens, split_by_tokens
+
 # 🔐 Load environment variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 INDEX_NAME = os.getenv("PINECONE_INDEX")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+
+# 🎛️ Retrieval defaults (each can be overridden per call)
+SOURCES = ["cdc1", "cdc2", "who1", "who2", "sdoh_strategies1", "sdoh_strategies2", "additional", "additional2"]
+RAG_DEFAULT_SOURCES = [s.strip() for s in os.getenv("RAG_DEFAULT_SOURCES", "additional2").split(",") if s.strip()]  # empty: all
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "10"))
+RAG_MIN_SCORE = float(os.getenv("RAG_MIN_SCORE", "0"))      # drop dense matches scoring below this
+RAG_MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "1.0"))  # 1.0: pure relevance, lower: more diverse chunks
+RAG_MMR_FETCH_K = int(os.getenv("RAG_MMR_FETCH_K", "0"))    # MMR / fusion candidate pool; 0: 3 x top_k
+RAG_HYBRID = os.getenv("RAG_HYBRID", "true").lower() in ("1", "true", "yes")  # fuse BM25 with dense ranks
+RAG_RRF_K = int(os.getenv("RAG_RRF_K", "60"))  # reciprocal rank fusion damping
+RAG_LEXICAL_WEIGHT = float(os.getenv("RAG_LEXICAL_WEIGHT", "0.5"))  # BM25's share of the fused score vs dense 1.0
+RAG_CONTEXT_TOKENS = int(os.getenv("RAG_CONTEXT_TOKENS", "3000"))  # context budget for the prompt; 0: unlimited
+RAG_MIN_TRIMMED_TOKENS = 64  # a truncated last chunk shorter than this is dropped instead
 
 # 🧠 Initialize OpenAI
 openai.api_key = OPENAI_API_KEY
 
-# 📌 Initialize Pinecone
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(INDEX_NAME)
+# 📌 Vector store: Pinecone, or the in-process index with VECTOR_STORE=local
+store = get_vector_store(INDEX_NAME)
+
+# 📚 Chunk bodies, keyed by chunk ID; searches only return IDs and scores
+chunk_store = get_chunk_store()
+
+# 🔤 Local BM25 index written by ingestion, for exact terms like "PERMA" or "PCMH"
+lexical_index = get_lexical_index()
+
+# 🗂️ Retrieval results are dropped whenever an ingestion run rewrites the manifest or a local index
+retrieval_cache = get_retrieval_cache(
+    version=lambda: (manifest_version(), store.version(), lexical_index.version())
+)
 
 # 🔎 Get OpenAI embedding
-def get_query_embedding(query: str) -> List[float]:
+def embed_query(query: str) -> List[float]:
     try:
         response = openai.embeddings.create(
-            model="text-embedding-3-small",
+            model=EMBEDDING_MODEL,
             input=query
         )
         return response.data[0].embedding
@@ -30,32 +62,174 @@ def get_query_embedding(query: str) -> List[float]:
         print("❌ Embedding error:", e)
         return []
 
-# 🔍 Search Pinecone index
-def retrieve_context_chunks(query: str, top_k: int = 10) -> str:
+# 🗃️ Repeated questions are served from the shared embedding cache
+def get_query_embedding(query: str) -> List[float]:
+    return get_embedding_cache().get_or_embed(EMBEDDING_MODEL, query, embed_query)
+
+def embedding_cache_stats() -> dict:
+    return get_embedding_cache().stats()
+
+def retrieval_cache_stats() -> dict:
+    return retrieval_cache.stats()
+
+def source_filter(sources) -> Optional[dict]:
+    if not sources:
+        return None
+    if len(sources) == 1:
+        return {"source": {"$eq": sources[0]}}
+    return {"source": {"$in": list(sources)}}
+
+# 🧮 Maximal marginal relevance: trade a little relevance for chunks that don't repeat each other.
+# Candidates without a vector (lexical-only hits) are never penalized as redundant.
+def mmr_select(relevance, candidate_embeddings, k: int, lambda_mult: float) -> List[int]:
+    if not len(relevance):
+        return []
+    dim = next((len(v) for v in candidate_embeddings if v is not None), 0)
+    vectors = np.zeros((len(relevance), dim), dtype=np.float32)
+    for i, values in enumerate(candidate_embeddings):
+        if values is not None:
+            vectors[i] = values
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    relevance = np.asarray(relevance, dtype=np.float32)
+    redundancy = np.zeros(len(vectors), dtype=np.float32)  # max similarity to anything picked so far
+    picked = []
+    for _ in range(min(k, len(vectors))):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[picked] = -np.inf
+        best = int(np.argmax(scores))
+        picked.append(best)
+        redundancy = np.maximum(redundancy, vectors @ vectors[best])
+    return picked
+
+# 🔀 Reciprocal rank fusion: sum weight / (k + rank) over every ranking a chunk appears in
+def rrf_fuse(rankings, weights=None, k: int = RAG_RRF_K):
+    positions, contributions, index = [], [], {}
+    for ranking, weight in zip(rankings, weights or [1.0] * len(rankings)):
+        positions.extend(index.setdefault(chunk_id, len(index)) for chunk_id in ranking)
+        contributions.append(weight / (k + np.arange(1, len(ranking) + 1)))
+    if not index:
+        return [], np.zeros(0)
+    scores = np.bincount(positions, weights=np.concatenate(contributions), minlength=len(index))
+    order = np.argsort(-scores, kind="stable")
+    ids = list(index)
+    return [ids[i] for i in order], scores[order]
+
+# ✂️ Keep ranked chunks until the prompt budget runs out; the chunk that crosses it is truncated
+def fit_to_budget(chunks: List[str], max_tokens: int) -> List[str]:
+    if not max_tokens:
+        return chunks
+    kept, remaining = [], max_tokens
+    for chunk in chunks:
+        tokens = count_tokens(chunk)
+        if tokens <= remaining:
+            kept.append(chunk)
+            remaining -= tokens
+            continue
+        if remaining >= RAG_MIN_TRIMMED_TOKENS or not kept:
+            kept.append(split_by_tokens(chunk, remaining)[0])
+        break
+    return kept
+
+# 📚 Look chunk bodies up locally. Vectors indexed before the chunk store existed still carry
+# their text in metadata: fetch those once and keep them in the store.
+def chunk_texts(ids) -> dict:
+    texts = chunk_store.get(ids)
+    missing = [i for i in ids if i not in texts]
+    if missing:
+        try:
+            legacy = {i: v["metadata"] for i, v in store.fetch(missing).items() if v["metadata"].get("text")}
+        except Exception as e:
+            print("⚠️ Could not fetch legacy chunk text:", e)
+            legacy = {}
+        if legacy:
+            chunk_store.add((i, m["text"], m.get("source", "")) for i, m in legacy.items())
+            texts.update({i: m["text"] for i, m in legacy.items()})
+    return texts
+
+# 🏅 Rank chunks for a query: dense matches, fused with BM25 matches when hybrid, then MMR.
+# Returns [{"id", "score", "text"}] best first.
+def rank_chunks(query: str, embedding, top_k: int, sources=(), min_score: float = 0.0,
+                mmr_lambda: float = 1.0, hybrid: bool = RAG_HYBRID) -> List[dict]:
+    use_mmr = mmr_lambda < 1.0
+    fetch_k = max(top_k, RAG_MMR_FETCH_K or 3 * top_k) if use_mmr or hybrid else top_k
+    results = store.query(
+        embedding,
+        top_k=fetch_k,
+        include_metadata=False,
+        include_values=use_mmr,
+        filter=source_filter(sources)
+    )
+    dense = {m["id"]: m for m in results.get("matches", []) if m["score"] >= min_score}
+    ranked = list(dense)
+    relevance = np.array([dense[i]["score"] for i in ranked], dtype=np.float32)
+    if hybrid:
+        lexical = lexical_index.search(query, fetch_k, sources)
+        if lexical:
+            ranked, relevance = rrf_fuse([ranked, [chunk_id for chunk_id, _ in lexical]],
+                                         weights=[1.0, RAG_LEXICAL_WEIGHT])
+            relevance = relevance / relevance[0]  # scale to [0, 1] so MMR weighs it like a cosine
+
+    if use_mmr:
+        order = mmr_select(relevance, [dense[i]["values"] if i in dense else None for i in ranked],
+                           top_k, mmr_lambda)
+    else:
+        order = range(min(top_k, len(ranked)))
+    picked = [ranked[i] for i in order]
+
+    texts = chunk_texts(picked)
+    return [{"id": i, "score": float(relevance[j]), "text": texts[i]} for i, j in zip(picked, order) if i in texts]
+
+# 🔍 Search the vector index (exact query cache → semantic cache → vector store)
+def retrieve_context_chunks(query: str, top_k: int = None, sources: List[str] = None, min_score: float = None,
+                            mmr_lambda: float = None, max_tokens: int = None, hybrid: bool = None) -> str:
+    top_k = top_k or RAG_TOP_K
+    sources = tuple(sorted(RAG_DEFAULT_SOURCES if sources is None else sources))
+    min_score = RAG_MIN_SCORE if min_score is None else min_score
+    mmr_lambda = RAG_MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+    max_tokens = RAG_CONTEXT_TOKENS if max_tokens is None else max_tokens
+    hybrid = RAG_HYBRID if hybrid is None else hybrid
+
+    params = (top_k, sources, min_score, mmr_lambda, RAG_MMR_FETCH_K, max_tokens, hybrid)
+    cached = retrieval_cache.get(query, params)
+    if cached is not None:
+        return cached
+
+    start = time.perf_counter()
     embedding = get_query_embedding(query)
     if not embedding:
         return "❌ Failed to get query embedding."
 
+    cached = retrieval_cache.get_similar(embedding, params, elapsed=time.perf_counter() - start)
+    if cached is not None:
+        return cached
+
     try:
-        results = index.query(
-            vector=embedding,
-            top_k=top_k,
-            include_metadata=True,
-            filter={"source": {"$eq": "additional2"}}
-        )
-        chunks = [match["metadata"]["text"] for match in results.get("matches", [])]
-        return "\n\n".join(chunks) if chunks else "No relevant context found."
+        matches = rank_chunks(query, embedding, top_k, sources, min_score, mmr_lambda, hybrid)
+        chunks = fit_to_budget([match["text"] for match in matches], max_tokens)
+        context = "\n\n".join(chunks) if chunks else "No relevant context found."
     except Exception as e:
-        print("❌ Pinecone query error:", e)
+        print("❌ Vector store query error:", e)
         return "❌ Pinecone retrieval failed."
 
+    retrieval_cache.put(query, embedding, context, params, cost=time.perf_counter() - start)
+    return context
+
 
 
 # 🛠️ LangGraph-compatible tool
 
 @tool
-def vector_search(query: str) -> str:
-    """Useful for retrieving relevant report context chunks for a given query from Pinecone."""
-    print(f"🔎 [Vector Search Tool] Query received: {query}")
-    return retrieve_context_chunks(query)
+def vector_search(query: str, sources: Optional[List[str]] = None, top_k: Optional[int] = None) -> str:
+    """Useful for retrieving relevant report context chunks for a given query from Pinecone.
 
+    sources optionally narrows the search to some of: cdc1, cdc2, who1, who2, sdoh_strategies1,
+    sdoh_strategies2, additional, additional2 (default: additional2, the chart frameworks document).
+    top_k optionally sets how many chunks to return (default 10).
+    """
+    print(f"🔎 [Vector Search Tool] Query received: {query} (sources={sources}, top_k={top_k})")
+    if sources:
+        unknown = [s for s in sources if s not in SOURCES]
+        if unknown:
+            print(f"⚠️ Ignoring unknown sources: {unknown}")
+        sources = [s for s in sources if s in SOURCES] or None
+    return retrieve_context_chunks(query, top_k=top_k, sources=sources)
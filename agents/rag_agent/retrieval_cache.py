@@ -0,0 +1,208 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "512"))  # 0 disables the cache
+RETRIEVAL_CACHE_TTL_SECONDS = float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "3600"))
+RETRIEVAL_CACHE_SIMILARITY = float(os.getenv("RETRIEVAL_CACHE_SIMILARITY", "0.95"))  # > 1 disables the semantic tier
+INDEX_MANIFEST_PATH = os.getenv("INDEX_MANIFEST_PATH", ".cache/index_manifest.json")
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation and whitespace don't change what a query retrieves."""
+    return " ".join(_PUNCTUATION.sub(" ", query.lower()).split())
+
+
+def manifest_version(path: str = INDEX_MANIFEST_PATH):
+    """Changes whenever an ingestion run saves the index manifest."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class RetrievalCache:
+    """
+    Two-level cache of retrieval results.
+
+    The exact tier is keyed by the normalized query text; the semantic tier
+    compares the query embedding against every cached one in a single matrix
+    product and reuses the best entry at or above the cosine threshold. Both
+    tiers only match entries retrieved with the same parameters (top_k,
+    filter, ...). Entries expire after ttl_seconds, and the whole cache is
+    dropped whenever version() changes, i.e. after a re-ingestion.
+
+    Each entry remembers how long the original retrieval took, so stats()
+    can report the latency hits saved.
+    """
+
+    def __init__(self, max_entries: int = RETRIEVAL_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = RETRIEVAL_CACHE_TTL_SECONDS,
+                 similarity: float = RETRIEVAL_CACHE_SIMILARITY, version=manifest_version):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.version = version
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (normalized query, params) -> entry dict, in LRU order
+        self._vectors = None           # (max_entries, dim) normalized query embeddings, one row per slot
+        self._slot_keys = [None] * max_entries
+        self._slot_params = np.full(max_entries, -1, dtype=np.int64)  # interned params per slot, -1 = free
+        self._params_ids = {}
+        self._version = None
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "expired": 0, "evictions": 0,
+                       "invalidations": 0, "saved_seconds": 0.0, "miss_seconds": 0.0}
+
+    # ───────────── Lookup ─────────────
+
+    def get(self, query: str, params=()):
+        """Exact tier: the cached result for this normalized query, or None."""
+        if not self.max_entries:
+            return None
+        start = time.perf_counter()
+        key = (normalize_query(query), params)
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None or not self._alive(key, entry):
+                return None
+            self._entries.move_to_end(key)
+            self._stats["exact_hits"] += 1
+            self._stats["saved_seconds"] += max(0.0, entry["cost"] - (time.perf_counter() - start))
+            return entry["result"]
+
+    def get_similar(self, embedding, params=(), elapsed: float = 0.0):
+        """
+        Semantic tier: the result of the closest cached query with the same params
+        if its cosine similarity reaches the threshold, else None (counted as a miss).
+        elapsed is what the caller already spent (e.g. embedding) before this lookup.
+        """
+        if not self.max_entries:
+            return None
+        start = time.perf_counter()
+        with self._lock:
+            self._check_version()
+            params_id = self._params_ids.get(params)
+            if self._vectors is not None and params_id is not None and self.similarity <= 1.0:
+                q = self._normalize(embedding)
+                if q is not None and len(q) == self._vectors.shape[1]:
+                    scores = self._vectors @ q
+                    scores[self._slot_params != params_id] = -np.inf
+                    slot = int(np.argmax(scores))
+                    if scores[slot] >= self.similarity:
+                        key = self._slot_keys[slot]
+                        entry = self._entries[key]
+                        if self._alive(key, entry):
+                            self._entries.move_to_end(key)
+                            self._stats["semantic_hits"] += 1
+                            spent = elapsed + time.perf_counter() - start
+                            self._stats["saved_seconds"] += max(0.0, entry["cost"] - spent)
+                            return entry["result"]
+            self._stats["misses"] += 1
+            return None
+
+    # ───────────── Updates ─────────────
+
+    def put(self, query: str, embedding, result, params=(), cost: float = 0.0):
+        """Store a result; cost is how long retrieving it took (embedding + search)."""
+        if not self.max_entries:
+            return
+        key = (normalize_query(query), params)
+        q = self._normalize(embedding)
+        with self._lock:
+            self._check_version()
+            self._stats["miss_seconds"] += cost
+            if key in self._entries:
+                self._remove(key)
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+            slot = None
+            if q is not None:
+                if self._vectors is None:
+                    self._vectors = np.zeros((self.max_entries, len(q)), dtype=np.float32)
+                if len(q) == self._vectors.shape[1]:
+                    slot = self._slot_keys.index(None)
+                    self._vectors[slot] = q
+                    self._slot_keys[slot] = key
+                    self._slot_params[slot] = self._params_ids.setdefault(params, len(self._params_ids))
+            self._entries[key] = {"result": result, "slot": slot, "cost": cost, "created_at": time.time()}
+
+    def invalidate(self):
+        with self._lock:
+            self._clear()
+            self._stats["invalidations"] += 1
+
+    # ───────────── Reporting ─────────────
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries))
+        lookups = stats["exact_hits"] + stats["semantic_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["exact_hits"] + stats["semantic_hits"]) / lookups if lookups else 0.0
+        stats["avg_miss_seconds"] = stats["miss_seconds"] / stats["misses"] if stats["misses"] else 0.0
+        return stats
+
+    def report(self) -> str:
+        s = self.stats()
+        return (f"🗂️ Retrieval cache: {s['exact_hits']} exact + {s['semantic_hits']} semantic hits, "
+                f"{s['misses']} misses ({s['hit_rate']:.0%}), {s['saved_seconds']:.2f}s saved "
+                f"(avg miss {s['avg_miss_seconds'] * 1000:.0f} ms), {s['expired']} expired, "
+                f"{s['invalidations']} invalidations, {s['entries']} entries")
+
+    # ───────────── Internals (lock held) ─────────────
+
+    def _alive(self, key, entry) -> bool:
+        if self.ttl_seconds and time.time() - entry["created_at"] > self.ttl_seconds:
+            self._remove(key)
+            self._stats["expired"] += 1
+            return False
+        return True
+
+    def _check_version(self):
+        version = self.version() if self.version else None
+        if version != self._version:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._clear()
+            self._version = version
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        if entry["slot"] is not None:
+            self._slot_keys[entry["slot"]] = None
+            self._slot_params[entry["slot"]] = -1
+
+    def _clear(self):
+        self._entries.clear()
+        self._slot_keys = [None] * self.max_entries
+        self._slot_params[:] = -1
+
+    @staticmethod
+    def _normalize(embedding):
+        if embedding is None or len(embedding) == 0:
+            return None
+        q = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        return q / norm if norm else None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_retrieval_cache(version=manifest_version) -> RetrievalCache:
+    """Process-wide retrieval cache, created on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RetrievalCache(version=version)
+        return _cache
@@ -0,0 +1,390 @@
+"""
+Vector store backends shared by rag_tool (queries) and parsing_chunks (ingestion).
+
+VECTOR_STORE=pinecone (default) talks to the hosted index. VECTOR_STORE=local
+keeps the corpus in process: vectors live in a memory-mapped float32 matrix,
+IDs and metadata in SQLite next to it, and a query is one NumPy matrix-vector
+product plus argpartition, with no network hop. LOCAL_VECTOR_INDEX=ivf adds an
+inverted-file index (spherical k-means lists, LOCAL_VECTOR_IVF_PROBES probed
+per query) for corpora too large to scan.
+
+Both backends take Pinecone-shaped input and return Pinecone-shaped results
+({"matches": [{"id", "score", "metadata"}]}), and the local one understands
+the same metadata filters: {"source": {"$eq": "cdc1"}}, $ne, $in, $nin, a bare
+value as shorthand for $eq, and $and.
+"""
+import os
+import json
+import sqlite3
+import threading
+
+import numpy as np
+
+VECTOR_STORE = os.getenv("VECTOR_STORE", "pinecone")
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", ".cache/vector_store")
+LOCAL_VECTOR_INDEX = os.getenv("LOCAL_VECTOR_INDEX", "exact")  # exact | ivf
+LOCAL_VECTOR_METRIC = os.getenv("LOCAL_VECTOR_METRIC", "cosine")  # cosine | dotproduct
+IVF_LISTS = int(os.getenv("LOCAL_VECTOR_IVF_LISTS", "0"))  # 0: about sqrt(n) lists
+IVF_PROBES = int(os.getenv("LOCAL_VECTOR_IVF_PROBES", "8"))
+IVF_MIN_VECTORS = int(os.getenv("LOCAL_VECTOR_IVF_MIN_VECTORS", "2048"))  # below this, scan everything
+
+
+class VectorStore:
+    """upsert([(id, values, metadata)]), delete(ids), query(...) -> {"matches": [...]}, list_ids(prefix),
+    fetch(ids) -> {id: {"values", "metadata"}}.
+
+    Matches carry "id" and "score", plus "metadata" / "values" when asked for.
+    """
+
+    def upsert(self, vectors):
+        raise NotImplementedError
+
+    def delete(self, ids):
+        raise NotImplementedError
+
+    def query(self, vector, top_k: int = 10, filter: dict = None, include_metadata: bool = True,
+              include_values: bool = False) -> dict:
+        raise NotImplementedError
+
+    def list_ids(self, prefix: str) -> list:
+        raise NotImplementedError
+
+    def fetch(self, ids) -> dict:
+        raise NotImplementedError
+
+    def version(self):
+        """Changes whenever the stored vectors do; None if the backend can't tell."""
+        return None
+
+
+class PineconeStore(VectorStore):
+    def __init__(self, index):
+        self.index = index
+
+    def upsert(self, vectors):
+        self.index.upsert(vectors=vectors)
+
+    def delete(self, ids):
+        self.index.delete(ids=ids)
+
+    def query(self, vector, top_k: int = 10, filter: dict = None, include_metadata: bool = True,
+              include_values: bool = False):
+        return self.index.query(vector=vector, top_k=top_k, include_metadata=include_metadata,
+                                include_values=include_values, filter=filter)
+
+    def list_ids(self, prefix: str) -> list:
+        return [i for page in self.index.list(prefix=prefix) for i in page]
+
+    def fetch(self, ids) -> dict:
+        ids, vectors = list(ids), {}
+        for start in range(0, len(ids), 1000):  # Pinecone's per-request fetch limit
+            response = self.index.fetch(ids=ids[start:start + 1000])
+            vectors.update({vector_id: {"values": v.values, "metadata": v.metadata or {}}
+                            for vector_id, v in response.vectors.items()})
+        return vectors
+
+
+class LocalVectorStore(VectorStore):
+    def __init__(self, path: str = LOCAL_VECTOR_STORE_PATH, mode: str = LOCAL_VECTOR_INDEX,
+                 metric: str = LOCAL_VECTOR_METRIC, nlist: int = IVF_LISTS, nprobe: int = IVF_PROBES,
+                 ivf_min_vectors: int = IVF_MIN_VECTORS):
+        if mode not in ("exact", "ivf"):
+            raise ValueError(f"Unknown local index mode: {mode}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.mode = mode
+        self.metric = metric
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.ivf_min_vectors = ivf_min_vectors
+        self.matrix_path = os.path.join(path, "vectors.f32")
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(path, "metadata.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS vectors (id TEXT PRIMARY KEY, row INTEGER NOT NULL, "
+                           "metadata TEXT NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+        self._generation = None
+        self._load()
+
+    # ───────────── Loading ─────────────
+
+    def _setting(self, key: str, default=None):
+        row = self._conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _load(self):
+        """(Re)read IDs and metadata from SQLite and map the matrix; called at start and after other writers."""
+        self._generation = self._setting("generation", "0")
+        self.dimension = int(self._setting("dimension", "0"))
+        rows = self._conn.execute("SELECT id, row, metadata FROM vectors").fetchall()
+        self._rows = max((row for _, row, _ in rows), default=-1) + 1  # high-water mark
+        self._ids = [None] * self._rows
+        self._metadata = [None] * self._rows
+        self._id_to_row = {}
+        for vector_id, row, metadata in rows:
+            self._ids[row] = vector_id
+            self._metadata[row] = json.loads(metadata)
+            self._id_to_row[vector_id] = row
+        self._valid = np.zeros(self._rows, dtype=bool)
+        self._valid[list(self._id_to_row.values())] = True
+        self._matrix, self._capacity = None, 0
+        if self.dimension and os.path.exists(self.matrix_path):
+            self._capacity = os.path.getsize(self.matrix_path) // (4 * self.dimension)
+            if self._capacity:
+                self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r+",
+                                         shape=(self._capacity, self.dimension))
+        self._invalidate()
+
+    def _refresh(self):
+        """Pick up writes made by another process (e.g. an ingestion run) since the last load."""
+        if self._setting("generation", "0") != self._generation:
+            self._load()
+
+    def _invalidate(self):
+        self._field_codes = {}
+        self._ivf = None
+
+    # ───────────── Writes ─────────────
+
+    def upsert(self, vectors):
+        entries = [(v["id"], v["values"], v.get("metadata") or {}) if isinstance(v, dict) else
+                   (v[0], v[1], v[2] if len(v) > 2 else {}) for v in vectors]
+        if not entries:
+            return
+        values = np.asarray([values for _, values, _ in entries], dtype=np.float32)
+        if self.metric == "cosine":
+            norms = np.linalg.norm(values, axis=1, keepdims=True)
+            values /= np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            self._refresh()
+            if not self.dimension:
+                self.dimension = values.shape[1]
+                self._conn.execute("INSERT OR REPLACE INTO settings VALUES ('dimension', ?)",
+                                   (str(self.dimension),))
+            elif values.shape[1] != self.dimension:
+                raise ValueError(f"Vector dimension {values.shape[1]} does not match the store's {self.dimension}")
+
+            free = [int(row) for row in np.flatnonzero(~self._valid)[::-1]]
+            rows = []
+            for vector_id, _, _ in entries:
+                row = self._id_to_row.get(vector_id)
+                if row is None:
+                    row = free.pop() if free else self._grow_rows()
+                    self._id_to_row[vector_id] = row
+                rows.append(row)
+            self._ensure_capacity(self._rows)
+
+            for (vector_id, _, metadata), row in zip(entries, rows):
+                self._ids[row] = vector_id
+                self._metadata[row] = metadata
+                self._valid[row] = True
+            # Matrix first, then the commit that makes the rows visible to other processes
+            self._matrix[rows] = values
+            self._matrix.flush()
+            self._conn.executemany("INSERT OR REPLACE INTO vectors VALUES (?, ?, ?)",
+                                   [(vector_id, row, json.dumps(metadata))
+                                    for (vector_id, _, metadata), row in zip(entries, rows)])
+            self._commit()
+
+    def delete(self, ids):
+        with self._lock:
+            self._refresh()
+            rows = [self._id_to_row.pop(vector_id) for vector_id in ids if vector_id in self._id_to_row]
+            if not rows:
+                return
+            for row in rows:
+                self._ids[row] = None
+                self._metadata[row] = None
+            self._valid[rows] = False
+            self._conn.executemany("DELETE FROM vectors WHERE id = ?", [(vector_id,) for vector_id in ids])
+            self._commit()
+
+    def _commit(self):
+        self._generation = str(int(self._generation or 0) + 1)
+        self._conn.execute("INSERT OR REPLACE INTO settings VALUES ('generation', ?)", (self._generation,))
+        self._conn.commit()
+        self._invalidate()
+
+    def _grow_rows(self) -> int:
+        row = self._rows
+        self._rows += 1
+        self._ids.append(None)
+        self._metadata.append(None)
+        self._valid = np.append(self._valid, False)
+        return row
+
+    def _ensure_capacity(self, rows_needed: int):
+        if rows_needed <= self._capacity:
+            return
+        capacity = max(1024, self._capacity)
+        while capacity < rows_needed:
+            capacity *= 2
+        if self._matrix is not None:
+            self._matrix.flush()
+        self._matrix = None
+        with open(self.matrix_path, "a+b") as f:
+            f.truncate(capacity * self.dimension * 4)
+        self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+        self._capacity = capacity
+
+    # ───────────── Queries ─────────────
+
+    def query(self, vector, top_k: int = 10, filter: dict = None, include_metadata: bool = True,
+              include_values: bool = False) -> dict:
+        with self._lock:
+            self._refresh()
+            n = self._rows
+            if not n or self._matrix is None:
+                return {"matches": []}
+            q = np.asarray(vector, dtype=np.float32)
+            if self.metric == "cosine":
+                norm = np.linalg.norm(q)
+                q = q / norm if norm else q
+
+            mask = self._valid if not filter else self._valid & self._filter_mask(filter)
+            candidates = self._ivf_candidates(q, mask, top_k) if self.mode == "ivf" else None
+            if candidates is None:
+                scores = self._matrix[:n] @ q
+                scores[~mask] = -np.inf
+                rows = np.arange(n)
+            else:
+                rows = candidates
+                scores = self._matrix[rows] @ q
+
+            k = min(top_k, int(np.count_nonzero(np.isfinite(scores))))
+            if k <= 0:
+                return {"matches": []}
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            matches = []
+            for i in best:
+                row = int(rows[i])
+                match = {"id": self._ids[row], "score": float(scores[i])}
+                if include_metadata:
+                    match["metadata"] = self._metadata[row]
+                if include_values:
+                    match["values"] = self._matrix[row].tolist()
+                matches.append(match)
+            return {"matches": matches}
+
+    def list_ids(self, prefix: str) -> list:
+        with self._lock:
+            self._refresh()
+            return [vector_id for vector_id in self._id_to_row if vector_id.startswith(prefix)]
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._id_to_row)
+
+    def fetch(self, ids) -> dict:
+        with self._lock:
+            self._refresh()
+            rows = {vector_id: self._id_to_row[vector_id] for vector_id in ids if vector_id in self._id_to_row}
+            return {vector_id: {"values": self._matrix[row].tolist(), "metadata": self._metadata[row]}
+                    for vector_id, row in rows.items()}
+
+    def version(self):
+        with self._lock:
+            return self._setting("generation", "0")
+
+    # ───────────── Filters ─────────────
+
+    def _filter_mask(self, flt: dict) -> np.ndarray:
+        mask = np.ones(self._rows, dtype=bool)
+        for field, condition in flt.items():
+            if field == "$and":
+                for sub in condition:
+                    mask &= self._filter_mask(sub)
+                continue
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            codes, lookup = self._field_index(field)
+            for op, value in condition.items():
+                if op in ("$eq", "$ne"):
+                    hit = codes == lookup.get(_hashable(value), -2)
+                    mask &= hit if op == "$eq" else ~hit
+                elif op in ("$in", "$nin"):
+                    hit = np.isin(codes, [lookup[v] for v in map(_hashable, value) if v in lookup])
+                    mask &= hit if op == "$in" else ~hit
+                else:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+        return mask
+
+    def _field_index(self, field: str):
+        """Integer codes of one metadata field for every row (-1 where missing), cached until the next write."""
+        cached = self._field_codes.get(field)
+        if cached is None:
+            lookup, codes = {}, np.full(self._rows, -1, dtype=np.int32)
+            for row, metadata in enumerate(self._metadata):
+                if metadata is None or field not in metadata:
+                    continue
+                value = _hashable(metadata[field])
+                codes[row] = lookup.setdefault(value, len(lookup))
+            cached = self._field_codes[field] = (codes, lookup)
+        return cached
+
+    # ───────────── IVF ─────────────
+
+    def _ivf_candidates(self, q, mask, top_k: int):
+        """Rows in the lists nearest to q that pass the mask, or None to fall back to a full scan."""
+        if np.count_nonzero(self._valid) < self.ivf_min_vectors:
+            return None
+        if self._ivf is None:
+            self._ivf = self._build_ivf()
+        centroids, lists = self._ivf
+        probes = min(self.nprobe, len(lists))
+        nearest = np.argpartition(-(centroids @ q), probes - 1)[:probes]
+        rows = np.concatenate([lists[c] for c in nearest])
+        rows = rows[mask[rows]]
+        # A narrow filter can leave too few candidates in the probed lists
+        return rows if len(rows) >= top_k else None
+
+    def _build_ivf(self, iterations: int = 10, seed: int = 0):
+        rows = np.flatnonzero(self._valid)
+        data = np.asarray(self._matrix[rows])
+        nlist = min(len(rows), self.nlist or max(1, int(np.sqrt(len(rows)))))
+        rng = np.random.default_rng(seed)
+        centroids = data[rng.choice(len(rows), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, data)
+            counts = np.bincount(assign, minlength=nlist)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids /= np.where(norms == 0, 1, norms)
+        assign = np.argmax(data @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(nlist + 1))
+        lists = [rows[order[bounds[c]:bounds[c + 1]]] for c in range(nlist)]
+        return centroids, lists
+
+
+def _hashable(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_vector_store(index_name: str = None, backend: str = VECTOR_STORE) -> VectorStore:
+    """Process-wide store for the index, created on first use."""
+    key = (backend, index_name)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            if backend == "local":
+                store = LocalVectorStore(os.path.join(LOCAL_VECTOR_STORE_PATH, index_name or "default"))
+            elif backend == "pinecone":
+                from pinecone import Pinecone
+                store = PineconeStore(Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index(index_name))
+            else:
+                raise ValueError(f"Unknown VECTOR_STORE: {backend}")
+            _stores[key] = store
+        return store
@@ -0,0 +1,108 @@
+"""
+Thread-safe chart rendering on matplotlib's object-oriented API.
+
+Every chart gets its own Figure + FigureCanvasAgg, so nothing touches pyplot's
+global state and charts can be rendered concurrently. Charts are described by
+plain dicts (kind, data, labels) so the same spec can be shipped to a thread
+or process pool.
+"""
+import os
+import threading
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# 🎨 Shared style, applied once per process before any figure is created
+CHART_STYLE = {
+    "font.family": "DejaVu Sans",
+    "font.size": 10,
+    "axes.titlesize": 12,
+    "savefig.dpi": 100,
+    "figure.dpi": 100,
+}
+
+SUPPORTED_FORMATS = ("png", "svg", "webp")
+
+_style_lock = threading.Lock()
+_style_ready = False
+
+
+def setup_style():
+    """Apply CHART_STYLE and load the font cache once; later renders only read them."""
+    global _style_ready
+    if _style_ready:
+        return
+    with _style_lock:
+        if _style_ready:
+            return
+        matplotlib.rcParams.update(CHART_STYLE)
+        fig = Figure(figsize=(1, 1))
+        FigureCanvasAgg(fig)
+        fig.text(0.5, 0.5, "warm-up")
+        fig.canvas.draw()
+        _style_ready = True
+
+
+def figure_to_bytes(fig: Figure, fmt: str = "png") -> bytes:
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported chart format: {fmt}")
+    buffer = BytesIO()
+    fig.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def render_chart(spec: dict, fmt: str = "png") -> bytes:
+    """
+    Render a chart spec to image bytes.
+
+    spec keys: kind ("bar" | "scatter"), x, y, figsize, xlabel, ylabel, title,
+    and optionally xtick_rotation, xtick_ha, grid, tight_layout.
+    """
+    setup_style()
+    fig = Figure(figsize=spec["figsize"])
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    if spec["kind"] == "bar":
+        ax.bar(spec["x"], spec["y"])
+    elif spec["kind"] == "scatter":
+        ax.scatter(spec["x"], spec["y"])
+    else:
+        raise ValueError(f"Unknown chart kind: {spec['kind']}")
+
+    if spec.get("xtick_rotation") is not None:
+        ax.tick_params(axis="x", labelrotation=spec["xtick_rotation"])
+    if spec.get("xtick_ha"):
+        for label in ax.get_xticklabels():
+            label.set_horizontalalignment(spec["xtick_ha"])
+    ax.set_xlabel(spec["xlabel"])
+    ax.set_ylabel(spec["ylabel"])
+    ax.set_title(spec["title"])
+    if spec.get("grid"):
+        ax.grid(True)
+    if spec.get("tight_layout"):
+        fig.tight_layout()
+
+    return figure_to_bytes(fig, fmt)
+
+
+def _render_job(job):
+    spec, fmt = job
+    return render_chart(spec, fmt)
+
+
+def render_many(specs, fmt: str = "png", max_workers: int = None, use_processes: bool = False) -> list:
+    """Render several chart specs in parallel, returning bytes in input order."""
+    specs = list(specs)
+    if not specs:
+        return []
+    max_workers = max_workers or min(len(specs), os.cpu_count() or 1)
+    if max_workers == 1:
+        return [render_chart(spec, fmt) for spec in specs]
+
+    pool_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with pool_cls(max_workers=max_workers) as pool:
+        return list(pool.map(_render_job, [(spec, fmt) for spec in specs]))
@@ -0,0 +1,142 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Stable content hash of a DataFrame's columns, dtypes and values."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class ChartArtifactStore:
+    """
+    Rendered chart bytes keyed by a hash of the input DataFrame plus chart parameters.
+
+    A size-bounded in-memory LRU sits in front of an optional directory of
+    files, so identical data never gets rasterized twice, even across restarts.
+    """
+
+    def __init__(self, max_entries: int = 64, disk_dir: str = None, max_disk_entries: int = 512):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        self._entries = OrderedDict()  # key -> bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "renders": 0}
+
+    @staticmethod
+    def make_key(chart_name: str, df: pd.DataFrame, **params) -> str:
+        raw = json.dumps(
+            {"chart": chart_name, "data": frame_fingerprint(df), "params": params},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return data
+
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._stats["disk_hits"] += 1
+        self._store_memory(key, data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        self._store_memory(key, data)
+        self._write_disk(key, data)
+
+    def get_or_render(self, key: str, render) -> bytes:
+        data = self.get(key)
+        if data is None:
+            data = render()
+            with self._lock:
+                self._stats["renders"] += 1
+            self.put(key, data)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        for path in self._disk_files():
+            os.remove(path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = sum(len(v) for v in self._entries.values())
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["disk_enabled"] = bool(self.disk_dir)
+        return stats
+
+    # ───────────── Tiers ─────────────
+
+    def _store_memory(self, key: str, data: bytes):
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str):
+        return os.path.join(self.disk_dir, f"{key}.bin") if self.disk_dir else None
+
+    def _disk_files(self):
+        if not self.disk_dir:
+            return []
+        return [os.path.join(self.disk_dir, n) for n in os.listdir(self.disk_dir) if n.endswith(".bin")]
+
+    def _read_disk(self, key: str):
+        path = self._disk_path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError as e:
+            print(f"⚠️ Ignoring unreadable chart file {path}:", e)
+            return None
+
+    def _write_disk(self, key: str, data: bytes):
+        path = self._disk_path(key)
+        if not path:
+            return
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._prune_disk()
+        except OSError as e:
+            print(f"⚠️ Could not write chart file {path}:", e)
+
+    def _prune_disk(self):
+        files = self._disk_files()
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
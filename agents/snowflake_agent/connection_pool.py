@@ -0,0 +1,257 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Snowflake error codes for a session that the server no longer accepts
+SESSION_EXPIRED_ERRNOS = {390111, 390112, 390114}
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within acquire_timeout."""
+
+
+class PooledConnection:
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+        self.last_checked = now
+
+
+class SnowflakeConnectionPool:
+    """
+    Thread-safe pool of reusable Snowflake connections.
+
+    `connect` is any zero-argument callable returning a DB-API connection, so
+    tests can pass a fake connector instead of snowflake.connector.connect.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=4, idle_timeout=600.0,
+                 health_check_interval=60.0, acquire_timeout=30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._metrics = {
+            "acquired": 0,
+            "created": 0,
+            "discarded": 0,
+            "evicted": 0,
+            "reconnects": 0,
+            "timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    # ───────────── Acquire / Release ─────────────
+
+    def acquire(self) -> PooledConnection:
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+
+        expired = []
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+
+                expired.extend(self._evict_idle_locked())
+                if self._idle:
+                    pooled = self._idle.pop()  # LIFO keeps the warmest session busy
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    pooled = None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._metrics["timeouts"] += 1
+                    raise PoolTimeout(f"No Snowflake connection available after {self.acquire_timeout}s")
+                self._cond.wait(remaining)
+
+        # Network work (close / connect / health check) happens outside the lock
+        for stale in expired:
+            self._close_quietly(stale)
+        if pooled is None:
+            pooled = self._open()
+        elif not self._is_healthy(pooled):
+            self._close_quietly(pooled)
+            self._count("discarded")
+            pooled = self._open()
+
+        self._record_wait(time.monotonic() - start)
+        pooled.last_used = time.monotonic()
+        return pooled
+
+    def release(self, pooled: PooledConnection, discard: bool = False):
+        if discard or self._closed:
+            self._close_quietly(pooled)
+            with self._cond:
+                self._size -= 1
+                self._metrics["discarded"] += 1
+                self._cond.notify()
+            return
+
+        pooled.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is discarded if the session turned out to be dead."""
+        pooled = self.acquire()
+        try:
+            yield pooled.conn
+        except Exception as e:
+            self.release(pooled, discard=is_session_error(e, pooled.conn))
+            raise
+        else:
+            self.release(pooled)
+
+    def run(self, fn):
+        """Call fn(conn), reconnecting once if the pooled session has expired."""
+        try:
+            with self.connection() as conn:
+                return fn(conn)
+        except Exception as e:
+            if not is_session_error(e):
+                raise
+            print("🔄 Snowflake session expired, reconnecting...")
+            self._count("reconnects")
+            with self.connection() as conn:
+                return fn(conn)
+
+    # ───────────── Maintenance ─────────────
+
+    def prefill(self):
+        """Open connections until min_size sessions exist."""
+        opened = []
+        try:
+            while True:
+                with self._cond:
+                    if self._closed or self._size >= self.min_size:
+                        break
+                    self._size += 1
+                opened.append(self._open())
+        finally:
+            # Sessions opened before a failed login still go back to the pool
+            for pooled in opened:
+                self.release(pooled)
+
+    def evict_idle(self):
+        """Close idle connections past idle_timeout, keeping at least min_size open."""
+        with self._cond:
+            expired = self._evict_idle_locked()
+        for pooled in expired:
+            self._close_quietly(pooled)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._close_quietly(pooled)
+
+    def stats(self) -> dict:
+        with self._cond:
+            metrics = dict(self._metrics)
+            metrics.update({
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            })
+        acquired = metrics["acquired"]
+        metrics["wait_time_avg"] = metrics["wait_time_total"] / acquired if acquired else 0.0
+        return metrics
+
+    # ───────────── Internals ─────────────
+
+    def _open(self) -> PooledConnection:
+        try:
+            pooled = PooledConnection(self._connect())
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        self._count("created")
+        return pooled
+
+    def _is_healthy(self, pooled: PooledConnection) -> bool:
+        is_closed = getattr(pooled.conn, "is_closed", None)
+        if callable(is_closed) and is_closed():
+            return False
+        if time.monotonic() - pooled.last_checked < self.health_check_interval:
+            return True
+        try:
+            cursor = pooled.conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+        except Exception as e:
+            print("⚠️ Snowflake health check failed:", e)
+            return False
+        pooled.last_checked = time.monotonic()
+        return True
+
+    def _evict_idle_locked(self):
+        now = time.monotonic()
+        keep = deque()
+        expired = []
+        # Oldest connections sit at the left of the deque
+        while self._idle:
+            pooled = self._idle.popleft()
+            idle_for = now - pooled.last_used
+            if idle_for > self.idle_timeout and self._size - len(expired) > self.min_size:
+                expired.append(pooled)
+            else:
+                keep.append(pooled)
+        self._idle = keep
+        self._size -= len(expired)
+        self._metrics["evicted"] += len(expired)
+        return expired
+
+    def _record_wait(self, waited: float):
+        with self._cond:
+            self._metrics["acquired"] += 1
+            self._metrics["wait_time_total"] += waited
+            self._metrics["wait_time_max"] = max(self._metrics["wait_time_max"], waited)
+
+    def _count(self, key: str):
+        with self._cond:
+            self._metrics[key] += 1
+
+    @staticmethod
+    def _close_quietly(pooled: PooledConnection):
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+
+
+def is_session_error(error: Exception, conn=None) -> bool:
+    """True if the error means the Snowflake session is gone and must be replaced."""
+    if getattr(error, "errno", None) in SESSION_EXPIRED_ERRNOS:
+        return True
+    is_closed = getattr(conn, "is_closed", None)
+    return bool(callable(is_closed) and is_closed())
@@ -0,0 +1,208 @@
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Whitespace runs outside single-quoted literals collapse to one space
+_SQL_WHITESPACE = re.compile(r"('(?:[^']|'')*')|\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse insignificant whitespace so formatting changes don't miss the cache."""
+    normalized = _SQL_WHITESPACE.sub(lambda m: m.group(1) or " ", sql)
+    return normalized.strip().rstrip(";").strip()
+
+
+class QueryResultCache:
+    """
+    TTL + LRU cache of query results, keyed on normalized SQL plus database/schema.
+
+    Entries live in memory (bounded by max_entries) and, when disk_dir is set, in
+    Parquet files that survive restarts. Disk entries expire by file mtime.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 64, disk_dir: str = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        self._entries = OrderedDict()  # key -> (expires_at, DataFrame)
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        # Bumped by invalidate(): globally for invalidate-all, per key otherwise
+        self._generation = 0
+        self._key_generations = {}
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def make_key(sql: str, database: str = None, schema: str = None) -> str:
+        raw = "\x1f".join([normalize_sql(sql), (database or "").upper(), (schema or "").upper()])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # ───────────── Lookup ─────────────
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, df = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return df.copy()
+                del self._entries[key]
+
+        df = self._read_disk(key, now)
+        if df is not None:
+            self._store_memory(key, df, now)
+            with self._lock:
+                self._stats["hits"] += 1
+                self._stats["disk_hits"] += 1
+            return df.copy()
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, df: pd.DataFrame):
+        now = time.time()
+        self._store_memory(key, df.copy(), now)
+        self._write_disk(key, df)
+
+    def get_or_load(self, sql: str, loader, database: str = None, schema: str = None) -> pd.DataFrame:
+        """Return the cached result for sql, running loader(sql) at most once per key on a miss."""
+        key = self.make_key(sql, database, schema)
+        df = self.get(key)
+        if df is not None:
+            return df
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        try:
+            with load_lock:
+                # Another thread may have loaded it while we waited
+                with self._lock:
+                    entry = self._entries.get(key)
+                    generation = self._generation_of(key)
+                if entry is not None and entry[0] > time.time():
+                    return entry[1].copy()
+
+                df = loader(sql)
+                self._put_if_current(key, df, generation)
+        finally:
+            with self._lock:
+                if self._load_locks.get(key) is load_lock:
+                    del self._load_locks[key]
+        return df
+
+    # ───────────── Invalidation ─────────────
+
+    def invalidate(self, sql: str = None, database: str = None, schema: str = None) -> int:
+        """Drop one query's cached result, or everything when sql is None. Returns entries removed."""
+        if sql is not None:
+            keys = [self.make_key(sql, database, schema)]
+        else:
+            with self._lock:
+                keys = list(self._entries)
+            keys += self._disk_keys()
+
+        removed = 0
+        with self._lock:
+            # Loads already in flight must not write back what was just dropped
+            if sql is None:
+                self._generation += 1
+                self._key_generations.clear()
+            else:
+                self._key_generations[keys[0]] = self._key_generations.get(keys[0], 0) + 1
+            for key in set(keys):
+                if self._entries.pop(key, None) is not None:
+                    removed += 1
+            self._stats["invalidations"] += 1
+        for key in set(keys):
+            path = self._disk_path(key)
+            if path and os.path.exists(path):
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["ttl"] = self.ttl
+        stats["max_entries"] = self.max_entries
+        stats["disk_enabled"] = bool(self.disk_dir)
+        return stats
+
+    # ───────────── Tiers ─────────────
+
+    def _generation_of(self, key: str) -> tuple:
+        # Caller holds self._lock
+        return self._generation, self._key_generations.get(key, 0)
+
+    def _put_if_current(self, key: str, df: pd.DataFrame, generation: tuple):
+        """Store a loaded result unless the key was invalidated after the load started."""
+        with self._lock:
+            if self._generation_of(key) != generation:
+                return
+        self._store_memory(key, df.copy(), time.time(), generation)
+        self._write_disk(key, df)
+        with self._lock:
+            current = self._generation_of(key) == generation
+        if not current:
+            # Invalidated while the file was being written
+            path = self._disk_path(key)
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    def _store_memory(self, key: str, df: pd.DataFrame, now: float, generation: tuple = None):
+        with self._lock:
+            if generation is not None and self._generation_of(key) != generation:
+                return
+            self._entries[key] = (now + self.ttl, df)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str):
+        return os.path.join(self.disk_dir, f"{key}.parquet") if self.disk_dir else None
+
+    def _disk_keys(self):
+        if not self.disk_dir:
+            return []
+        return [name[:-len(".parquet")] for name in os.listdir(self.disk_dir) if name.endswith(".parquet")]
+
+    def _read_disk(self, key: str, now: float):
+        path = self._disk_path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            if os.path.getmtime(path) + self.ttl <= now:
+                os.remove(path)
+                return None
+            return pd.read_parquet(path)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable cache file {path}:", e)
+            return None
+
+    def _write_disk(self, key: str, df: pd.DataFrame):
+        path = self._disk_path(key)
+        if not path:
+            return
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ Could not write cache file {path}:", e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -1,11 +1,17 @@
 import os
+import json
+import time
+import atexit
+import threading
 import pandas as pd
-import matplotlib.pyplot as plt
-from io import BytesIO
 import base64
 from dotenv import load_dotenv
 from langchain_core.tools import tool
 import snowflake.connector
+from agents.snowflake_agent.connection_pool import SnowflakeConnectionPool
+from agents.snowflake_agent.result_cache import QueryResultCache
+from agents.snowflake_agent.chart_store import ChartArtifactStore
+from agents.snowflake_agent.chart_renderer import render_chart, render_many
 
 load_dotenv()
 
@@ -14,9 +20,39 @@ SNOWFLAKE_ACCOUNT = os.getenv("SNOWFLAKE_ACCOUNT")
 SNOWFLAKE_REGION = os.getenv("SNOWFLAKE_REGION")
 FULL_ACCOUNT = f"{SNOWFLAKE_ACCOUNT}.{SNOWFLAKE_REGION}"
 
-# ✅ Helper: Connect to Snowflake and run a SQL query
-def query_snowflake(sql: str) -> pd.DataFrame:
-    conn = snowflake.connector.connect(
+# ♻️ Connection pool settings
+SNOWFLAKE_POOL_MIN = int(os.getenv("SNOWFLAKE_POOL_MIN", "1"))
+SNOWFLAKE_POOL_MAX = int(os.getenv("SNOWFLAKE_POOL_MAX", "4"))
+SNOWFLAKE_POOL_IDLE_TIMEOUT = float(os.getenv("SNOWFLAKE_POOL_IDLE_TIMEOUT", "600"))
+SNOWFLAKE_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("SNOWFLAKE_POOL_HEALTH_CHECK_INTERVAL", "60"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# 🗃️ Result cache: SDoH aggregates change rarely, so identical SQL is served from
+# memory (and optionally Parquet files) until the TTL expires or it is invalidated
+result_cache = QueryResultCache(
+    ttl=float(os.getenv("SNOWFLAKE_CACHE_TTL", "3600")),
+    max_entries=int(os.getenv("SNOWFLAKE_CACHE_MAX_ENTRIES", "64")),
+    disk_dir=os.getenv("SNOWFLAKE_CACHE_DIR") or None
+)
+
+# 🖼️ Rendered chart store: finished PNG bytes keyed by input data + chart params
+chart_store = ChartArtifactStore(
+    max_entries=int(os.getenv("CHART_CACHE_MAX_ENTRIES", "64")),
+    disk_dir=os.getenv("CHART_CACHE_DIR") or None
+)
+
+# Bump when a chart spec changes so previously stored artifacts are not reused
+CHART_RENDER_VERSION = "2"
+
+# 🧵 Parallel rendering for multi-chart requests (dashboard, warm-up)
+CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", "4"))
+CHART_RENDER_PROCESSES = os.getenv("CHART_RENDER_PROCESSES", "false").lower() == "true"
+
+# ✅ Helper: Open a new Snowflake session
+def connect_snowflake():
+    return snowflake.connector.connect(
         user=os.getenv("SNOWFLAKE_USER"),
         password=os.getenv("SNOWFLAKE_PASSWORD"),
         account=FULL_ACCOUNT,
@@ -24,40 +60,85 @@ def query_snowflake(sql: str) -> pd.DataFrame:
         database=os.getenv("SNOWFLAKE_DATABASE"),
         schema=os.getenv("SNOWFLAKE_SCHEMA")
     )
-    df = pd.read_sql(sql, conn)
-    conn.close()
-    return df
+
+def get_pool() -> SnowflakeConnectionPool:
+    """Return the process-wide Snowflake connection pool, creating it lazily."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SnowflakeConnectionPool(
+                    connect_snowflake,
+                    min_size=SNOWFLAKE_POOL_MIN,
+                    max_size=SNOWFLAKE_POOL_MAX,
+                    idle_timeout=SNOWFLAKE_POOL_IDLE_TIMEOUT,
+                    health_check_interval=SNOWFLAKE_POOL_HEALTH_CHECK_INTERVAL
+                )
+                atexit.register(_pool.close)
+    return _pool
+
+# ✅ Helper: Run a SQL query on a pooled Snowflake session
+def run_query(sql: str) -> pd.DataFrame:
+    return get_pool().run(lambda conn: pd.read_sql(sql, conn))
+
+def prefill_snowflake_pool() -> dict:
+    """Log in min_size sessions ahead of the first query (called on backend startup)."""
+    try:
+        get_pool().prefill()
+    except Exception as e:
+        print("⚠️ Could not pre-open Snowflake sessions; the first query will log in:", e)
+    return get_pool().stats()
+
+def cache_scope() -> dict:
+    return {"database": os.getenv("SNOWFLAKE_DATABASE"), "schema": os.getenv("SNOWFLAKE_SCHEMA")}
+
+# ✅ Helper: Run a SQL query, serving repeated aggregates from the result cache
+def query_snowflake(sql: str, use_cache: bool = True) -> pd.DataFrame:
+    if not use_cache:
+        return run_query(sql)
+    return result_cache.get_or_load(sql, run_query, **cache_scope())
+
+def invalidate_snowflake_cache(sql: str = None) -> int:
+    """Drop cached results (all of them by default); call after loading new data."""
+    removed = result_cache.invalidate(sql, **cache_scope())
+    print(f"🧹 Invalidated {removed} cached Snowflake result(s)")
+    return removed
+
+def snowflake_metrics() -> dict:
+    return {
+        "pool": get_pool().stats(),
+        "result_cache": result_cache.stats(),
+        "chart_store": chart_store.stats()
+    }
 
 
 # ─────────────────────────────────────────────
 # 📊 1. State-wise Stress Chart
 # ─────────────────────────────────────────────
 
+STATE_STRESS_QUERY = """
+    SELECT STATE, AVG(HW_STRESS_V2) AS AVG_STRESS
+    FROM SDOH_SAMPLE
+    GROUP BY STATE
+    ORDER BY AVG_STRESS DESC
+"""
+
 def fetch_state_stress_data():
-    query = """
-        SELECT STATE, AVG(HW_STRESS_V2) AS AVG_STRESS
-        FROM SDOH_SAMPLE
-        GROUP BY STATE
-        ORDER BY AVG_STRESS DESC
-    """
-    return query_snowflake(query)
+    return query_snowflake(STATE_STRESS_QUERY)
 
-def plot_state_stress_chart(df):
-    plt.figure(figsize=(12, 6))
+def state_stress_chart_spec(df):
     df_sorted = df.sort_values(by="AVG_STRESS", ascending=False)
-    plt.bar(df_sorted["STATE"], df_sorted["AVG_STRESS"])
-    plt.xticks(rotation=90)
-    plt.xlabel("State")
-    plt.ylabel("Avg Stress (1 = Low, 7 = High)")
-    plt.title("📊 Stress Levels by State")
-    plt.tight_layout()
-
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png")
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.read()).decode()
-    plt.close()
-    return image_base64
+    return {
+        "kind": "bar",
+        "x": df_sorted["STATE"].tolist(),
+        "y": df_sorted["AVG_STRESS"].tolist(),
+        "figsize": (12, 6),
+        "xtick_rotation": 90,
+        "xlabel": "State",
+        "ylabel": "Avg Stress (1 = Low, 7 = High)",
+        "title": "📊 Stress Levels by State",
+        "tight_layout": True,
+    }
 
 def summarize_state_stress(df):
     top = df.sort_values("AVG_STRESS", ascending=False).head(3)
@@ -73,46 +154,38 @@ def snowflake_stress_analysis():
     Analyzes stress levels across US states from Snowflake SDoH data.
     Returns a base64-encoded bar chart image and a textual summary.
     """
-    df = fetch_state_stress_data()
-    chart = plot_state_stress_chart(df)
-    summary = summarize_state_stress(df)
-    return {"chart": chart, "summary": summary}
+    return build_chart_result("stress", fetch_state_stress_data())
 
 
 # ─────────────────────────────────────────────
 # 📉 2. Job Satisfaction vs Stress Correlation
 # ─────────────────────────────────────────────
 
-@tool
-def snowflake_job_satisfaction_vs_stress():
-    """
-    Compares job satisfaction and stress levels across states from Snowflake SDoH data.
-    Returns a base64-encoded scatter plot and a brief interpretation summary.
-    """
-    query = """
-        SELECT STATE, 
-               AVG(HW_JOB_SATIS) AS AVG_JOB_SATISFACTION, 
-               AVG(HW_STRESS_V2) AS AVG_STRESS
-        FROM SDOH_SAMPLE
-        GROUP BY STATE
-    """
-    df = query_snowflake(query)
+JOB_SATISFACTION_QUERY = """
+    SELECT STATE, 
+           AVG(HW_JOB_SATIS) AS AVG_JOB_SATISFACTION, 
+           AVG(HW_STRESS_V2) AS AVG_STRESS
+    FROM SDOH_SAMPLE
+    GROUP BY STATE
+"""
+
+def fetch_job_satisfaction_data():
+    return query_snowflake(JOB_SATISFACTION_QUERY)
 
+def job_satisfaction_chart_spec(df):
     # 📈 Scatter Plot
-    plt.figure(figsize=(10, 6))
-    plt.scatter(df["AVG_JOB_SATISFACTION"], df["AVG_STRESS"])
-    plt.xlabel("Average Job Satisfaction (1 = Low, 7 = High)")
-    plt.ylabel("Average Stress Level (1 = Low, 7 = High)")
-    plt.title("💼 Job Satisfaction vs 😟 Stress Levels")
-    plt.grid(True)
-
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png")
-    buffer.seek(0)
-    chart_base64 = base64.b64encode(buffer.read()).decode()
-    plt.close()
-
-    # 🧠 Summary
+    return {
+        "kind": "scatter",
+        "x": df["AVG_JOB_SATISFACTION"].tolist(),
+        "y": df["AVG_STRESS"].tolist(),
+        "figsize": (10, 6),
+        "xlabel": "Average Job Satisfaction (1 = Low, 7 = High)",
+        "ylabel": "Average Stress Level (1 = Low, 7 = High)",
+        "title": "💼 Job Satisfaction vs 😟 Stress Levels",
+        "grid": True,
+    }
+
+def summarize_job_satisfaction(df):
     correlation = df["AVG_JOB_SATISFACTION"].corr(df["AVG_STRESS"])
     if correlation < -0.4:
         interpretation = "There is a moderate negative correlation: lower job satisfaction tends to associate with higher stress."
@@ -121,66 +194,68 @@ def snowflake_job_satisfaction_vs_stress():
     else:
         interpretation = "There's little to no correlation between job satisfaction and stress."
 
-    summary = f"Correlation: {correlation:.2f}. {interpretation}"
-
-    return {"chart": chart_base64, "summary": summary}
-
+    return f"Correlation: {correlation:.2f}. {interpretation}"
 
 @tool
-def snowflake_education_vs_stress():
-    """
-    Compares stress levels across different education levels.
-    Returns a base64-encoded bar chart and a summary.
+def snowflake_job_satisfaction_vs_stress():
     """
-    query = """
-        SELECT 
-            AIQ_EDUCATION_V2,
-            AVG(HW_STRESS_V2) AS AVG_STRESS
-        FROM SDOH_SAMPLE
-        WHERE AIQ_EDUCATION_V2 IS NOT NULL
-        GROUP BY AIQ_EDUCATION_V2
-        ORDER BY AVG_STRESS DESC
+    Compares job satisfaction and stress levels across states from Snowflake SDoH data.
+    Returns a base64-encoded scatter plot and a brief interpretation summary.
     """
-    df = query_snowflake(query)
+    return build_chart_result("job_satisfaction_vs_stress", fetch_job_satisfaction_data())
+
+
+EDUCATION_STRESS_QUERY = """
+    SELECT 
+        AIQ_EDUCATION_V2,
+        AVG(HW_STRESS_V2) AS AVG_STRESS
+    FROM SDOH_SAMPLE
+    WHERE AIQ_EDUCATION_V2 IS NOT NULL
+    GROUP BY AIQ_EDUCATION_V2
+    ORDER BY AVG_STRESS DESC
+"""
+
+def fetch_education_stress_data():
+    return query_snowflake(EDUCATION_STRESS_QUERY)
 
+def education_stress_chart_spec(df):
     # 📊 Bar Chart
-    plt.figure(figsize=(12, 6))
     df_sorted = df.sort_values(by="AVG_STRESS", ascending=False)
-    plt.bar(df_sorted["AIQ_EDUCATION_V2"], df_sorted["AVG_STRESS"])
-    plt.xticks(rotation=45, ha='right')
-    plt.xlabel("Education Level")
-    plt.ylabel("Average Stress Level")
-    plt.title("🎓 Education Level vs 😟 Stress")
-    plt.tight_layout()
-
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png")
-    buffer.seek(0)
-    chart_base64 = base64.b64encode(buffer.read()).decode()
-    plt.close()
-
-    # 🧠 Summary
+    return {
+        "kind": "bar",
+        "x": df_sorted["AIQ_EDUCATION_V2"].tolist(),
+        "y": df_sorted["AVG_STRESS"].tolist(),
+        "figsize": (12, 6),
+        "xtick_rotation": 45,
+        "xtick_ha": "right",
+        "xlabel": "Education Level",
+        "ylabel": "Average Stress Level",
+        "title": "🎓 Education Level vs 😟 Stress",
+        "tight_layout": True,
+    }
+
+def summarize_education_stress(df):
+    df_sorted = df.sort_values(by="AVG_STRESS", ascending=False)
     top = df_sorted.head(3)
     bottom = df_sorted.tail(3)
-    summary = (
+    return (
         f"Education levels with highest stress: {', '.join(top['AIQ_EDUCATION_V2'])}. "
         f"Lowest stress: {', '.join(bottom['AIQ_EDUCATION_V2'])}."
     )
 
-    return {"chart": chart_base64, "summary": summary}
+@tool
+def snowflake_education_vs_stress():
+    """
+    Compares stress levels across different education levels.
+    Returns a base64-encoded bar chart and a summary.
+    """
+    return build_chart_result("education_vs_stress", fetch_education_stress_data())
 
 # ─────────────────────────────────────────────
 # 💰 3. Income vs Stress Analysis
 # ─────────────────────────────────────────────
 
-@tool
-def snowflake_income_vs_stress():
-    """
-    Analyzes how stress levels vary across income brackets.
-    Returns a base64-encoded bar chart and a textual summary.
-    """
-    query = """
-        SELECT 
+INCOME_GROUP_CASE = """
             CASE 
                 WHEN INCOMEIQ_PLUS_V3 BETWEEN 0 AND 100 THEN 'Low Income'
                 WHEN INCOMEIQ_PLUS_V3 BETWEEN 101 AND 250 THEN 'Lower-Middle Income'
@@ -188,75 +263,82 @@ def snowflake_income_vs_stress():
                 WHEN INCOMEIQ_PLUS_V3 BETWEEN 451 AND 650 THEN 'Upper-Middle Income'
                 WHEN INCOMEIQ_PLUS_V3 > 650 THEN 'High Income'
                 ELSE 'Unknown'
-            END AS INCOME_GROUP,
-            AVG(HW_STRESS_V2) AS AVG_STRESS
-        FROM SDOH_SAMPLE
-        WHERE INCOMEIQ_PLUS_V3 IS NOT NULL
-        GROUP BY INCOME_GROUP
-        ORDER BY AVG_STRESS DESC
-    """
-    df = query_snowflake(query)
+            END"""
+
+INCOME_STRESS_QUERY = f"""
+    SELECT {INCOME_GROUP_CASE} AS INCOME_GROUP,
+        AVG(HW_STRESS_V2) AS AVG_STRESS
+    FROM SDOH_SAMPLE
+    WHERE INCOMEIQ_PLUS_V3 IS NOT NULL
+    GROUP BY INCOME_GROUP
+    ORDER BY AVG_STRESS DESC
+"""
 
+def fetch_income_stress_data():
+    return query_snowflake(INCOME_STRESS_QUERY)
+
+def income_stress_chart_spec(df):
     # 📊 Bar Chart
-    plt.figure(figsize=(10, 6))
     df_sorted = df.sort_values(by="AVG_STRESS", ascending=False)
-    plt.bar(df_sorted["INCOME_GROUP"], df_sorted["AVG_STRESS"])
-    plt.xlabel("Income Group")
-    plt.ylabel("Average Stress Level (1 = Low, 7 = High)")
-    plt.title("💰 Income Group vs 😟 Stress Level")
-    plt.tight_layout()
-
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png")
-    buffer.seek(0)
-    chart_base64 = base64.b64encode(buffer.read()).decode()
-    plt.close()
-
-    # 🧠 Summary
+    return {
+        "kind": "bar",
+        "x": df_sorted["INCOME_GROUP"].tolist(),
+        "y": df_sorted["AVG_STRESS"].tolist(),
+        "figsize": (10, 6),
+        "xlabel": "Income Group",
+        "ylabel": "Average Stress Level (1 = Low, 7 = High)",
+        "title": "💰 Income Group vs 😟 Stress Level",
+        "tight_layout": True,
+    }
+
+def summarize_income_stress(df):
+    df_sorted = df.sort_values(by="AVG_STRESS", ascending=False)
     top = df_sorted.head(1)
     bottom = df_sorted.tail(1)
-    summary = (
+    return (
         f"Highest stress observed in '{top.iloc[0]['INCOME_GROUP']}' group. "
         f"Lowest stress in '{bottom.iloc[0]['INCOME_GROUP']}' group."
     )
 
-    return {"chart": chart_base64, "summary": summary}
+@tool
+def snowflake_income_vs_stress():
+    """
+    Analyzes how stress levels vary across income brackets.
+    Returns a base64-encoded bar chart and a textual summary.
+    """
+    return build_chart_result("income_vs_stress", fetch_income_stress_data())
 
 # ─────────────────────────────────────────────
 # 🧠 4. Need for Cognition vs Stress Correlation
 # ─────────────────────────────────────────────
 
-@tool
-def snowflake_cognition_vs_stress():
-    """
-    Analyzes the relationship between Need for Cognition and Stress levels.
-    Returns a base64-encoded scatter plot and a correlation summary.
-    """
-    query = """
-        SELECT 
-            STATE,
-            AVG(HW_NEED_FOR_COGNITION) AS AVG_COGNITION,
-            AVG(HW_STRESS_V2) AS AVG_STRESS
-        FROM SDOH_SAMPLE
-        WHERE HW_NEED_FOR_COGNITION IS NOT NULL
-        GROUP BY STATE
-    """
-    df = query_snowflake(query)
+COGNITION_STRESS_QUERY = """
+    SELECT 
+        STATE,
+        AVG(HW_NEED_FOR_COGNITION) AS AVG_COGNITION,
+        AVG(HW_STRESS_V2) AS AVG_STRESS
+    FROM SDOH_SAMPLE
+    WHERE HW_NEED_FOR_COGNITION IS NOT NULL
+    GROUP BY STATE
+"""
 
-    # 📈 Scatter Plot
-    plt.figure(figsize=(10, 6))
-    plt.scatter(df["AVG_COGNITION"], df["AVG_STRESS"])
-    plt.xlabel("Avg Need for Cognition (1 = Low, 7 = High)")
-    plt.ylabel("Avg Stress Level (1 = Low, 7 = High)")
-    plt.title("🧠 Need for Cognition vs 😟 Stress")
-    plt.grid(True)
-
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png")
-    buffer.seek(0)
-    chart_base64 = base64.b64encode(buffer.read()).decode()
-    plt.close()
+def fetch_cognition_stress_data():
+    return query_snowflake(COGNITION_STRESS_QUERY)
 
+def cognition_stress_chart_spec(df):
+    # 📈 Scatter Plot
+    return {
+        "kind": "scatter",
+        "x": df["AVG_COGNITION"].tolist(),
+        "y": df["AVG_STRESS"].tolist(),
+        "figsize": (10, 6),
+        "xlabel": "Avg Need for Cognition (1 = Low, 7 = High)",
+        "ylabel": "Avg Stress Level (1 = Low, 7 = High)",
+        "title": "🧠 Need for Cognition vs 😟 Stress",
+        "grid": True,
+    }
+
+def summarize_cognition_stress(df):
     # 🔍 Correlation Summary
     correlation = df["AVG_COGNITION"].corr(df["AVG_STRESS"])
     if correlation < -0.4:
@@ -266,49 +348,344 @@ def snowflake_cognition_vs_stress():
     else:
         interpretation = "There's little to no correlation between cognition and stress."
 
-    summary = f"Correlation: {correlation:.2f}. {interpretation}"
-    return {"chart": chart_base64, "summary": summary}
-
+    return f"Correlation: {correlation:.2f}. {interpretation}"
 
 @tool
-def snowflake_primarycare_vs_stress():
-    """
-    Compares stress levels across different levels of primary care visits.
-    Returns a base64-encoded bar chart and a summary.
+def snowflake_cognition_vs_stress():
     """
-    query = """
-        SELECT 
-            HW_PRIMARY_CARE_VISITS_SC AS VISITS,
-            AVG(HW_STRESS_V2) AS AVG_STRESS
-        FROM SDOH_SAMPLE
-        WHERE HW_PRIMARY_CARE_VISITS_SC IS NOT NULL
-        GROUP BY VISITS
-        ORDER BY VISITS
+    Analyzes the relationship between Need for Cognition and Stress levels.
+    Returns a base64-encoded scatter plot and a correlation summary.
     """
-    df = query_snowflake(query)
+    return build_chart_result("cognition_vs_stress", fetch_cognition_stress_data())
 
+
+PRIMARYCARE_STRESS_QUERY = """
+    SELECT 
+        HW_PRIMARY_CARE_VISITS_SC AS VISITS,
+        AVG(HW_STRESS_V2) AS AVG_STRESS
+    FROM SDOH_SAMPLE
+    WHERE HW_PRIMARY_CARE_VISITS_SC IS NOT NULL
+    GROUP BY VISITS
+    ORDER BY VISITS
+"""
+
+def fetch_primarycare_stress_data():
+    return query_snowflake(PRIMARYCARE_STRESS_QUERY)
+
+def primarycare_stress_chart_spec(df):
     # 📊 Bar Chart
-    plt.figure(figsize=(12, 6))
-    plt.bar(df["VISITS"], df["AVG_STRESS"])
-    plt.xlabel("Primary Care Visits Score")
-    plt.ylabel("Average Stress Level (1 = Low, 7 = High)")
-    plt.title("🩺 Primary Care Visits vs 😟 Stress")
-    plt.grid(True)
-    plt.tight_layout()
-
-    buffer = BytesIO()
-    plt.savefig(buffer, format="png")
-    buffer.seek(0)
-    chart_base64 = base64.b64encode(buffer.read()).decode()
-    plt.close()
-
-    # 🧠 Summary
+    return {
+        "kind": "bar",
+        "x": df["VISITS"].tolist(),
+        "y": df["AVG_STRESS"].tolist(),
+        "figsize": (12, 6),
+        "xlabel": "Primary Care Visits Score",
+        "ylabel": "Average Stress Level (1 = Low, 7 = High)",
+        "title": "🩺 Primary Care Visits vs 😟 Stress",
+        "grid": True,
+        "tight_layout": True,
+    }
+
+def summarize_primarycare_stress(df):
     min_stress = df.loc[df["AVG_STRESS"].idxmin()]
     max_stress = df.loc[df["AVG_STRESS"].idxmax()]
-    summary = (
+    return (
         f"Lowest stress (Avg: {min_stress['AVG_STRESS']:.2f}) was seen for visits score {min_stress['VISITS']}. "
         f"Highest stress (Avg: {max_stress['AVG_STRESS']:.2f}) occurred at score {max_stress['VISITS']}."
     )
 
-    return {"chart": chart_base64, "summary": summary}
+@tool
+def snowflake_primarycare_vs_stress():
+    """
+    Compares stress levels across different levels of primary care visits.
+    Returns a base64-encoded bar chart and a summary.
+    """
+    return build_chart_result("primarycare_vs_stress", fetch_primarycare_stress_data())
+
+
+# ─────────────────────────────────────────────
+# 🗂️ Chart Registry
+# ─────────────────────────────────────────────
+# Keys match the /snowflake/<name> backend routes.
+
+CHART_SPECS = {
+    "stress": {
+        "sql": STATE_STRESS_QUERY,
+        "fetch": fetch_state_stress_data,
+        "chart": state_stress_chart_spec,
+        "summarize": summarize_state_stress,
+        "encoding": {
+            "kind": "bar", "x": "STATE", "y": "AVG_STRESS",
+            "title": "📊 Stress Levels by State",
+            "xlabel": "State",
+            "ylabel": "Avg Stress (1 = Low, 7 = High)",
+        },
+    },
+    "job_satisfaction_vs_stress": {
+        "sql": JOB_SATISFACTION_QUERY,
+        "fetch": fetch_job_satisfaction_data,
+        "chart": job_satisfaction_chart_spec,
+        "summarize": summarize_job_satisfaction,
+        "encoding": {
+            "kind": "scatter", "x": "AVG_JOB_SATISFACTION", "y": "AVG_STRESS",
+            "title": "💼 Job Satisfaction vs 😟 Stress Levels",
+            "xlabel": "Average Job Satisfaction (1 = Low, 7 = High)",
+            "ylabel": "Average Stress Level (1 = Low, 7 = High)",
+        },
+    },
+    "education_vs_stress": {
+        "sql": EDUCATION_STRESS_QUERY,
+        "fetch": fetch_education_stress_data,
+        "chart": education_stress_chart_spec,
+        "summarize": summarize_education_stress,
+        "encoding": {
+            "kind": "bar", "x": "AIQ_EDUCATION_V2", "y": "AVG_STRESS",
+            "title": "🎓 Education Level vs 😟 Stress",
+            "xlabel": "Education Level",
+            "ylabel": "Average Stress Level",
+        },
+    },
+    "income_vs_stress": {
+        "sql": INCOME_STRESS_QUERY,
+        "fetch": fetch_income_stress_data,
+        "chart": income_stress_chart_spec,
+        "summarize": summarize_income_stress,
+        "encoding": {
+            "kind": "bar", "x": "INCOME_GROUP", "y": "AVG_STRESS",
+            "title": "💰 Income Group vs 😟 Stress Level",
+            "xlabel": "Income Group",
+            "ylabel": "Average Stress Level (1 = Low, 7 = High)",
+        },
+    },
+    "cognition_vs_stress": {
+        "sql": COGNITION_STRESS_QUERY,
+        "fetch": fetch_cognition_stress_data,
+        "chart": cognition_stress_chart_spec,
+        "summarize": summarize_cognition_stress,
+        "encoding": {
+            "kind": "scatter", "x": "AVG_COGNITION", "y": "AVG_STRESS",
+            "title": "🧠 Need for Cognition vs 😟 Stress",
+            "xlabel": "Avg Need for Cognition (1 = Low, 7 = High)",
+            "ylabel": "Avg Stress Level (1 = Low, 7 = High)",
+        },
+    },
+    "primarycare_vs_stress": {
+        "sql": PRIMARYCARE_STRESS_QUERY,
+        "fetch": fetch_primarycare_stress_data,
+        "chart": primarycare_stress_chart_spec,
+        "summarize": summarize_primarycare_stress,
+        "encoding": {
+            "kind": "bar", "x": "VISITS", "y": "AVG_STRESS",
+            "title": "🩺 Primary Care Visits vs 😟 Stress",
+            "xlabel": "Primary Care Visits Score",
+            "ylabel": "Average Stress Level (1 = Low, 7 = High)",
+        },
+    },
+}
+
+def chart_key(name: str, df: pd.DataFrame, fmt: str = "png") -> str:
+    return chart_store.make_key(name, df, format=fmt, version=CHART_RENDER_VERSION)
+
+CHART_MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml", "webp": "image/webp"}
+
+def render_chart_bytes(name: str, df: pd.DataFrame, fmt: str = "png") -> bytes:
+    """Return the chart's image bytes, rendering only when this data has not been seen."""
+    spec = CHART_SPECS[name]
+    return chart_store.get_or_render(chart_key(name, df, fmt), lambda: render_chart(spec["chart"](df), fmt))
+
+def render_charts_png(frames: dict) -> dict:
+    """Render several charts at once, fanning cache misses out to the render pool."""
+    charts, missing = {}, []
+    for name, df in frames.items():
+        cached = chart_store.get(chart_key(name, df))
+        if cached is not None:
+            charts[name] = cached
+        else:
+            missing.append(name)
+
+    if missing:
+        rendered = render_many(
+            [CHART_SPECS[name]["chart"](frames[name]) for name in missing],
+            max_workers=CHART_RENDER_WORKERS,
+            use_processes=CHART_RENDER_PROCESSES
+        )
+        for name, data in zip(missing, rendered):
+            chart_store.put(chart_key(name, frames[name]), data)
+            charts[name] = data
+    return charts
+
+def frame_to_columnar(df: pd.DataFrame) -> dict:
+    """Compact column-oriented JSON: one typed value list per column, NaN as null."""
+    values = {}
+    for col in df.columns:
+        series = df[col]
+        values[str(col)] = series.astype(object).where(series.notna(), None).tolist()
+    return {
+        "columns": [str(col) for col in df.columns],
+        "dtypes": ["string" if dtype == object else str(dtype) for dtype in df.dtypes],
+        "values": values,
+    }
+
+def frame_to_arrow(df: pd.DataFrame, metadata: dict = None) -> bytes:
+    """Serialize a frame as an Arrow IPC stream, with optional schema metadata."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def build_chart_result(name: str, df: pd.DataFrame, mode: str = "chart") -> dict:
+    spec = CHART_SPECS[name]
+    if mode == "data":
+        return {"summary": spec["summarize"](df), "encoding": spec["encoding"], "data": frame_to_columnar(df)}
+    chart = base64.b64encode(render_chart_bytes(name, df)).decode()
+    return {"chart": chart, "summary": spec["summarize"](df)}
+
+def get_chart_data(name: str, fmt: str = "json"):
+    """
+    Aggregate rows behind a chart for client-side rendering.
+    fmt="json" returns columnar JSON; fmt="arrow" returns Arrow IPC bytes with
+    the summary and encoding stored in the schema metadata.
+    """
+    spec = CHART_SPECS[name]
+    df = spec["fetch"]()
+    if fmt == "arrow":
+        return frame_to_arrow(df, {
+            "summary": spec["summarize"](df),
+            "encoding": json.dumps(spec["encoding"]),
+        })
+    return build_chart_result(name, df, mode="data")
+
+def describe_chart(name: str, fmt: str = "png") -> dict:
+    """Summary plus the ETag of the chart image, without rendering the image."""
+    spec = CHART_SPECS[name]
+    df = spec["fetch"]()
+    return {"summary": spec["summarize"](df), "etag": chart_key(name, df, fmt)}
+
+def get_chart_image(name: str, fmt: str = "png", if_none_match: str = None) -> dict:
+    """
+    Image bytes for a chart, served from the chart store when possible.
+    Returns data=None when if_none_match already names the current version.
+    """
+    df = CHART_SPECS[name]["fetch"]()
+    etag = chart_key(name, df, fmt)
+    if if_none_match == etag:
+        return {"data": None, "etag": etag, "media_type": CHART_MEDIA_TYPES[fmt]}
+    return {"data": render_chart_bytes(name, df, fmt), "etag": etag, "media_type": CHART_MEDIA_TYPES[fmt]}
+
+def warm_chart_cache() -> dict:
+    """
+    Pre-render all six charts from one GROUPING SETS scan. fetch_dashboard_data
+    seeds the per-chart result-cache entries the endpoints read, so the result
+    cache and chart store both hold finished artifacts afterwards.
+    """
+    timings = {}
+    start = time.perf_counter()
+    try:
+        frames = fetch_dashboard_data()
+    except Exception as e:
+        print("❌ Chart warm-up failed:", e)
+        return {"fetch": None, "render": None}
+    timings["fetch"] = round(time.perf_counter() - start, 3)
+
+    start = time.perf_counter()
+    render_charts_png(frames)
+    timings["render"] = round(time.perf_counter() - start, 3)
+    print(f"🔥 Chart warm-up finished: {timings}")
+    return timings
 
+
+# ─────────────────────────────────────────────
+# 🧮 5. Single-scan Dashboard
+# ─────────────────────────────────────────────
+# One pass over SDOH_SAMPLE with GROUPING SETS produces every aggregate the six
+# charts need. GROUPING(col) = 0 marks the rows belonging to that set. Per-chart
+# WHERE filters become NULL group keys (dropped below) or conditional AVGs.
+
+DASHBOARD_QUERY = f"""
+    WITH BASE AS (
+        SELECT
+            STATE,
+            AIQ_EDUCATION_V2,
+            HW_PRIMARY_CARE_VISITS_SC,
+            HW_STRESS_V2,
+            HW_JOB_SATIS,
+            HW_NEED_FOR_COGNITION,
+            IFF(INCOMEIQ_PLUS_V3 IS NULL, NULL, {INCOME_GROUP_CASE}) AS INCOME_GROUP
+        FROM SDOH_SAMPLE
+    )
+    SELECT
+        GROUPING(STATE) AS G_STATE,
+        GROUPING(AIQ_EDUCATION_V2) AS G_EDUCATION,
+        GROUPING(INCOME_GROUP) AS G_INCOME,
+        GROUPING(HW_PRIMARY_CARE_VISITS_SC) AS G_VISITS,
+        STATE,
+        AIQ_EDUCATION_V2,
+        INCOME_GROUP,
+        HW_PRIMARY_CARE_VISITS_SC AS VISITS,
+        AVG(HW_STRESS_V2) AS AVG_STRESS,
+        AVG(HW_JOB_SATIS) AS AVG_JOB_SATISFACTION,
+        AVG(HW_NEED_FOR_COGNITION) AS AVG_COGNITION,
+        AVG(IFF(HW_NEED_FOR_COGNITION IS NOT NULL, HW_STRESS_V2, NULL)) AS AVG_STRESS_COGNITION
+    FROM BASE
+    GROUP BY GROUPING SETS (
+        (STATE),
+        (AIQ_EDUCATION_V2),
+        (INCOME_GROUP),
+        (HW_PRIMARY_CARE_VISITS_SC)
+    )
+"""
+
+def split_dashboard_frame(df: pd.DataFrame) -> dict:
+    """Fan the combined GROUPING SETS result out into the six per-chart frames."""
+    states = df[df["G_STATE"] == 0]
+    education = df[(df["G_EDUCATION"] == 0) & df["AIQ_EDUCATION_V2"].notna()]
+    income = df[(df["G_INCOME"] == 0) & df["INCOME_GROUP"].notna()]
+    visits = df[(df["G_VISITS"] == 0) & df["VISITS"].notna()]
+    cognition = states[states["AVG_COGNITION"].notna()]
+
+    frames = {
+        "stress": states[["STATE", "AVG_STRESS"]]
+            .sort_values("AVG_STRESS", ascending=False),
+        "job_satisfaction_vs_stress": states[["STATE", "AVG_JOB_SATISFACTION", "AVG_STRESS"]],
+        "education_vs_stress": education[["AIQ_EDUCATION_V2", "AVG_STRESS"]]
+            .sort_values("AVG_STRESS", ascending=False),
+        "income_vs_stress": income[["INCOME_GROUP", "AVG_STRESS"]]
+            .sort_values("AVG_STRESS", ascending=False),
+        "cognition_vs_stress": cognition[["STATE", "AVG_COGNITION", "AVG_STRESS_COGNITION"]]
+            .rename(columns={"AVG_STRESS_COGNITION": "AVG_STRESS"}),
+        "primarycare_vs_stress": visits[["VISITS", "AVG_STRESS"]]
+            .sort_values("VISITS"),
+    }
+    return {name: frame.reset_index(drop=True) for name, frame in frames.items()}
+
+def fetch_dashboard_data() -> dict:
+    frames = split_dashboard_frame(query_snowflake(DASHBOARD_QUERY))
+    # Seed the per-chart entries too, so follow-up chart/image requests skip Snowflake
+    for name, df in frames.items():
+        result_cache.put(result_cache.make_key(CHART_SPECS[name]["sql"], **cache_scope()), df)
+    return frames
+
+def snowflake_dashboard(mode: str = "chart") -> dict:
+    """
+    Builds all six SDoH charts from a single Snowflake round-trip.
+    Returns {chart_name: {"summary": ..., "etag": ...}}; PNGs land in the chart store.
+    With mode="data", returns the aggregate rows per chart instead of rendering.
+    """
+    frames = fetch_dashboard_data()
+    if mode == "data":
+        return {name: build_chart_result(name, df, mode="data") for name, df in frames.items()}
+    render_charts_png(frames)
+    return {
+        name: {"summary": CHART_SPECS[name]["summarize"](df), "etag": chart_key(name, df)}
+        for name, df in frames.items()
+    }
+
+
+if __name__ == "__main__":
+    # Pre-render charts into CHART_CACHE_DIR, e.g. from cron after a data load
+    warm_chart_cache()
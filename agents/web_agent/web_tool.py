@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from tavily import TavilyClient
+from tavily import TavilyClient, AsyncTavilyClient
 from langchain.tools import tool
 
 # Load API key
@@ -8,6 +8,7 @@ load_dotenv()
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 
 client = TavilyClient(api_key=TAVILY_API_KEY)
+async_client = AsyncTavilyClient(api_key=TAVILY_API_KEY)
 
 # 🔍 Enhance prompt with SDoH context
 SDOH_CONTEXT = (
@@ -16,6 +17,22 @@ SDOH_CONTEXT = (
     "mental health, environmental conditions, and community-based health programs."
 )
 
+def enhance_query(query: str) -> str:
+    """Expand the query to emphasize the SDoH domain."""
+    return f"{query} (related to Social Determinants of Health, stress, income, education, public health)"
+
+def format_search_results(query: str, response: dict) -> str:
+    sources = response.get("results", [])
+
+    if not sources:
+        return "❌ No relevant SDoH content found."
+
+    summary = "\n\n".join(
+        f"🔹 **{item.get('title')}**\n{item.get('content')}\n🔗 {item.get('url')}"
+        for item in sources
+    )
+    return f"**🌍 Web Search Results on SDoH for:** `{query}`\n\n{summary}"
+
 @tool
 def web_search(query: str) -> str:
     """
@@ -25,24 +42,28 @@ def web_search(query: str) -> str:
     print(f"🌐 [Web Search Tool] Searching for: {query}")
 
     try:
-        # 🧠 Expand query to emphasize SDoH domain
-        enhanced_query = f"{query} (related to Social Determinants of Health, stress, income, education, public health)"
-
         response = client.search(
-            query=enhanced_query,
+            query=enhance_query(query),
             search_depth="advanced",
             max_results=10
         )
-        sources = response.get("results", [])
+        return format_search_results(query, response)
+
+    except Exception as e:
+        print("❌ Web search error:", e)
+        return "❌ Web search failed due to an internal error."
 
-        if not sources:
-            return "❌ No relevant SDoH content found."
+async def async_web_search(query: str) -> str:
+    """Same as web_search, but awaits Tavily's native async client."""
+    print(f"🌐 [Web Search Tool] Searching (async) for: {query}")
 
-        summary = "\n\n".join(
-            f"🔹 **{item.get('title')}**\n{item.get('content')}\n🔗 {item.get('url')}"
-            for item in sources
+    try:
+        response = await async_client.search(
+            query=enhance_query(query),
+            search_depth="advanced",
+            max_results=10
         )
-        return f"**🌍 Web Search Results on SDoH for:** `{query}`\n\n{summary}"
+        return format_search_results(query, response)
 
     except Exception as e:
         print("❌ Web search error:", e)
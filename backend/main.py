@@ -1,21 +1,42 @@
-from fastapi import FastAPI
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 # Import LangGraph controllers
 from agents.controller import (
-    run_rag_agent,
-    run_snowflake_agent,
-    run_snowflake_job_satis_agent,
-    run_snowflake_education_vs_stress_agent,
-    run_snowflake_income_vs_stress_agent,
-    run_snowflake_cognition_vs_stress,
-    run_snowflake_primarycare_vs_stress_agent,
-    run_web_search_agent
-    
+    arun_rag_agent,
+    SNOWFLAKE_CHARTS,
+    describe_snowflake_chart,
+    get_snowflake_chart_image,
+    get_snowflake_chart_data,
+    run_snowflake_dashboard_agent,
+    arun_web_search_agent,
+    get_rag_graph,
+    get_rag_metrics,
+    get_snowflake_metrics,
+    warm_snowflake_pool,
+    clear_snowflake_cache,
+    warm_snowflake_charts
 )
 
-app = FastAPI()
+# 🚀 Startup / shutdown; the helpers and executor are defined further down
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_agents()
+    chart_warmup = asyncio.create_task(chart_warmup_loop())
+    try:
+        yield
+    finally:
+        chart_warmup.cancel()
+        executor.shutdown(wait=False)
+
+app = FastAPI(lifespan=lifespan)
 
 # 🌐 Enable CORS for Streamlit frontend
 app.add_middleware(
@@ -26,49 +47,192 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ----------- ⚙️ Async Execution Layer -----------
+# Blocking agents (Snowflake I/O, matplotlib rendering, LangGraph tool nodes)
+# run on a bounded worker pool so the event loop keeps serving other requests.
+BACKEND_WORKERS = int(os.getenv("BACKEND_WORKERS", "16"))
+executor = ThreadPoolExecutor(max_workers=BACKEND_WORKERS, thread_name_prefix="agent-worker")
+
+# Per-endpoint cap on in-flight calls, so one slow agent cannot take every worker
+ENDPOINT_CONCURRENCY = {
+    "rag": int(os.getenv("RAG_CONCURRENCY", "8")),
+    "snowflake": int(os.getenv("SNOWFLAKE_CONCURRENCY", "4")),
+    "web": int(os.getenv("WEB_CONCURRENCY", "8")),
+    "charts": int(os.getenv("CHART_CONCURRENCY", "16")),
+}
+_endpoint_limits = {}
+
+def endpoint_limit(endpoint: str, group: str) -> asyncio.Semaphore:
+    if endpoint not in _endpoint_limits:
+        _endpoint_limits[endpoint] = asyncio.Semaphore(ENDPOINT_CONCURRENCY[group])
+    return _endpoint_limits[endpoint]
+
+async def run_blocking(endpoint: str, group: str, func, *args):
+    """Run a sync agent on the worker pool under the endpoint's concurrency limit."""
+    async with endpoint_limit(endpoint, group):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(func, *args))
+
+async def run_async(endpoint: str, group: str, coro_func, *args):
+    """Await a natively async agent under the endpoint's concurrency limit."""
+    async with endpoint_limit(endpoint, group):
+        return await coro_func(*args)
+
+async def warm_agents():
+    # Compile the shared LangGraph and log in SNOWFLAKE_POOL_MIN sessions
+    # off the event loop before the first request
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        loop.run_in_executor(executor, get_rag_graph),
+        loop.run_in_executor(executor, warm_snowflake_pool),
+    )
+
+# 🔥 Pre-render the Snowflake charts so endpoints serve finished bytes.
+# Off by default: every uvicorn worker would rerun it on boot. Warm once per
+# deployment instead (POST /snowflake/charts/warmup, or
+# `python -m agents.snowflake_agent.snowflake_tool` with CHART_CACHE_DIR set).
+CHART_WARMUP_ON_STARTUP = os.getenv("CHART_WARMUP_ON_STARTUP", "false").lower() == "true"
+CHART_WARMUP_INTERVAL = float(os.getenv("CHART_WARMUP_INTERVAL", "0"))  # seconds, 0 = startup only
+
+async def chart_warmup_loop():
+    loop = asyncio.get_running_loop()
+    if CHART_WARMUP_ON_STARTUP:
+        await loop.run_in_executor(executor, warm_snowflake_charts)
+    while CHART_WARMUP_INTERVAL > 0:
+        await asyncio.sleep(CHART_WARMUP_INTERVAL)
+        await loop.run_in_executor(executor, warm_snowflake_charts)
+
 # ----------- 📦 RAG Agent -----------
 class RAGQueryRequest(BaseModel):
     query: str
 
 @app.post("/rag_query")
 async def rag_query(request: RAGQueryRequest):
-    result = run_rag_agent(request.query)
+    result = await run_async("rag_query", "rag", arun_rag_agent, request.query)
     return {"response": result}
 
+@app.get("/rag/metrics")
+async def rag_metrics():
+    return get_rag_metrics()  # embedding and retrieval cache hit rates, latency saved
+
 # ----------- ❄️ Snowflake Agents -----------
+# JSON responses carry the summary and a chart URL; the image itself is served
+# as raw bytes with ETag / Cache-Control so browsers and proxies can revalidate.
+# ?mode=data (or Accept: Arrow IPC) returns the aggregate rows for client-side charts.
+
+CHART_CACHE_MAX_AGE = int(os.getenv("CHART_CACHE_MAX_AGE", "300"))
+IMAGE_FORMATS = {"image/png": "png", "image/svg+xml": "svg", "image/webp": "webp"}
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+def chart_url(name: str, etag: str, fmt: str = "png") -> str:
+    # The version parameter changes whenever the underlying data does
+    return f"/snowflake/charts/{name}.{fmt}?v={etag[:16]}"
+
+def negotiated_image_format(accept: str):
+    """Return png/svg/webp if the client prefers an image over JSON, else None."""
+    best_format, best_q = None, 0.0
+    for item in (accept or "").split(","):
+        media_type, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        media_type = media_type.strip().lower()
+        # JSON wins ties with an explicit image type; a bare */* has to beat it
+        if (media_type == "application/json" and q >= best_q) or (media_type == "*/*" and q > best_q):
+            best_format, best_q = None, q
+        elif media_type in IMAGE_FORMATS and q > best_q:
+            best_format, best_q = IMAGE_FORMATS[media_type], q
+    return best_format
+
+async def chart_image_response(name: str, fmt: str, request: Request) -> Response:
+    if_none_match = request.headers.get("if-none-match", "").removeprefix("W/").strip('"') or None
+    artifact = await run_blocking("chart_image", "charts", get_snowflake_chart_image, name, fmt, if_none_match)
+    headers = {
+        "ETag": f'"{artifact["etag"]}"',
+        "Cache-Control": f"public, max-age={CHART_CACHE_MAX_AGE}",
+        "Vary": "Accept",
+    }
+    if artifact["data"] is None:
+        return Response(status_code=304, headers=headers)
+    return Response(content=artifact["data"], media_type=artifact["media_type"], headers=headers)
+
+async def chart_response(name: str, request: Request):
+    mode = request.query_params.get("mode", "chart")
+    if mode == "arrow" or ARROW_MEDIA_TYPE in request.headers.get("accept", ""):
+        data = await run_blocking(name, "snowflake", get_snowflake_chart_data, name, "arrow")
+        return Response(content=data, media_type=ARROW_MEDIA_TYPE)
+    if mode == "data":
+        return await run_blocking(name, "snowflake", get_snowflake_chart_data, name)
+
+    fmt = negotiated_image_format(request.headers.get("accept"))
+    if fmt:
+        return await chart_image_response(name, fmt, request)
+    info = await run_blocking(name, "snowflake", describe_snowflake_chart, name)
+    return {"summary": info["summary"], "chart_url": chart_url(name, info["etag"])}
+
+@app.get("/snowflake/charts/{name}.{fmt}")
+async def snowflake_chart_image(name: str, fmt: str, request: Request):
+    if name not in SNOWFLAKE_CHARTS or fmt not in IMAGE_FORMATS.values():
+        raise HTTPException(status_code=404, detail=f"Unknown chart: {name}.{fmt}")
+    return await chart_image_response(name, fmt, request)
 
 @app.get("/snowflake/stress")
-async def snowflake_stress():
-    result = run_snowflake_agent()
-    return result  # {"chart": ..., "summary": ...}
+async def snowflake_stress(request: Request):
+    return await chart_response("stress", request)  # {"summary": ..., "chart_url": ...}
 
 @app.get("/snowflake/job_satisfaction_vs_stress")
-async def snowflake_job_vs_stress():
-    result = run_snowflake_job_satis_agent()
-    return result
+async def snowflake_job_vs_stress(request: Request):
+    return await chart_response("job_satisfaction_vs_stress", request)
 
 @app.get("/snowflake/education_vs_stress")
-async def snowflake_education_vs_stress():
-    result = run_snowflake_education_vs_stress_agent()
-    return result
+async def snowflake_education_vs_stress(request: Request):
+    return await chart_response("education_vs_stress", request)
 
 @app.get("/snowflake/income_vs_stress")
-async def snowflake_income_vs_stress():
-    result = run_snowflake_income_vs_stress_agent()  
-    return result
+async def snowflake_income_vs_stress(request: Request):
+    return await chart_response("income_vs_stress", request)
 
 @app.get("/snowflake/cognition_vs_stress")
-async def cognition_vs_stress():
-    result = run_snowflake_cognition_vs_stress()
-    return result
+async def cognition_vs_stress(request: Request):
+    return await chart_response("cognition_vs_stress", request)
 
 @app.get("/snowflake/primarycare_vs_stress")
-async def primarycare_vs_stress():
-    result = run_snowflake_primarycare_vs_stress_agent()
-    return result
+async def primarycare_vs_stress(request: Request):
+    return await chart_response("primarycare_vs_stress", request)
+
+@app.get("/snowflake/dashboard")
+async def snowflake_dashboard(mode: str = "chart"):
+    # All six charts from one GROUPING SETS scan: {name: {"summary": ..., "chart_url": ...}}
+    if mode == "data":
+        return await run_blocking("dashboard", "snowflake", run_snowflake_dashboard_agent, "data")
+    result = await run_blocking("dashboard", "snowflake", run_snowflake_dashboard_agent)
+    return {
+        name: {"summary": item["summary"], "chart_url": chart_url(name, item["etag"])}
+        for name, item in result.items()
+    }
+
+@app.get("/snowflake/metrics")
+async def snowflake_metrics():
+    return get_snowflake_metrics()  # pool wait times, result cache hits/misses
+
+@app.post("/snowflake/cache/invalidate")
+async def snowflake_cache_invalidate():
+    # Call after loading new data into SDOH_SAMPLE
+    removed = await run_blocking("cache_invalidate", "snowflake", clear_snowflake_cache)
+    return {"invalidated": removed}
+
+@app.post("/snowflake/charts/warmup")
+async def snowflake_charts_warmup():
+    timings = await run_blocking("charts_warmup", "snowflake", warm_snowflake_charts)
+    return {"warmed": timings}
 
 @app.post("/web/search")
 async def web_search_endpoint(request: RAGQueryRequest):
-    result = run_web_search_agent(request.query)
+    result = await run_async("web_search", "web", arun_web_search_agent, request.query)
     return {"response": result}
 
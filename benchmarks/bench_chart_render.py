@@ -0,0 +1,71 @@
+"""Render all six Snowflake charts on 1, 2, 4 and 8 workers.
+
+Run from the repo root:
+    python -m benchmarks.bench_chart_render --rounds 4
+
+Synthetic DataFrames shaped like the real aggregates are fed through the
+chart specs in snowflake_tool and rendered with chart_renderer.render_many
+on thread and process pools. No Snowflake connection is made.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from agents.snowflake_agent.chart_renderer import render_many, setup_style
+from agents.snowflake_agent.snowflake_tool import CHART_SPECS
+
+STATES = [f"S{i:02d}" for i in range(50)]
+
+
+def synthetic_frames(seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    stress = rng.uniform(2, 6, len(STATES))
+    return {
+        "stress": pd.DataFrame({"STATE": STATES, "AVG_STRESS": stress}),
+        "job_satisfaction_vs_stress": pd.DataFrame({
+            "STATE": STATES, "AVG_JOB_SATISFACTION": rng.uniform(2, 6, len(STATES)), "AVG_STRESS": stress,
+        }),
+        "education_vs_stress": pd.DataFrame({
+            "AIQ_EDUCATION_V2": ["High School", "Some College", "Bachelor", "Graduate", "Unknown"],
+            "AVG_STRESS": rng.uniform(2, 6, 5),
+        }),
+        "income_vs_stress": pd.DataFrame({
+            "INCOME_GROUP": ["Low Income", "Lower-Middle Income", "Middle Income",
+                             "Upper-Middle Income", "High Income"],
+            "AVG_STRESS": rng.uniform(2, 6, 5),
+        }),
+        "cognition_vs_stress": pd.DataFrame({
+            "STATE": STATES, "AVG_COGNITION": rng.uniform(2, 6, len(STATES)), "AVG_STRESS": stress,
+        }),
+        "primarycare_vs_stress": pd.DataFrame({"VISITS": list(range(1, 11)), "AVG_STRESS": rng.uniform(2, 6, 10)}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=4, help="dashboards rendered per measurement")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    frames = synthetic_frames()
+    specs = [CHART_SPECS[name]["chart"](df) for name, df in frames.items()] * args.rounds
+    setup_style()
+    render_many(specs[:1])  # first render loads fonts and backends
+
+    print(f"🖼️ Rendering {len(specs)} charts ({args.rounds} dashboards)")
+    for use_processes in (False, True):
+        pool = "processes" if use_processes else "threads"
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            render_many(specs, max_workers=workers, use_processes=use_processes)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"  {pool:<9} workers={workers:<2} {elapsed:7.2f} s   "
+                  f"{len(specs) / elapsed:6.1f} charts/s   ({baseline / elapsed:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Response size, index storage and latency: chunk text in vector metadata vs the local chunk store.
+
+Run from the repo root:
+    python -m benchmarks.bench_chunk_store --chunks 5000 --words 300
+
+The same synthetic chunks are loaded into two LocalVectorStores. The legacy
+layout keeps the chunk text in each vector's metadata, and queries run with
+include_metadata=True. The new layout keeps metadata to source + chunk_index,
+puts bodies in a ChunkStore, and queries with include_metadata=False before
+looking up the top_k bodies by ID. The script reports:
+- the JSON size of a query response, standing in for what Pinecone sends
+  over the wire;
+- the on-disk size of the vector metadata and the chunk store;
+- per-query latency for IDs + lookup vs full metadata.
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from agents.rag_agent.chunk_store import ChunkStore
+from agents.rag_agent.vector_store import LocalVectorStore
+
+SOURCES = ["cdc1", "cdc2", "who1", "who2", "sdoh_strategies1", "sdoh_strategies2", "additional", "additional2"]
+
+
+def file_size(path: str) -> int:
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vocab = [f"{w}{i}" for i in range(400) for w in ("stress", "care", "income", "health", "program")]
+    path = tempfile.mkdtemp(prefix="chunk_store_")
+    legacy = LocalVectorStore(os.path.join(path, "legacy"))
+    lean = LocalVectorStore(os.path.join(path, "lean"))
+    chunks = ChunkStore(os.path.join(path, "chunk_store.sqlite"))
+
+    for start in range(0, args.chunks, 500):
+        ids = [f"{SOURCES[i % len(SOURCES)]}#{i:08x}" for i in range(start, min(args.chunks, start + 500))]
+        values = rng.normal(size=(len(ids), args.dim)).astype(np.float32)
+        texts = [" ".join(rng.choice(vocab, args.words)) for _ in ids]
+        sources = [chunk_id.split("#")[0] for chunk_id in ids]
+        legacy.upsert([(i, v, {"source": s, "chunk_index": n, "text": t})
+                       for n, (i, v, s, t) in enumerate(zip(ids, values, sources, texts))])
+        chunks.add(zip(ids, texts, sources))
+        lean.upsert([(i, v, {"source": s, "chunk_index": n}) for n, (i, v, s) in enumerate(zip(ids, values, sources))])
+
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    def run(label, search):
+        sizes, start = [], time.perf_counter()
+        for q in queries:
+            response, texts = search(q)
+            assert len(texts) == args.top_k
+            sizes.append(len(json.dumps(response)))
+        ms = (time.perf_counter() - start) / len(queries) * 1000
+        print(f"  {label:<32} response {np.mean(sizes) / 1024:7.1f} KiB   {ms:6.2f} ms/query")
+
+    def legacy_search(q):
+        response = legacy.query(q, args.top_k, include_metadata=True)
+        return response, [m["metadata"]["text"] for m in response["matches"]]
+
+    def lean_search(q):
+        response = lean.query(q, args.top_k, include_metadata=False)
+        texts = chunks.get([m["id"] for m in response["matches"]])
+        return response, [texts[m["id"]] for m in response["matches"]]
+
+    print(f"\n📊 {args.chunks} chunks x ~{args.words} words, {args.dim}-d vectors, top_k={args.top_k}")
+    run("text in metadata", legacy_search)
+    run("IDs + chunk store lookup", lean_search)
+    legacy_meta = file_size(os.path.join(path, "legacy", "metadata.sqlite"))
+    lean_meta = file_size(os.path.join(path, "lean", "metadata.sqlite"))
+    print(f"  vector metadata: {legacy_meta / 2 ** 20:.1f} MiB with text → {lean_meta / 2 ** 20:.1f} MiB without; "
+          f"chunk store (zlib) {file_size(chunks.path) / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
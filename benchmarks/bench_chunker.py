@@ -0,0 +1,115 @@
+"""Time the old recursive_split against the streaming markdown chunker.
+
+Run from the repo root:
+    python -m benchmarks.bench_chunker --sizes 0.5 1 2 4
+
+Synthetic markdown (headings, paragraphs, bullet lists, tables) is generated
+at each size in MB and split by both implementations. Time per MB should stay
+flat for the streaming chunker as documents grow, and none of its chunks
+should exceed the token limit when measured with the real tokenizer. The old
+splitter is copied here verbatim because chunking.py connects to S3 and
+Pinecone on import.
+"""
+import time
+import argparse
+
+import numpy as np
+
+from parsing_chunks.markdown_chunker import MarkdownChunker
+from parsing_chunks.tokenizer import count_tokens, get_encoding
+
+WORDS = ("stress income housing education access care policy health community equity food transport "
+         "neighborhood support outcome report county survey adults children risk program").split()
+
+
+# ───────────── Old implementation (parsing_chunks/chunking.py before the chunker) ─────────────
+
+def token_count(text: str) -> int:
+    return len(text.split())
+
+
+def recursive_split(text, max_tokens=300):
+    if token_count(text) <= max_tokens:
+        return [text]
+
+    for splitter in ["\n\n", "\n", ". "]:
+        parts = text.split(splitter)
+        if len(parts) == 1:
+            continue
+
+        chunks, current = [], ""
+        for part in parts:
+            candidate = (current + splitter + part).strip() if current else part.strip()
+            if token_count(candidate) <= max_tokens:
+                current = candidate
+            else:
+                if current:
+                    chunks.extend(recursive_split(current, max_tokens))
+                current = part.strip()
+        if current:
+            chunks.extend(recursive_split(current, max_tokens))
+        return chunks
+
+    return [text]
+
+
+# ───────────── Corpus ─────────────
+
+def sentence(rng) -> str:
+    words = rng.choice(WORDS, rng.integers(8, 25))
+    return " ".join(words).capitalize() + "."
+
+
+def synthetic_markdown(size_bytes: int, seed: int = 0) -> str:
+    rng = np.random.default_rng(seed)
+    parts, size, section = [], 0, 0
+    while size < size_bytes:
+        section += 1
+        block = [f"## Section {section}: {' '.join(rng.choice(WORDS, 3))}"]
+        for _ in range(rng.integers(2, 6)):
+            kind = rng.random()
+            if kind < 0.7:
+                block.append(" ".join(sentence(rng) for _ in range(rng.integers(3, 12))))
+            elif kind < 0.85:
+                block.append("\n".join(f"- {sentence(rng)}" for _ in range(rng.integers(3, 8))))
+            else:
+                rows = [f"| {rng.choice(WORDS)} | {rng.uniform(0, 10):.2f} | {rng.integers(0, 1000)} |"
+                        for _ in range(rng.integers(5, 60))]
+                block.append("\n".join(["| Group | Score | Count |", "|---|---|---|"] + rows))
+        text = "\n\n".join(block)
+        parts.append(text)
+        size += len(text) + 2
+    return "\n\n".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[0.5, 1, 2, 4], help="document sizes in MB")
+    parser.add_argument("--max-tokens", type=int, default=400)
+    parser.add_argument("--overlap", type=int, default=50)
+    args = parser.parse_args()
+
+    tokenizer = "tiktoken cl100k_base" if get_encoding() is not None else "estimated token counts (offline)"
+    print(f"✂️ Chunking synthetic markdown, {tokenizer}")
+    chunker = MarkdownChunker(args.max_tokens, args.overlap)
+    for size_mb in args.sizes:
+        markdown = synthetic_markdown(int(size_mb * 1024 * 1024))
+
+        start = time.perf_counter()
+        old_chunks = recursive_split(markdown)
+        old_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new_chunks = list(chunker.chunks(markdown.splitlines()))
+        new_time = time.perf_counter() - start
+
+        old_over = sum(1 for chunk in old_chunks if count_tokens(chunk) > args.max_tokens)
+        new_over = sum(1 for chunk in new_chunks if count_tokens(chunk) > args.max_tokens)
+        print(f"  {size_mb:5.1f} MB  recursive_split {old_time:6.2f}s ({old_time / size_mb:5.2f} s/MB, "
+              f"{len(old_chunks)} chunks, {old_over} over {args.max_tokens} tokens)   "
+              f"streaming {new_time:6.2f}s ({new_time / size_mb:5.2f} s/MB, "
+              f"{len(new_chunks)} chunks, {new_over} over)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Serial vs pipelined corpus ingestion against fake S3 / OpenAI / Pinecone.
+
+Run from the repo root:
+    python -m benchmarks.bench_ingest --documents 8 --chunks 400 --rpm 600 --fail-rate 0.05
+
+Fetch and upsert are simulated with fixed sleeps, embeddings go through a real
+openai client to a local FakeEmbeddingsServer (which injects 429s), and both
+runs use the same IngestionRunner: once with one worker per stage, once with
+the configured pools. The rate limiter's RPM cap is checked against the
+busiest 60 s window of requests actually seen by the server. A final re-run
+over the unchanged corpus reuses the pipelined run's manifest and should make
+zero embedding requests. Documents are fetched as line streams, and every
+upsert checks that the chunk text for each of its vectors was already handed
+to the text store.
+"""
+import time
+import argparse
+
+import openai
+
+from benchmarks.bench_embedder import synthetic_chunks
+from benchmarks.fake_embeddings_server import serve_in_thread
+from parsing_chunks.embedder import BatchEmbedder
+from parsing_chunks.ingest import IngestionRunner
+from parsing_chunks.manifest import IndexManifest
+from parsing_chunks.rate_limiter import RateLimiter
+
+
+def busiest_minute(times) -> int:
+    times = sorted(times)
+    busiest, first = 0, 0
+    for last, t in enumerate(times):
+        while t - times[first] > 60:
+            first += 1
+        busiest = max(busiest, last - first + 1)
+    return busiest
+
+
+class MemoryTextStore:
+    """Stands in for the chunk store; upserts check their bodies were stored first."""
+
+    def __init__(self):
+        self.bodies = {}
+        self.orphans = 0  # vectors upserted before their body existed
+
+    def add(self, entries):
+        self.bodies.update((chunk_id, text) for chunk_id, text, _ in entries)
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            self.bodies.pop(chunk_id, None)
+
+    def ids(self, file_name):
+        return {chunk_id for chunk_id in self.bodies if chunk_id.startswith(f"{file_name}#")}
+
+
+def make_runner(args, server, workers: dict, manifest: IndexManifest, text_store: MemoryTextStore):
+    corpus = {f"doc{i}": synthetic_chunks(args.chunks, seed=i) for i in range(args.documents)}
+
+    def fetch(name):
+        time.sleep(args.fetch_latency)
+        return iter("\n\n".join(corpus[name]).splitlines())  # streamed, like an S3 body
+
+    def upsert(vectors):
+        text_store.orphans += sum(vector_id not in text_store.bodies for vector_id, _, _ in vectors)
+        time.sleep(args.upsert_latency)
+
+    client = openai.OpenAI(api_key="fake", base_url=server.base_url, max_retries=0)
+    embedder = BatchEmbedder(client=client, max_batch_tokens=args.batch_tokens,
+                             rate_limiter=RateLimiter(rpm=args.rpm, tpm=args.tpm, base_backoff=0.1))
+    return IngestionRunner(fetch, lambda lines: (line for line in lines if line), upsert, embedder=embedder,
+                           delete=lambda ids: None, manifest=manifest, text_stores=[text_store], **workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=8)
+    parser.add_argument("--chunks", type=int, default=400, help="chunks per document")
+    parser.add_argument("--batch-tokens", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.1, help="fake embeddings API seconds per request")
+    parser.add_argument("--fail-rate", type=float, default=0.05)
+    parser.add_argument("--fetch-latency", type=float, default=0.3)
+    parser.add_argument("--upsert-latency", type=float, default=0.05)
+    parser.add_argument("--rpm", type=float, default=600)
+    parser.add_argument("--tpm", type=float, default=10_000_000)
+    args = parser.parse_args()
+
+    files = [f"doc{i}" for i in range(args.documents)]
+    serial = {"fetch_workers": 1, "split_workers": 1, "embed_workers": 1, "upsert_workers": 1}
+    pipelined = {"fetch_workers": 4, "split_workers": 2, "embed_workers": 8, "upsert_workers": 4}
+
+    # In-memory manifests: serial and pipelined both start from an empty index
+    shared = IndexManifest(path=None)
+    runs = (("serial", serial, IndexManifest(path=None)), ("pipelined", pipelined, shared),
+            ("re-run", pipelined, shared))
+
+    results = {}
+    for label, workers, manifest in runs:
+        with serve_in_thread(args.latency, args.fail_rate) as server:
+            text_store = MemoryTextStore()
+            runner = make_runner(args, server, workers, manifest, text_store)
+            start = time.perf_counter()
+            docs = runner.run(files)
+            elapsed = time.perf_counter() - start
+            indexed = sum(doc["upserted"] for doc in docs.values())
+            results[label] = elapsed
+            print(f"📊 {label:<9} {elapsed:6.2f}s  {indexed / elapsed:7.1f} chunks/s  "
+                  f"{server.stats['requests']} API requests ({server.stats['failures']} injected failures), "
+                  f"busiest minute {busiest_minute(server.request_times)} requests vs limit {args.rpm:.0f}, "
+                  f"{text_store.orphans} vectors upserted before their text\n")
+            assert text_store.orphans == 0, "chunk text must be stored before its vector is upserted"
+
+    print(f"⚡ Speed-up: {results['serial'] / results['pipelined']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
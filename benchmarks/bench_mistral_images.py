@@ -0,0 +1,91 @@
+"""Serial vs concurrent image handling for Mistral OCR output.
+
+Run from the repo root:
+    python -m benchmarks.bench_mistral_images --pages 40 --images-per-page 5 --latency 0.05
+
+A synthetic OCR result (pages of markdown referencing JPEG data URIs, the way
+Mistral returns them with include_image_base64=True) is turned into markdown
+by ocr_images.pages_to_markdown, uploading to an in-memory S3 stand-in that
+sleeps --latency seconds per object to model the network round-trip
+(moto/MinIO are not required). The serial run uses one encode and one upload
+worker, matching the old page-by-page loop; both runs must produce
+byte-identical markdown.
+"""
+import io
+import time
+import base64
+import argparse
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+from PIL import Image
+
+from parsing_chunks.ocr_images import pages_to_markdown, IMAGE_ENCODE_WORKERS, IMAGE_UPLOAD_WORKERS
+
+
+class FakeS3:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def upload(self, key, data, content_type=None):
+        time.sleep(self.latency)
+        with self.lock:
+            self.objects[key] = data
+
+    @staticmethod
+    def public_url(key):
+        return f"https://bench.s3.amazonaws.com/{key}"
+
+
+def synthetic_pages(pages: int, images_per_page: int, size: int = 256, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    result = []
+    for page in range(pages):
+        images, lines = [], [f"# Page {page + 1}", "Stress indicators by county and income group."]
+        for n in range(images_per_page):
+            pixels = rng.integers(0, 255, (size, size, 3), dtype=np.uint8)
+            buffer = io.BytesIO()
+            Image.fromarray(pixels).save(buffer, format="JPEG", quality=85)
+            img_id = f"img-{page}-{n}.jpeg"
+            images.append(SimpleNamespace(
+                id=img_id, image_base64="data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode()
+            ))
+            lines.append(f"![{img_id}]({img_id})")
+        result.append(SimpleNamespace(markdown="\n\n".join(lines), images=images))
+    return result
+
+
+def run(pages, latency: float, encode_workers: int, upload_workers: int) -> tuple:
+    fake = FakeS3(latency)
+    start = time.perf_counter()
+    markdown, count = pages_to_markdown(pages, "Markdown_Conversions/bench", fake.upload, fake.public_url,
+                                        encode_workers, upload_workers)
+    return time.perf_counter() - start, markdown, count, len(fake.objects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--images-per-page", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake S3 seconds per upload")
+    parser.add_argument("--encode-workers", type=int, default=IMAGE_ENCODE_WORKERS)
+    parser.add_argument("--upload-workers", type=int, default=IMAGE_UPLOAD_WORKERS)
+    args = parser.parse_args()
+
+    pages = synthetic_pages(args.pages, args.images_per_page)
+    print(f"🖼️ {args.pages} pages x {args.images_per_page} images, {args.latency * 1000:.0f} ms per upload")
+
+    serial_time, serial_md, count, stored = run(pages, args.latency, 1, 1)
+    print(f"  serial      {serial_time:6.2f}s  ({count / serial_time:6.1f} images/s, {stored} objects)")
+
+    parallel_time, parallel_md, count, stored = run(pages, args.latency, args.encode_workers, args.upload_workers)
+    print(f"  concurrent  {parallel_time:6.2f}s  ({count / parallel_time:6.1f} images/s, {stored} objects, "
+          f"{args.encode_workers} encode / {args.upload_workers} upload workers)")
+    print(f"  speedup {serial_time / parallel_time:.1f}x, markdown identical: {serial_md == parallel_md}")
+
+
+if __name__ == "__main__":
+    main()
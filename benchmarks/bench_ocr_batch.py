@@ -0,0 +1,173 @@
+"""Drive the batch OCR runner against a stub Mistral client and an in-memory S3.
+
+Run from the repo root:
+    python -m benchmarks.bench_ocr_batch --documents 12 --ocr-latency 0.5
+
+Five runs over the same Raw_Pdfs/ listing, sharing one journal:
+  1. one document at a time, with OCR failing for the first document
+  2. up to --concurrency documents at a time (fresh journal): the speedup
+  3. resume of run 1: only the failed document is processed, from its upload
+  4. nothing changed: every document is skipped on its ETag, no Mistral calls
+  5. one PDF replaced with new bytes: only that document is re-OCR'd
+"""
+import io
+import time
+import base64
+import hashlib
+import argparse
+import tempfile
+import threading
+from types import SimpleNamespace
+
+from PIL import Image
+
+from parsing_chunks.ocr_batch import OCRBatchRunner, OCRJournal, RAW_PDF_PREFIX
+
+
+def tiny_jpeg_base64() -> str:
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (200, 80, 40)).save(buffer, format="JPEG")
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+class FakeS3:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def put(self, key, data: bytes):
+        with self.lock:
+            self.objects[key] = data
+
+    def get_paginator(self, name):
+        def paginate(Bucket, Prefix):
+            with self.lock:
+                contents = [{"Key": key, "ETag": f'"{hashlib.md5(data).hexdigest()}"'}
+                            for key, data in sorted(self.objects.items()) if key.startswith(Prefix)]
+            yield {"Contents": contents}
+        return SimpleNamespace(paginate=paginate)
+
+    def get_object(self, Bucket, Key):
+        time.sleep(self.latency)
+        with self.lock:
+            return {"Body": io.BytesIO(self.objects[Key])}
+
+    def upload(self, key, data, content_type=None):
+        time.sleep(self.latency)
+        self.put(key, data)
+
+    @staticmethod
+    def public_url(key):
+        return f"https://bench.s3.amazonaws.com/{key}"
+
+
+class StubMistral:
+    """
+    Just enough of the Mistral SDK surface: files.upload, files.get_signed_url,
+    ocr.process. Pass the same uploads dict to stubs of consecutive runs; like
+    the real service, files uploaded by one run stay available to the next.
+    """
+
+    def __init__(self, latency: float, uploads: dict, pages: int = 4, images_per_page: int = 2, fail_names=()):
+        self.latency = latency
+        self.pages = pages
+        self.images_per_page = images_per_page
+        self.fail_names = set(fail_names)
+        self.calls = {"upload": 0, "signed_url": 0, "ocr": 0}
+        self.lock = threading.Lock()
+        self.uploads = uploads
+        self.image = tiny_jpeg_base64()
+        self.files = SimpleNamespace(upload=self._upload, get_signed_url=self._signed_url)
+        self.ocr = SimpleNamespace(process=self._process)
+
+    def _count(self, name):
+        with self.lock:
+            self.calls[name] += 1
+
+    def _upload(self, file, purpose):
+        self._count("upload")
+        time.sleep(self.latency / 5)
+        file_id = f"file-{hashlib.sha256(file['content']).hexdigest()[:12]}"
+        with self.lock:
+            self.uploads[file_id] = file["file_name"]
+        return SimpleNamespace(id=file_id)
+
+    def _signed_url(self, file_id, expiry):
+        self._count("signed_url")
+        return SimpleNamespace(url=f"https://files.example/{file_id}")
+
+    def _process(self, document, model, include_image_base64):
+        self._count("ocr")
+        time.sleep(self.latency)
+        file_name = self.uploads[document["document_url"].rsplit("/", 1)[-1]]
+        if file_name in self.fail_names:
+            raise RuntimeError(f"simulated OCR failure for {file_name}")
+        pages = []
+        for p in range(self.pages):
+            images = [SimpleNamespace(id=f"img-{p}-{n}.jpeg", image_base64=self.image)
+                      for n in range(self.images_per_page)]
+            markdown = "\n\n".join([f"# {file_name} page {p + 1}"] + [f"![{i.id}]({i.id})" for i in images])
+            pages.append(SimpleNamespace(markdown=markdown, images=images))
+        return SimpleNamespace(pages=pages)
+
+
+def run(s3, client, journal, concurrency: int, cache_dir: str) -> tuple:
+    runner = OCRBatchRunner(client, s3, "bench", s3.upload, s3.public_url, journal=journal,
+                            max_concurrent=concurrency, cache_dir=cache_dir)
+    start = time.perf_counter()
+    outcomes = runner.run()
+    return time.perf_counter() - start, outcomes
+
+
+def summary(outcomes: dict) -> str:
+    return ", ".join(f"{status} {sum(1 for s in outcomes.values() if s == status)}"
+                     for status in ("done", "skipped", "failed"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=12)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--ocr-latency", type=float, default=0.5, help="stub seconds per ocr.process")
+    parser.add_argument("--s3-latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ocr_batch_")
+    cache_dir = f"{workdir}/ocr"
+    s3 = FakeS3(args.s3_latency)
+    for i in range(args.documents):
+        s3.put(f"{RAW_PDF_PREFIX}report{i:03d}.pdf", b"%PDF-1.7 synthetic report " + str(i).encode() * 1000)
+
+    results, uploads = [], {}
+    client = StubMistral(args.ocr_latency, uploads, fail_names={"report000.pdf"})
+    journal = OCRJournal(f"{workdir}/journal.json")
+    elapsed, outcomes = run(s3, client, journal, 1, cache_dir)
+    results.append(("serial, one OCR failure", elapsed, outcomes, client.calls))
+
+    client = StubMistral(args.ocr_latency, uploads)
+    elapsed, outcomes = run(s3, client, OCRJournal(f"{workdir}/journal_concurrent.json"), args.concurrency,
+                            cache_dir)
+    results.append((f"concurrent x{args.concurrency}", elapsed, outcomes, client.calls))
+
+    client = StubMistral(args.ocr_latency, uploads)
+    elapsed, outcomes = run(s3, client, OCRJournal(journal.path), args.concurrency, cache_dir)
+    results.append(("resume after failure", elapsed, outcomes, client.calls))
+
+    client = StubMistral(args.ocr_latency, uploads)
+    elapsed, outcomes = run(s3, client, OCRJournal(journal.path), args.concurrency, cache_dir)
+    results.append(("unchanged rerun", elapsed, outcomes, client.calls))
+
+    s3.put(f"{RAW_PDF_PREFIX}report001.pdf", b"%PDF-1.7 revised report")
+    client = StubMistral(args.ocr_latency, uploads)
+    elapsed, outcomes = run(s3, client, OCRJournal(journal.path), args.concurrency, cache_dir)
+    results.append(("one PDF replaced", elapsed, outcomes, client.calls))
+
+    print(f"\n📊 {args.documents} PDFs, {args.ocr_latency:.2f}s per stub OCR call (journal in {workdir})")
+    for label, elapsed, outcomes, calls in results:
+        print(f"  {label:<24} {elapsed:6.2f}s  {summary(outcomes):<28} "
+              f"uploads={calls['upload']:<3} ocr={calls['ocr']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""CPU cost of turning OCR pages into markdown: old transcoding loop vs pass-through.
+
+Run from the repo root:
+    python -m benchmarks.bench_ocr_markdown --pages 50 --images-per-page 8
+
+Uploads are no-ops, so only decoding, transcoding, link substitution and
+document assembly are timed. The old path (copied from mistral_parser before
+the change) converts every image to RGB PNG, calls md.replace once per image
+and grows the document with +=; the new path in ocr_images uploads PNG/JPEG
+bytes as received, rewrites each page in one regex pass and joins once. Both
+runs use a single worker so the numbers are per-core.
+"""
+import io
+import time
+import base64
+import argparse
+
+from PIL import Image
+
+from benchmarks.bench_mistral_images import synthetic_pages
+from parsing_chunks.ocr_images import pages_to_markdown
+
+FILLER = "Stress indicators by county, income group and access to primary care. " * 40
+
+
+# ───────────── Old implementation (parsing_chunks/mistral_parser.py before the change) ─────────────
+
+def replace_image_references(md: str, images: dict, base_path: str, upload) -> str:
+    for img_id, img_base64 in images.items():
+        img_data = base64.b64decode(img_base64.split(",")[-1])
+
+        image_filename = f"{img_id}.png"
+        s3_key = f"{base_path}/Images/{image_filename}"
+
+        image = Image.open(io.BytesIO(img_data)).convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        buffer.seek(0)
+
+        upload(s3_key, buffer.read())
+
+        image_url = f"https://bench.s3.amazonaws.com/{s3_key}"
+        md = md.replace(f"![{img_id}]({img_id})", f"![{image_filename}]({image_url})")
+
+    return md
+
+
+def old_pages_to_markdown(pages, base_path: str, upload):
+    full_markdown = ""
+    image_counter = 0
+    for page in pages:
+        images = {img.id: img.image_base64 for img in page.images}
+        full_markdown += replace_image_references(page.markdown, images, base_path, upload) + "\n\n"
+        image_counter += len(images)
+    return full_markdown, image_counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--images-per-page", type=int, default=8)
+    parser.add_argument("--image-size", type=int, default=256, help="image width/height in pixels")
+    args = parser.parse_args()
+
+    pages = synthetic_pages(args.pages, args.images_per_page, size=args.image_size)
+    for page in pages:
+        page.markdown = page.markdown.replace("\n\n", f"\n\n{FILLER}\n\n")
+    base_path = "Markdown_Conversions/bench"
+    print(f"📄 {args.pages} pages, {args.pages * args.images_per_page} JPEG images "
+          f"({args.image_size}x{args.image_size}), uploads are no-ops")
+
+    uploaded = []
+    start = time.perf_counter()
+    old_md, count = old_pages_to_markdown(pages, base_path, lambda key, data: uploaded.append(len(data)))
+    old_time = time.perf_counter() - start
+    old_bytes = sum(uploaded)
+
+    uploaded = []
+    start = time.perf_counter()
+    new_md, _ = pages_to_markdown(pages, base_path, lambda key, data, content_type: uploaded.append(len(data)),
+                                  lambda key: f"https://bench.s3.amazonaws.com/{key}", 1, 1)
+    new_time = time.perf_counter() - start
+    new_bytes = sum(uploaded)
+
+    print(f"  transcode + replace  {old_time:6.2f}s  ({count / old_time:7.1f} images/s, "
+          f"{old_bytes / 2 ** 20:6.1f} MiB uploaded)")
+    print(f"  pass-through + sub   {new_time:6.2f}s  ({count / new_time:7.1f} images/s, "
+          f"{new_bytes / 2 ** 20:6.1f} MiB uploaded)")
+    print(f"  speedup {old_time / new_time:.1f}x, links rewritten: old {old_md.count('](https://')}, "
+          f"new {new_md.count('](https://')}, markdown {len(new_md) / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Serial vs concurrent bulk PDF upload, then an unchanged re-sync.
+
+Run from the repo root:
+    python -m benchmarks.bench_pdf_upload --files 40 --size-mb 2
+
+Synthetic PDFs are written to a temp directory and synced with
+pdf_to_s3.bulk_upload into an in-memory S3 stand-in that models a per-request
+latency and a per-connection bandwidth cap. The same code runs against a real
+emulator by setting AWS_ENDPOINT_URL (e.g. MinIO on http://localhost:9000) and
+calling `python -m parsing_chunks.pdf_to_s3 <dir>` instead.
+"""
+import os
+import time
+import argparse
+import tempfile
+import threading
+
+from botocore.exceptions import ClientError
+
+from parsing_chunks import pdf_to_s3
+
+
+class FakeS3:
+    def __init__(self, latency: float, bandwidth_mb: float):
+        self.latency = latency
+        self.bandwidth = bandwidth_mb * pdf_to_s3.MB
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def head_object(self, Bucket, Key):
+        time.sleep(self.latency)
+        with self.lock:
+            if Key not in self.objects:
+                raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+            size, metadata = self.objects[Key]
+        return {"ContentLength": size, "Metadata": metadata}
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, Config=None):
+        size = os.path.getsize(Filename)
+        time.sleep(self.latency + size / self.bandwidth)
+        with self.lock:
+            self.objects[Key] = (size, dict((ExtraArgs or {}).get("Metadata", {})))
+
+
+def make_pdfs(directory: str, files: int, size_mb: float) -> list:
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, f"report{i:03d}.pdf")
+        with open(path, "wb") as f:
+            f.write(b"%PDF-1.7\n" + os.urandom(int(size_mb * pdf_to_s3.MB)))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--size-mb", type=float, default=2)
+    parser.add_argument("--workers", type=int, default=pdf_to_s3.PDF_UPLOAD_WORKERS)
+    parser.add_argument("--latency", type=float, default=0.03, help="fake S3 seconds per request")
+    parser.add_argument("--bandwidth-mb", type=float, default=50, help="fake S3 MB/s per connection")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="pdfs_")
+    paths = make_pdfs(directory, args.files, args.size_mb)
+    rows = []
+
+    fake = FakeS3(args.latency, args.bandwidth_mb)
+    rows.append(("serial", pdf_to_s3.bulk_upload([directory], workers=1, client=fake)))
+
+    fake = FakeS3(args.latency, args.bandwidth_mb)
+    rows.append((f"{args.workers} workers", pdf_to_s3.bulk_upload([directory], workers=args.workers, client=fake)))
+    rows.append(("unchanged re-sync", pdf_to_s3.bulk_upload([os.path.join(directory, "*.pdf")],
+                                                             workers=args.workers, client=fake)))
+
+    with open(paths[0], "ab") as f:
+        f.write(b"% revised\n")
+    rows.append(("one file edited", pdf_to_s3.bulk_upload([directory], workers=args.workers, client=fake)))
+
+    print(f"\n📊 {args.files} x {args.size_mb:g} MB PDFs, {args.latency * 1000:.0f} ms/request, "
+          f"{args.bandwidth_mb:g} MB/s per connection")
+    for label, r in rows:
+        rate = r["bytes"] / pdf_to_s3.MB / r["seconds"] if r["seconds"] else 0.0
+        print(f"  {label:<18} {r['seconds']:6.2f}s  {rate:7.1f} MB/s  uploaded={r['uploaded']:<3} "
+              f"skipped={r['skipped']:<3} failed={r['failed']}")
+
+
+if __name__ == "__main__":
+    main()
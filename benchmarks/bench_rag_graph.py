@@ -0,0 +1,58 @@
+"""Cold vs warm graph setup overhead for /rag_query.
+
+Run from the repo root:
+    python -m benchmarks.bench_rag_graph --requests 50
+
+Only the per-request setup is timed (no LLM call is made), so the numbers show
+exactly what the compiled-graph registry removes from every request. The RAG
+stores default to VECTOR_STORE=local in a temp directory, so no Pinecone
+credentials are needed and nothing is written under .cache/.
+"""
+import argparse
+import os
+import time
+import tempfile
+import tracemalloc
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+# rag_tool opens its vector store, chunk store and lexical index on import;
+# keep them local and out of the working directory
+os.environ.setdefault("VECTOR_STORE", "local")
+os.environ.setdefault("LOCAL_VECTOR_STORE_PATH", tempfile.mkdtemp(prefix="rag_graph_"))
+for name, file_name in [("CHUNK_STORE_PATH", "chunk_store.sqlite"), ("LEXICAL_INDEX_PATH", "lexical_index.sqlite"),
+                        ("EMBED_CACHE_PATH", "embeddings.sqlite"), ("INDEX_MANIFEST_PATH", "index_manifest.json")]:
+    os.environ.setdefault(name, os.path.join(os.environ["LOCAL_VECTOR_STORE_PATH"], file_name))
+
+from agents import controller
+
+
+def measure(label, build, n):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(n):
+        build()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_request_ms = elapsed / n * 1000
+    print(f"{label:<28} {per_request_ms:9.3f} ms/request   peak alloc {peak / 1024:9.1f} KiB")
+    return per_request_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"📏 Graph setup overhead over {args.requests} requests")
+    cold = measure("cold (create_rag_graph)", controller.create_rag_graph, args.requests)
+
+    controller.reload_rag_graph()
+    controller.get_rag_graph()  # first build is paid once per process
+    warm = measure("warm (get_rag_graph)", controller.get_rag_graph, args.requests)
+
+    print(f"⚡ Warm path is {cold / max(warm, 1e-9):,.0f}x cheaper per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Retrieval latency with no cache, the exact tier only, and both tiers.
+
+Run from the repo root:
+    python -m benchmarks.bench_retrieval_cache --questions 2000 --topics 40
+
+A synthetic stream of user questions is drawn from a handful of topics
+("why is stress high in X", "how to improve Y", ...): each question is either
+a verbatim repeat (modulo case/punctuation), a paraphrase whose embedding sits
+close to its topic's, or a brand-new topic. Embedding and vector search are
+simulated with fixed sleeps (OpenAI + Pinecone round trips). Topic embeddings
+share a common component, so unrelated questions are still fairly similar
+(cosine ~0.8) and semantic hits on the wrong topic are reported as false
+reuse. Half-way through, a re-ingestion is simulated by bumping the index
+version.
+"""
+import time
+import argparse
+
+import numpy as np
+
+from agents.rag_agent.retrieval_cache import RetrievalCache
+
+TEMPLATES = ["Why is stress high in {}?", "how to improve {}", "What drives {} outcomes",
+             "Explain the {} stress trend"]
+
+
+def topic_vectors(topics: int, dim: int, shared: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    common = rng.normal(size=dim)
+    vectors = shared * common + (1 - shared) * rng.normal(size=(topics, dim))
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def question_stream(count: int, topics: int, repeat: float, paraphrase: float, seed: int = 1):
+    """Yields (text, topic, paraphrase_id); popular topics are asked far more often (Zipf)."""
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, topics + 1)
+    weights /= weights.sum()
+    for _ in range(count):
+        topic = int(rng.choice(topics, p=weights))
+        roll = rng.random()
+        if roll < repeat:
+            variant = 0
+        elif roll < repeat + paraphrase:
+            variant = int(rng.integers(1, 1000))
+        else:
+            variant = -int(rng.integers(1, 10 ** 9))  # a question nobody asked before
+        text = TEMPLATES[topic % len(TEMPLATES)].format(f"region {topic}")
+        if variant > 0:
+            text = f"{text} (phrasing {variant})"
+        elif variant < 0:
+            text = f"{text} detail {-variant}"
+        if rng.random() < 0.5:
+            text = text.upper()
+        yield text, topic, variant
+
+
+def run(label, cache, stream, topics, args):
+    rng = np.random.default_rng(2)
+    false_reuse = 0
+    start = time.perf_counter()
+    for i, (text, topic, variant) in enumerate(stream):
+        if i == len(stream) // 2:
+            args.version += 1  # re-ingestion
+        params = (10, "additional2")
+        if cache and cache.get(text, params) is not None:
+            continue
+
+        t0 = time.perf_counter()
+        time.sleep(args.embed_ms / 1000)
+        noise = args.paraphrase_noise if variant >= 0 else args.new_noise
+        embedding = topics[topic] + noise * rng.normal(size=topics.shape[1]) / np.sqrt(topics.shape[1])
+        if cache:
+            hit = cache.get_similar(embedding, params, elapsed=time.perf_counter() - t0)
+            if hit is not None:
+                false_reuse += hit[0] != topic or variant < 0
+                continue
+
+        time.sleep(args.search_ms / 1000)
+        if cache:
+            cache.put(text, embedding, (topic, variant), params, cost=time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<18} {elapsed:6.2f}s  {elapsed / len(stream) * 1000:6.1f} ms/question  "
+          f"false reuse={false_reuse}")
+    if cache:
+        print(f"    {cache.report()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=2000)
+    parser.add_argument("--topics", type=int, default=40)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--repeat", type=float, default=0.4, help="share of verbatim repeats")
+    parser.add_argument("--paraphrase", type=float, default=0.4, help="share of paraphrases")
+    parser.add_argument("--embed-ms", type=float, default=3)
+    parser.add_argument("--search-ms", type=float, default=5)
+    parser.add_argument("--threshold", type=float, default=0.95)
+    parser.add_argument("--paraphrase-noise", type=float, default=0.2, help="paraphrase cosine ~0.98 to the topic, ~0.96 to each other")
+    parser.add_argument("--new-noise", type=float, default=0.6, help="new-question cosine ~0.85")
+    args = parser.parse_args()
+    args.version = 0
+
+    topics = topic_vectors(args.topics, args.dim, shared=0.6)
+    stream = list(question_stream(args.questions, args.topics, args.repeat, args.paraphrase))
+    version = lambda: args.version
+
+    print(f"\n📊 {args.questions} questions over {args.topics} topics, {args.repeat:.0%} repeats, "
+          f"{args.paraphrase:.0%} paraphrases, embed {args.embed_ms:g} ms + search {args.search_ms:g} ms")
+    run("no cache", None, stream, topics, args)
+    args.version = 0
+    run("exact tier only", RetrievalCache(similarity=2.0, version=version), stream, topics, args)
+    args.version = 0
+    run("exact + semantic", RetrievalCache(similarity=args.threshold, version=version), stream, topics, args)
+
+
+if __name__ == "__main__":
+    main()
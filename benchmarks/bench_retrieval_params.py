@@ -0,0 +1,87 @@
+"""Prompt context size and diversity for different retrieval settings.
+
+Run from the repo root:
+    python -m benchmarks.bench_retrieval_params --subtopics 12 --copies 4
+
+A synthetic corpus is loaded into a LocalVectorStore (VECTOR_STORE=local in a
+temp directory). Every source holds a set of subtopics, and each subtopic is
+stored as several near-duplicate chunks, the way overlapping chunks of one
+section look after ingestion. A query close to all subtopics then goes
+through rag_tool.retrieve_context_chunks with the old fixed settings (top_k=10,
+additional2 only, no budget) and with budgets, MMR and source filters. For
+each setting the script reports context tokens (what every LLM call pays
+for), distinct subtopics covered and retrieval time. The retrieval cache is
+disabled so each call hits the store.
+"""
+import os
+import re
+import time
+import argparse
+import tempfile
+
+os.environ["VECTOR_STORE"] = "local"
+os.environ.setdefault("LOCAL_VECTOR_STORE_PATH", tempfile.mkdtemp(prefix="rag_params_"))
+os.environ.setdefault("LEXICAL_INDEX_PATH", os.path.join(os.environ["LOCAL_VECTOR_STORE_PATH"], "lexical_index.sqlite"))
+os.environ.setdefault("CHUNK_STORE_PATH", os.path.join(os.environ["LOCAL_VECTOR_STORE_PATH"], "chunk_store.sqlite"))
+
+import numpy as np
+
+from agents.rag_agent import rag_tool
+
+_SUBTOPIC = re.compile(r"\[(\w+) subtopic (\d+)\]")
+
+
+def build_corpus(subtopics: int, copies: int, dim: int, words: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    query = rng.normal(size=dim)
+    query /= np.linalg.norm(query)
+    vectors, texts = [], []
+    for source in rag_tool.SOURCES:
+        for s in range(subtopics):
+            # Every subtopic is related to the query; its copies are nearly identical to each other
+            center = query + 0.9 * rng.normal(size=dim) / np.sqrt(dim)
+            for c in range(copies):
+                values = center + 0.05 * rng.normal(size=dim) / np.sqrt(dim)
+                text = f"[{source} subtopic {s}] " + " ".join(f"w{rng.integers(1000)}" for _ in range(words))
+                vectors.append((f"{source}_{s}_{c}", values, {"source": source}))
+                texts.append((f"{source}_{s}_{c}", text, source))
+    rag_tool.chunk_store.add(texts)
+    rag_tool.store.upsert(vectors)
+    return query
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subtopics", type=int, default=12)
+    parser.add_argument("--copies", type=int, default=4, help="near-duplicate chunks per subtopic")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--words", type=int, default=300, help="words per chunk")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    query = build_corpus(args.subtopics, args.copies, args.dim, args.words)
+    rag_tool.get_query_embedding = lambda q: list(query)
+    rag_tool.retrieval_cache.max_entries = 0
+
+    settings = [
+        ("fixed (old)", dict(top_k=10, sources=["additional2"], max_tokens=0)),
+        ("budget 3000", dict(top_k=10, sources=["additional2"], max_tokens=3000)),
+        ("budget 1500", dict(top_k=10, sources=["additional2"], max_tokens=1500)),
+        ("mmr 0.5 + 1500", dict(top_k=10, sources=["additional2"], mmr_lambda=0.5, max_tokens=1500)),
+        ("all sources, mmr", dict(top_k=10, sources=[], mmr_lambda=0.5, max_tokens=1500)),
+        ("cdc1+who1, k=5", dict(top_k=5, sources=["cdc1", "who1"], mmr_lambda=0.5, max_tokens=1500)),
+    ]
+    print(f"\n📊 {len(rag_tool.SOURCES)} sources x {args.subtopics} subtopics x {args.copies} copies, "
+          f"~{args.words} words per chunk")
+    for label, kwargs in settings:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            context = rag_tool.retrieve_context_chunks("why is stress high", **kwargs)
+        ms = (time.perf_counter() - start) / args.repeat * 1000
+        covered = set(_SUBTOPIC.findall(context))
+        print(f"  {label:<18} {rag_tool.count_tokens(context):6} tokens  "
+              f"{len(context.split(chr(10) * 2)):3} chunks  {len(covered):3} distinct subtopics  {ms:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Peak memory of full-read vs streaming ingestion as documents grow.
+
+Run from the repo root:
+    python -m benchmarks.bench_streaming --sizes 1 2 4 8
+
+A fake S3 object produces synthetic markdown lazily through iter_chunks, the
+way botocore's StreamingBody does. Each size is ingested twice through the
+IngestionRunner with a stub embeddings client and a no-op upsert: once reading
+the whole body and decoding it (the old load_md_from_s3), once streaming lines
+through open_s3_lines into the chunker. tracemalloc's peak should grow with the
+document in the first mode and level off in the second, where it is bounded by
+the queued embed units (queue size x batch tokens) rather than the document.
+"""
+import time
+import argparse
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+
+from benchmarks.bench_chunker import WORDS, sentence
+from parsing_chunks.embedder import BatchEmbedder
+from parsing_chunks.ingest import IngestionRunner, INGEST_EMBED_BATCH_TOKENS, INGEST_QUEUE_SIZE
+from parsing_chunks.markdown_chunker import MarkdownChunker
+from parsing_chunks.s3_stream import open_s3_lines
+
+
+def iter_markdown_bytes(size_bytes: int, seed: int = 0):
+    """Yield synthetic markdown one section at a time, never holding the whole document."""
+    rng = np.random.default_rng(seed)
+    size, section = 0, 0
+    while size < size_bytes:
+        section += 1
+        block = [f"## Section {section}: {' '.join(rng.choice(WORDS, 3))}"]
+        for _ in range(rng.integers(2, 6)):
+            if rng.random() < 0.8:
+                block.append(" ".join(sentence(rng) for _ in range(rng.integers(3, 12))))
+            else:
+                block.append("\n".join(f"- {sentence(rng)}" for _ in range(rng.integers(3, 8))))
+        data = ("\n\n".join(block) + "\n\n").encode("utf-8")
+        size += len(data)
+        yield data
+
+
+class FakeBody:
+    def __init__(self, size_bytes: int):
+        self.size_bytes = size_bytes
+
+    def iter_chunks(self, chunk_size: int = 1024):
+        buffer = b""
+        for data in iter_markdown_bytes(self.size_bytes):
+            buffer += data
+            while len(buffer) >= chunk_size:
+                yield buffer[:chunk_size]
+                buffer = buffer[chunk_size:]
+        if buffer:
+            yield buffer
+
+    def read(self) -> bytes:
+        return b"".join(self.iter_chunks(1024 * 1024))
+
+    def close(self):
+        pass
+
+
+class FakeS3:
+    def __init__(self, sizes: dict):
+        self.sizes = sizes
+
+    def get_object(self, Bucket, Key):
+        return {"Body": FakeBody(self.sizes[Key])}
+
+
+def stub_client(dimensions: int = 8):
+    def create(model, input):
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[0.0] * dimensions)
+                                     for i in range(len(input))])
+    return SimpleNamespace(embeddings=SimpleNamespace(create=create))
+
+
+def measure(fetch, key: str, args) -> tuple:
+    embedder = BatchEmbedder(client=stub_client(), max_batch_tokens=args.batch_tokens)
+    runner = IngestionRunner(fetch, lambda lines: MarkdownChunker().chunks(lines), lambda vectors: None,
+                             embedder=embedder, delete=lambda ids: None, queue_size=args.queue_size,
+                             fetch_workers=1, split_workers=1, embed_workers=1, upsert_workers=1)
+    tracemalloc.start()
+    start = time.perf_counter()
+    runner.pipeline.run([key])
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed, runner.documents.get(key, {}).get("chunks", 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 2, 4, 8], help="document sizes in MB")
+    parser.add_argument("--batch-tokens", type=int, default=INGEST_EMBED_BATCH_TOKENS)
+    parser.add_argument("--queue-size", type=int, default=INGEST_QUEUE_SIZE)
+    args = parser.parse_args()
+
+    keys = {f"doc{size_mb}": int(size_mb * 1024 * 1024) for size_mb in args.sizes}
+    keys["warmup"] = 64 * 1024
+    s3 = FakeS3(keys)
+
+    def read_whole(key):
+        return s3.get_object(Bucket="bench", Key=key)["Body"].read().decode("utf-8")
+
+    def stream(key):
+        return open_s3_lines(s3, "bench", key)
+
+    # Compile regexes, resolve the tokenizer, etc. before anything is measured
+    measure(stream, "warmup", args)
+    print(f"🌊 Peak traced memory while ingesting one document "
+          f"(embed units of {args.batch_tokens} tokens, queues of {args.queue_size})")
+    for size_mb, key in zip(args.sizes, keys):
+        read_peak, read_time, read_chunks = measure(read_whole, key, args)
+        stream_peak, stream_time, stream_chunks = measure(stream, key, args)
+        print(f"  {size_mb:5.1f} MB  full read {read_peak / 2 ** 20:7.1f} MiB peak ({read_time:5.2f}s, "
+              f"{read_chunks} chunks)   streaming {stream_peak / 2 ** 20:7.1f} MiB peak "
+              f"({stream_time:5.2f}s, {stream_chunks} chunks)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Recall and latency of the local vector store against a brute-force baseline.
+
+Run from the repo root:
+    python -m benchmarks.bench_vector_store --sizes 5000 50000 --dim 1536
+
+Clustered synthetic embeddings (roughly like chunks from a handful of
+documents) are loaded into a LocalVectorStore in a temp directory. For each
+query the brute-force baseline is a float64 dot product over every vector
+followed by a full sort; the store is timed in exact mode, exact mode with a
+{"source": {"$eq": ...}} filter, and IVF mode. Recall@k is measured against
+the baseline's top-k (filtered queries against a filtered baseline).
+"""
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from agents.rag_agent.vector_store import LocalVectorStore
+
+SOURCES = ["cdc1", "cdc2", "who1", "who2", "sdoh_strategies1", "sdoh_strategies2", "additional", "additional2"]
+
+
+def synthetic_corpus(n: int, dim: int, spread: float, clusters: int = 64, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    assign = rng.integers(0, clusters, n)
+    vectors = centers[assign] + spread * rng.normal(size=(n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    sources = np.array(SOURCES)[assign % len(SOURCES)]
+    return vectors, sources, centers
+
+
+def synthetic_queries(centers, count: int, spread: float, seed: int = 1):
+    """Fresh draws from the corpus distribution, so queries are not copies of stored vectors."""
+    rng = np.random.default_rng(seed)
+    picks = centers[rng.integers(0, len(centers), count)]
+    queries = picks + spread * rng.normal(size=picks.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def brute_force(vectors64, query, top_k: int, mask=None) -> list:
+    scores = vectors64 @ query.astype(np.float64)
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+    return list(np.argsort(-scores)[:top_k])
+
+
+def timed(fn, queries):
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(fn(query))
+        latencies.append(time.perf_counter() - start)
+    return results, np.array(latencies) * 1000
+
+
+def recall(found, truth) -> float:
+    return np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 50000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--probes", type=int, default=8)
+    parser.add_argument("--spread", type=float, default=0.6,
+                        help="within-cluster noise; larger values make IVF recall harder")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        vectors, sources, centers = synthetic_corpus(n, args.dim, args.spread)
+        queries = synthetic_queries(centers, args.queries, args.spread)
+        path = tempfile.mkdtemp(prefix="vector_store_")
+        store = LocalVectorStore(path, mode="exact")
+        for start in range(0, n, 1000):
+            store.upsert([(f"v{i}", vectors[i], {"source": str(sources[i])})
+                          for i in range(start, min(n, start + 1000))])
+        ivf = LocalVectorStore(path, mode="ivf", nprobe=args.probes, ivf_min_vectors=0)
+        ivf.query(queries[0], args.top_k)  # builds the lists
+
+        def ids(result):
+            return [int(m["id"][1:]) for m in result["matches"]]
+
+        vectors64 = vectors.astype(np.float64)
+        truth, base_ms = timed(lambda q: brute_force(vectors64, q, args.top_k), queries)
+        exact, exact_ms = timed(lambda q: ids(store.query(q, args.top_k)), queries)
+        approx, ivf_ms = timed(lambda q: ids(ivf.query(q, args.top_k)), queries)
+
+        mask = sources == "additional2"
+        filtered_truth = [brute_force(vectors64, q, args.top_k, mask) for q in queries]
+        filtered, filtered_ms = timed(
+            lambda q: ids(store.query(q, args.top_k, filter={"source": {"$eq": "additional2"}})), queries)
+
+        print(f"\n📐 {n} x {args.dim} vectors, {args.queries} queries, top_k={args.top_k}")
+        for label, ms, r in (("brute force (float64)", base_ms, 1.0),
+                             ("local exact", exact_ms, recall(exact, truth)),
+                             ("local exact + filter", filtered_ms, recall(filtered, filtered_truth)),
+                             (f"local ivf ({len(ivf._ivf[1])} lists, {args.probes} probes)", ivf_ms,
+                              recall(approx, truth))):
+            print(f"  {label:<34} p50 {np.percentile(ms, 50):7.3f} ms  p95 {np.percentile(ms, 95):7.3f} ms  "
+                  f"recall@{args.top_k} {r:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Hit rate at k for dense, BM25 and hybrid (RRF) retrieval.
+
+Run from the repo root:
+    python -m benchmarks.eval_hybrid_retrieval                      # synthetic corpus, no API keys
+    python -m benchmarks.eval_hybrid_retrieval --queries qrels.jsonl  # configured index + OpenAI embeddings
+
+Synthetic mode builds a LocalVectorStore, ChunkStore and BM25Index in a temp
+directory.
+The corpus has topics, and each topic has sibling chunks that share its
+vocabulary. Every chunk also carries one exact term, the way a section
+introduces "PERMA" or "PCMH". There are two query kinds:
+- term queries name the term. Their embedding lands near the topic but only
+  weakly near the chunk, because embeddings blur acronyms.
+- paraphrase queries share only one ordinary word with the chunk, on top of
+  its topic's vocabulary, but embed close to it.
+
+Live mode reads JSON lines like {"query": "...", "relevant": ["cdc1#…"]} or
+{"query": "...", "answer": "text the chunk must contain"}. It runs them
+against the configured store and lexical index.
+
+Both modes call rag_tool.rank_chunks with hybrid off and on, and BM25 on its
+own. They report hit@k (the relevant chunk is in the top k), MRR, and
+latency per query.
+"""
+import os
+import time
+import json
+import argparse
+import tempfile
+
+import numpy as np
+
+
+def synthetic_corpus(rag_tool, topics: int, chunks: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vocab = [f"w{i}" for i in range(5000)]
+    vectors, lexical, queries = [], [], []
+    for t in range(topics):
+        center = rng.normal(size=dim)
+        topic_words = list(rng.choice(vocab, 25, replace=False))
+        source = rag_tool.SOURCES[t % len(rag_tool.SOURCES)]
+        for c in range(chunks):
+            chunk_id = f"{source}#t{t}c{c}"
+            term = "".join(rng.choice(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"), 5))
+            offset = rng.normal(size=dim)
+            values = center + 0.8 * offset
+            own_words = list(rng.choice(vocab, 20))
+            words = list(rng.choice(topic_words, 40)) + own_words + [term, term]
+            rng.shuffle(words)
+            text = " ".join(words)
+            vectors.append((chunk_id, values, {"source": source}))
+            lexical.append((chunk_id, text, source))
+
+            generic = " ".join(rng.choice(topic_words, 4))
+            noise = lambda: rng.normal(size=dim)
+            queries.append({"kind": "term", "query": f"what is {term} {generic}", "relevant": [chunk_id],
+                            "embedding": center + 0.1 * offset + 0.8 * noise()})
+            queries.append({"kind": "paraphrase", "query": f"how to improve {generic} {own_words[0]}",
+                            "relevant": [chunk_id], "embedding": center + 0.4 * offset + 1.2 * noise()})
+    rag_tool.chunk_store.add(lexical)
+    rag_tool.lexical_index.add(lexical)
+    rag_tool.store.upsert(vectors)
+    return queries
+
+
+def load_queries(path: str) -> list:
+    with open(path) as f:
+        return [dict(json.loads(line), kind="live") for line in f if line.strip()]
+
+
+def bm25_only(rag_tool, query: str, top_k: int) -> list:
+    hits = rag_tool.lexical_index.search(query, top_k)
+    texts = rag_tool.chunk_texts([chunk_id for chunk_id, _ in hits])
+    return [{"id": chunk_id, "text": texts.get(chunk_id, "")} for chunk_id, _ in hits]
+
+
+def first_hit(ranked, query) -> int:
+    """1-based rank of the first relevant chunk, or 0."""
+    for rank, match in enumerate(ranked, 1):
+        if match["id"] in query.get("relevant", ()) or (query.get("answer") and query["answer"] in match["text"]):
+            return rank
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", help="JSON lines with query + relevant IDs or answer text (live mode)")
+    parser.add_argument("--topics", type=int, default=60)
+    parser.add_argument("--chunks", type=int, default=8, help="sibling chunks per topic")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--ks", type=int, nargs="+", default=[1, 3, 5, 10])
+    args = parser.parse_args()
+
+    if not args.queries:
+        path = tempfile.mkdtemp(prefix="hybrid_eval_")
+        os.environ["VECTOR_STORE"] = "local"
+        os.environ["LOCAL_VECTOR_STORE_PATH"] = path
+        os.environ["LEXICAL_INDEX_PATH"] = os.path.join(path, "lexical_index.sqlite")
+        os.environ["CHUNK_STORE_PATH"] = os.path.join(path, "chunk_store.sqlite")
+    from agents.rag_agent import rag_tool
+
+    if args.queries:
+        queries = load_queries(args.queries)
+        for q in queries:
+            q["embedding"] = rag_tool.get_query_embedding(q["query"])
+    else:
+        queries = synthetic_corpus(rag_tool, args.topics, args.chunks, args.dim)
+
+    depth = max(args.ks)
+    methods = {
+        "dense": lambda q: rag_tool.rank_chunks(q["query"], q["embedding"], depth, hybrid=False),
+        "bm25": lambda q: bm25_only(rag_tool, q["query"], depth),
+        "hybrid (rrf)": lambda q: rag_tool.rank_chunks(q["query"], q["embedding"], depth, hybrid=True),
+    }
+
+    kinds = sorted({q["kind"] for q in queries})
+    print(f"\n📊 {len(queries)} queries ({', '.join(kinds)}), "
+          f"{rag_tool.lexical_index.count()} chunks in the lexical index")
+    header = "  ".join(f"hit@{k:<3}" for k in args.ks)
+    for kind in kinds + (["all"] if len(kinds) > 1 else []):
+        subset = [q for q in queries if kind in ("all", q["kind"])]
+        print(f"\n  {kind} ({len(subset)} queries)\n  {'method':<14} {header}  MRR    ms/query")
+        for name, method in methods.items():
+            ranks, start = [], time.perf_counter()
+            for q in subset:
+                ranks.append(first_hit(method(q), q))
+            ms = (time.perf_counter() - start) / len(subset) * 1000
+            ranks = np.array(ranks)
+            hits = "  ".join(f"{np.mean((ranks > 0) & (ranks <= k)):<7.3f}" for k in args.ks)
+            mrr = np.mean(np.where(ranks > 0, 1.0 / np.maximum(ranks, 1), 0.0))
+            print(f"  {name:<14} {hits}  {mrr:.3f}  {ms:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Local stand-in for the OpenAI embeddings endpoint.
+
+Run from the repo root:
+    python -m benchmarks.fake_embeddings_server --port 8600 --latency 0.2 --fail-rate 0.1
+then point the pipeline at it:
+    OPENAI_BASE_URL=http://127.0.0.1:8600/v1 OPENAI_API_KEY=fake python -m parsing_chunks.chunking
+
+POST /v1/embeddings answers with deterministic vectors (seeded by the input
+text, so callers can check output order), sleeps a fixed latency per request,
+enforces OpenAI's per-request input limits, and can inject 429s / 500s to
+exercise retries.
+"""
+import json
+import base64
+import time
+import random
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+DIMENSIONS = 1536
+MAX_INPUTS = 2048
+MAX_REQUEST_TOKENS = 300_000
+
+
+def fake_vector(text: str, dimensions: int = DIMENSIONS) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def fake_embedding(text: str, dimensions: int = DIMENSIONS) -> list:
+    return fake_vector(text, dimensions).tolist()
+
+
+def encode_vector(vector: np.ndarray, encoding_format: str):
+    # The openai client asks for base64 float32 by default and decodes it itself
+    if encoding_format == "base64":
+        return base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+    return vector.tolist()
+
+
+class FakeEmbeddingsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, fail_rate=0.0, dimensions=DIMENSIONS):
+        super().__init__(address, FakeEmbeddingsHandler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.dimensions = dimensions
+        self.stats = {"requests": 0, "inputs": 0, "failures": 0}
+        self.request_times = []
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+class FakeEmbeddingsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        if self.path.rstrip("/") != "/v1/embeddings":
+            return self._send(404, {"error": {"message": "not found"}})
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        inputs = body.get("input")
+        inputs = [inputs] if isinstance(inputs, str) else list(inputs or [])
+        with server.lock:
+            server.stats["requests"] += 1
+            server.request_times.append(time.monotonic())
+        time.sleep(server.latency)
+
+        if not inputs or any(not isinstance(text, str) or not text for text in inputs):
+            return self._send(400, {"error": {"message": "input must be non-empty strings"}})
+        tokens = sum(len(text.split()) for text in inputs)
+        if len(inputs) > MAX_INPUTS or tokens > MAX_REQUEST_TOKENS:
+            return self._send(400, {"error": {"message": f"too many inputs/tokens ({len(inputs)}/{tokens})"}})
+
+        if random.random() < server.fail_rate:
+            with server.lock:
+                server.stats["failures"] += 1
+            status = random.choice([429, 500])
+            return self._send(status, {"error": {"message": "injected failure"}}, {"retry-after": "0.05"})
+
+        with server.lock:
+            server.stats["inputs"] += len(inputs)
+        encoding_format = body.get("encoding_format", "float")
+        data = [{"object": "embedding", "index": i,
+                 "embedding": encode_vector(fake_vector(text, server.dimensions), encoding_format)}
+                for i, text in enumerate(inputs)]
+        random.shuffle(data)  # the real API doesn't promise order either
+        self._send(200, {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-3-small"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    def _send(self, status: int, payload: dict, headers: dict = None):
+        raw = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+@contextmanager
+def serve_in_thread(latency: float = 0.0, fail_rate: float = 0.0, dimensions: int = DIMENSIONS):
+    """Run a FakeEmbeddingsServer on a free local port for the duration of the block."""
+    server = FakeEmbeddingsServer(("127.0.0.1", 0), latency, fail_rate, dimensions)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered 429/500")
+    parser.add_argument("--dimensions", type=int, default=DIMENSIONS)
+    args = parser.parse_args()
+
+    server = FakeEmbeddingsServer(("127.0.0.1", args.port), args.latency, args.fail_rate, args.dimensions)
+    print(f"🧪 Fake embeddings API on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
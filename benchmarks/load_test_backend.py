@@ -0,0 +1,118 @@
+"""Load-test the FastAPI backend against stubbed agents.
+
+Run from the repo root:
+    python -m benchmarks.load_test_backend --clients 1 2 4 8 16 --requests 64
+
+`agents.controller` is replaced by stubs that sleep for a fixed latency
+(blocking for the sync agents, awaiting for the async ones), so no OpenAI,
+Pinecone, Snowflake or Tavily credentials are needed. Requests go through the
+ASGI app in-process via httpx, so the numbers isolate the backend's own
+concurrency behaviour. Throughput should scale with the number of clients
+until the endpoint limits / worker pool are saturated.
+"""
+import argparse
+import asyncio
+import sys
+import time
+import types
+
+import httpx
+
+STUB_LATENCY = 0.05
+
+
+def install_stub_controller(latency: float):
+    stub = types.ModuleType("agents.controller")
+
+    def blocking_describe(name, fmt="png"):
+        time.sleep(latency)
+        return {"summary": "stub", "etag": "0" * 64}
+
+    def blocking_image(name, fmt="png", if_none_match=None):
+        time.sleep(latency)
+        return {"data": b"\x89PNG stub", "etag": "0" * 64, "media_type": "image/png"}
+
+    def blocking_data(name, fmt="json"):
+        time.sleep(latency)
+        return {"summary": "stub", "encoding": {}, "data": {"columns": [], "dtypes": [], "values": {}}}
+
+    def blocking_dashboard(mode="chart"):
+        time.sleep(latency)
+        return {name: {"summary": "stub", "etag": "0" * 64} for name in stub.SNOWFLAKE_CHARTS}
+
+    async def async_answer(query):
+        await asyncio.sleep(latency)
+        return f"stub answer for {query}"
+
+    stub.arun_rag_agent = async_answer
+    stub.arun_web_search_agent = async_answer
+    stub.get_rag_graph = lambda: None
+    stub.get_rag_metrics = lambda: {}
+    stub.get_snowflake_metrics = lambda: {}
+    stub.warm_snowflake_pool = lambda: {}
+    stub.clear_snowflake_cache = lambda: 0
+    stub.warm_snowflake_charts = lambda: {}
+    stub.SNOWFLAKE_CHARTS = [
+        "stress", "job_satisfaction_vs_stress", "education_vs_stress",
+        "income_vs_stress", "cognition_vs_stress", "primarycare_vs_stress",
+    ]
+    stub.describe_snowflake_chart = blocking_describe
+    stub.get_snowflake_chart_image = blocking_image
+    stub.get_snowflake_chart_data = blocking_data
+    stub.run_snowflake_dashboard_agent = blocking_dashboard
+    sys.modules["agents.controller"] = stub
+
+
+ENDPOINTS = [
+    ("GET", "/snowflake/stress", None),
+    ("GET", "/snowflake/income_vs_stress", None),
+    ("GET", "/snowflake/charts/stress.png", None),
+    ("GET", "/snowflake/education_vs_stress?mode=data", None),
+    ("POST", "/rag_query", {"query": "why is stress high"}),
+    ("POST", "/web/search", {"query": "stress programs"}),
+]
+
+
+async def run_level(app, clients: int, total_requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    queue = asyncio.Queue()
+    for i in range(total_requests):
+        queue.put_nowait(ENDPOINTS[i % len(ENDPOINTS)])
+
+    async def client_loop(client):
+        while True:
+            try:
+                method, path, body = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            response = await client.request(method, path, json=body)
+            response.raise_for_status()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(clients)))
+        return total_requests / (time.perf_counter() - start)
+
+
+async def main_async(args):
+    install_stub_controller(args.latency)
+    from backend.main import app
+
+    print(f"📈 {args.requests} mixed requests per level, stub latency {args.latency * 1000:.0f} ms")
+    baseline = None
+    for clients in args.clients:
+        rps = await run_level(app, clients, args.requests)
+        baseline = baseline or rps
+        print(f"  clients={clients:<4} {rps:8.1f} req/s   ({rps / baseline:4.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=STUB_LATENCY)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 import streamlit as st
 import requests
 import os
-import base64
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+import pandas as pd
+import altair as alt
 from dotenv import load_dotenv
 
 # Load environment
@@ -10,6 +13,78 @@ load_dotenv()
 # 🛠️ Configurable FastAPI backend URL
 FASTAPI_URL = os.getenv("FASTAPI_URL", "http://localhost:8000")
 
+# ⚡ Upper bound on concurrent backend calls (and pooled connections) per run
+MAX_PARALLEL_REQUESTS = int(os.getenv("MAX_PARALLEL_REQUESTS", "8"))
+
+# 🔌 One keep-alive HTTP session per Streamlit server, shared across reruns
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_PARALLEL_REQUESTS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# ❄️ Snowflake charts: (path, heading, success message, error label)
+SNOWFLAKE_CHARTS = [
+    ("/snowflake/stress", "### 📊 Stress Levels by State", "✅ Stress Analysis Complete", "Stress Chart"),
+    ("/snowflake/job_satisfaction_vs_stress", "### 💼 Job Satisfaction vs 😟 Stress",
+     "✅ Job Satisfaction Analysis Complete", "Job Satisfaction Chart"),
+    ("/snowflake/education_vs_stress", "### 🎓 Education Level vs 😟 Stress",
+     "✅ Education Analysis Complete", "Education Chart"),
+    ("/snowflake/income_vs_stress", "### 💰 Income Level vs 😟 Stress", "✅ Income Analysis Complete", "Income Chart"),
+    ("/snowflake/cognition_vs_stress", "### 🧠 Need for Cognition vs 😟 Stress",
+     "✅ Cognition Analysis Complete", "Cognition Chart"),
+    ("/snowflake/primarycare_vs_stress", "### 🩺 Primary Care Visits vs 😟 Stress",
+     "✅ Primary Care Analysis Complete", "Primary Care Chart"),
+]
+
+# ------------------------
+# 🌐 Backend calls (run on worker threads; no Streamlit calls in here)
+# ------------------------
+def post_query(session: requests.Session, path: str, query: str) -> dict:
+    response = session.post(f"{FASTAPI_URL}{path}", json={"query": query})
+    response.raise_for_status()
+    return response.json()
+
+def fetch_snowflake(session: requests.Session, path: str, client_side: bool) -> dict:
+    params = {"mode": "data"} if client_side else None
+    response = session.get(f"{FASTAPI_URL}{path}", params=params)
+    response.raise_for_status()
+    data = response.json()
+    if "chart_url" in data:
+        # 🖼️ Charts are served as raw image bytes from the URL in each response
+        chart = session.get(f"{FASTAPI_URL}{data['chart_url']}")
+        chart.raise_for_status()
+        data["chart_bytes"] = chart.content
+    return data
+
+# ------------------------
+# 📈 Rendering (main thread)
+# ------------------------
+def columnar_to_frame(data: dict) -> pd.DataFrame:
+    return pd.DataFrame({col: data["values"][col] for col in data["columns"]})
+
+def render_chart_data(payload: dict):
+    # Client-side rendering: the backend ships aggregate rows, the browser draws them
+    encoding = payload["encoding"]
+    df = columnar_to_frame(payload["data"])
+    mark = alt.Chart(df).mark_bar() if encoding["kind"] == "bar" else alt.Chart(df).mark_circle(size=60)
+    chart = mark.encode(
+        # sort=None keeps the backend's row order (e.g. highest stress first)
+        x=alt.X(encoding["x"], sort=None, title=encoding["xlabel"],
+                type="nominal" if encoding["kind"] == "bar" else "quantitative"),
+        y=alt.Y(encoding["y"], title=encoding["ylabel"], type="quantitative"),
+        tooltip=list(df.columns),
+    ).properties(title=encoding["title"])
+    st.altair_chart(chart, use_container_width=True)
+
+def show_snowflake_chart(data: dict):
+    if "data" in data:
+        render_chart_data(data)
+    else:
+        st.image(data["chart_bytes"], use_container_width=True)
+
 # Streamlit App Config
 st.set_page_config(page_title="SDoH Research Assistant", layout="wide")
 
@@ -43,126 +118,86 @@ st.markdown("**Select Research Agents to Use:**")
 rag_agent_selected = st.checkbox("📦 RAG Agent (Pinecone)", value=True)
 snowflake_agent_selected = st.checkbox("❄️ Snowflake Agent (Structured Data)", value=False)
 web_agent_selected = st.checkbox("🌐 Web Search Agent (Real-Time Insights)", value=False)
+client_side_charts = st.checkbox("📈 Render Snowflake charts in the browser", value=True)
 
 submit = st.button("🔍 Run Research")
 
 # ------------------------
 # 🚀 Call FastAPI Backend
 # ------------------------
+# Every selected agent call is issued at once over the shared session; each
+# section renders into its own placeholder as soon as its response arrives.
 if submit:
     if not query.strip() and not snowflake_agent_selected:
         st.warning("Please enter a question or enable an agent.")
     else:
+        # 🔌 Resolve the cached session on the script thread; workers only receive it
+        session = get_http_session()
+        sections = []  # (placeholder, pending message, fetch, render, error label)
+
         # 📦 RAG Agent Output
         if rag_agent_selected:
             st.subheader("📦 RAG Agent Output")
-            with st.spinner("Querying vector database..."):
-                try:
-                    response = requests.post(f"{FASTAPI_URL}/rag_query", json={"query": query})
-                    data = response.json()
-                    st.success("✅ RAG Complete")
-                    st.markdown("### 🧠 Final Answer:")
-                    st.write(data["response"])
-                except Exception as e:
-                    st.error(f"❌ RAG Agent failed: {e}")
+
+            def render_rag(data):
+                st.success("✅ RAG Complete")
+                st.markdown("### 🧠 Final Answer:")
+                st.write(data["response"])
+
+            sections.append((
+                st.empty(),
+                "Querying vector database...",
+                lambda: post_query(session, "/rag_query", query),
+                render_rag,
+                "❌ RAG Agent failed"
+            ))
 
         # ❄️ Snowflake Agent Output
         if snowflake_agent_selected:
             st.subheader("❄️ Snowflake Agent Output")
 
-            # 📊 Chart 1: Stress by State
-            with st.spinner("Fetching stress-level data from Snowflake..."):
-                try:
-                    response = requests.get(f"{FASTAPI_URL}/snowflake/stress")
-                    data = response.json()
-                    st.success("✅ Stress Analysis Complete")
-
-                    st.markdown("### 📊 Stress Levels by State")
-                    st.markdown(data["summary"])
-                    st.image(base64.b64decode(data["chart"]), use_container_width=True)
-
-                except Exception as e:
-                    st.error(f"❌ Failed to fetch Stress Chart: {e}")
+            for path, heading, success, label in SNOWFLAKE_CHARTS:
+                def render_chart(data, heading=heading, success=success):
+                    st.success(success)
 
-            # 📊 Chart 2: Job Satisfaction vs Stress
-            with st.spinner("Fetching job satisfaction vs stress data..."):
-                try:
-                    response = requests.get(f"{FASTAPI_URL}/snowflake/job_satisfaction_vs_stress")
-                    data = response.json()
-                    st.success("✅ Job Satisfaction Analysis Complete")
-
-                    st.markdown("### 💼 Job Satisfaction vs 😟 Stress")
+                    st.markdown(heading)
                     st.markdown(data["summary"])
-                    st.image(base64.b64decode(data["chart"]), use_container_width=True)
-
-                except Exception as e:
-                    st.error(f"❌ Failed to fetch Job Satisfaction Chart: {e}")
+                    show_snowflake_chart(data)
 
-            # 📊 Chart 3: Education vs Stress
-            with st.spinner("Fetching education vs stress data..."):
-                try:
-                    response = requests.get(f"{FASTAPI_URL}/snowflake/education_vs_stress")
-                    data = response.json()
-                    st.success("✅ Education Analysis Complete")
-
-                    st.markdown("### 🎓 Education Level vs 😟 Stress")
-                    st.markdown(data["summary"])
-                    st.image(base64.b64decode(data["chart"]), use_container_width=True)
-
-                except Exception as e:
-                    st.error(f"❌ Failed to fetch Education Chart: {e}")
-
-            # 📊 Chart 4: Income vs Stress
-            with st.spinner("Fetching income vs stress data..."):
-                try:
-                    response = requests.get(f"{FASTAPI_URL}/snowflake/income_vs_stress")
-                    data = response.json()
-                    st.success("✅ Income Analysis Complete")
-
-                    st.markdown("### 💰 Income Level vs 😟 Stress")
-                    st.markdown(data["summary"])
-                    st.image(base64.b64decode(data["chart"]), use_container_width=True)
-
-                except Exception as e:
-                    st.error(f"❌ Failed to fetch Income Chart: {e}")
-
-            # 📊 Chart 5: Cognition vs Stress
-            with st.spinner("Fetching cognition vs stress data..."):
-                try:
-                    response = requests.get(f"{FASTAPI_URL}/snowflake/cognition_vs_stress")
-                    data = response.json()
-                    st.success("✅ Cognition Analysis Complete")
-
-                    st.markdown("### 🧠 Need for Cognition vs 😟 Stress")
-                    st.markdown(data["summary"])
-                    st.image(base64.b64decode(data["chart"]), use_container_width=True)
-
-                except Exception as e:
-                    st.error(f"❌ Failed to fetch Cognition Chart: {e}")
-
-            # 📊 Chart 6: Primary Care Visits vs Stress
-            with st.spinner("Fetching primary care vs stress data..."):
-                try:
-                    response = requests.get(f"{FASTAPI_URL}/snowflake/primarycare_vs_stress")
-                    data = response.json()
-                    st.success("✅ Primary Care Analysis Complete")
-
-                    st.markdown("### 🩺 Primary Care Visits vs 😟 Stress")
-                    st.markdown(data["summary"])
-                    st.image(base64.b64decode(data["chart"]), use_container_width=True)
-                except Exception as e:
-                    st.error(f"❌ Failed to fetch Primary Care Chart: {e}")
+                sections.append((
+                    st.empty(),
+                    f"Fetching {label.lower()} data from Snowflake...",
+                    lambda path=path: fetch_snowflake(session, path, client_side_charts),
+                    render_chart,
+                    f"❌ Failed to fetch {label}"
+                ))
 
+        # 🌐 Web Search Agent Output
         if web_agent_selected:
             st.subheader("🌐 Web Search Agent Output")
-            with st.spinner("Searching the web for real-time updates..."):
-                try:
-                    response = requests.post(f"{FASTAPI_URL}/web/search", json={"query": query})
-                    data = response.json()
-                    st.success("✅ Web Search Complete")
-                    st.markdown("### 🌐 Top 10 Relevant Web Sources:")
-                    st.write(data["response"])
-                except Exception as e:
-                    st.error(f"❌ Web Agent failed: {e}")
-
 
+            def render_web(data):
+                st.success("✅ Web Search Complete")
+                st.markdown("### 🌐 Top 10 Relevant Web Sources:")
+                st.write(data["response"])
+
+            sections.append((
+                st.empty(),
+                "Searching the web for real-time updates...",
+                lambda: post_query(session, "/web/search", query),
+                render_web,
+                "❌ Web Agent failed"
+            ))
+
+        for placeholder, pending, _, _, _ in sections:
+            placeholder.info(f"⏳ {pending}")
+
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_REQUESTS) as pool:
+            futures = {pool.submit(fetch): idx for idx, (_, _, fetch, _, _) in enumerate(sections)}
+            for future in as_completed(futures):
+                placeholder, _, _, render, error = sections[futures[future]]
+                with placeholder.container():
+                    try:
+                        render(future.result())
+                    except Exception as e:
+                        st.error(f"{error}: {e}")
@@ -2,9 +2,20 @@ import os
 import io
 import openai
 import boto3
-from pinecone import Pinecone
 from dotenv import load_dotenv
 
+from parsing_chunks.embedder import BatchEmbedder, EMBEDDING_MODEL
+from parsing_chunks.ingest import IngestionRunner, UPSERT_BATCH_SIZE, INGEST_EMBED_BATCH_TOKENS
+from parsing_chunks.manifest import IndexManifest, chunk_id
+from parsing_chunks.rate_limiter import RateLimiter
+from parsing_chunks.markdown_chunker import MarkdownChunker, split_markdown, CHUNK_MAX_TOKENS
+from parsing_chunks.s3_stream import open_s3_lines
+from parsing_chunks.tokenizer import count_tokens
+from agents.rag_agent.embedding_cache import get_embedding_cache
+from agents.rag_agent.vector_store import get_vector_store
+from agents.rag_agent.lexical_index import get_lexical_index
+from agents.rag_agent.chunk_store import get_chunk_store
+
 # 📥 Load environment variables
 load_dotenv()
 
@@ -28,38 +39,23 @@ s3 = boto3.client(
     aws_secret_access_key=AWS_SECRET_ACCESS_KEY
 )
 
-# 📌 Init Pinecone
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(INDEX_NAME)
+# 📌 Vector store: Pinecone, or the in-process index with VECTOR_STORE=local
+store = get_vector_store(INDEX_NAME)
 
-# 📏 Count tokens (rough estimate)
-def token_count(text: str) -> int:
-    return len(text.split())
+# 📚 Chunk bodies live in a local store keyed by chunk ID, not in vector metadata
+chunk_store = get_chunk_store()
 
-# 🔁 Recursive splitter
-def recursive_split(text, max_tokens=300):
-    if token_count(text) <= max_tokens:
-        return [text]
+# 🔤 BM25 index over the same chunk IDs, stored locally for hybrid retrieval
+lexical_index = get_lexical_index()
 
-    for splitter in ["\n\n", "\n", ". "]:
-        parts = text.split(splitter)
-        if len(parts) == 1:
-            continue
+# 📏 Count tokens with the embedding model's tokenizer
+def token_count(text: str) -> int:
+    return count_tokens(text)
 
-        chunks, current = [], ""
-        for part in parts:
-            candidate = (current + splitter + part).strip() if current else part.strip()
-            if token_count(candidate) <= max_tokens:
-                current = candidate
-            else:
-                if current:
-                    chunks.extend(recursive_split(current, max_tokens))
-                current = part.strip()
-        if current:
-            chunks.extend(recursive_split(current, max_tokens))
-        return chunks
-
-    return [text]  # fallback chunk
+# 🔁 Markdown-aware splitter: one linear pass, heading/table aware, with overlap.
+# Kept under its old name so existing callers get the new chunker.
+def recursive_split(text, max_tokens=CHUNK_MAX_TOKENS):
+    return split_markdown(text, max_tokens=max_tokens)
 
 # 📥 Load markdown from S3
 def load_md_from_s3(file_name: str) -> str:
@@ -71,11 +67,20 @@ def load_md_from_s3(file_name: str) -> str:
         print(f"❌ Failed to load {key} from S3:", e)
         return ""
 
+# 🌊 Stream markdown lines from S3 without holding the whole object in memory
+def iter_md_lines_from_s3(file_name: str):
+    key = f"Markdown_Conversions/{file_name}/{file_name}.md"
+    try:
+        return open_s3_lines(s3, AWS_BUCKET, key)
+    except Exception as e:
+        print(f"❌ Failed to open {key} from S3:", e)
+        return None
+
 # 🧠 Get OpenAI embedding
-def get_embedding(text: str) -> list:
+def embed_text(text: str) -> list:
     try:
         response = openai.embeddings.create(
-            model="text-embedding-3-small",
+            model=EMBEDDING_MODEL,
             input=text
         )
         return response.data[0].embedding
@@ -83,42 +88,79 @@ def get_embedding(text: str) -> list:
         print("❌ Error embedding text:", e)
         return []
 
+# 🗃️ Memoized in the embedding cache shared with the query path
+def get_embedding(text: str) -> list:
+    return get_embedding_cache().get_or_embed(EMBEDDING_MODEL, text, embed_text)
+
 # 🔼 Upload to Pinecone
-def upload_chunks_to_pinecone(chunks, file_name):
+def upload_chunks_to_pinecone(chunks, file_name, embedder: BatchEmbedder = None):
+    # Many chunks per embeddings request instead of one round-trip per chunk
+    embedder = embedder or BatchEmbedder(cache=get_embedding_cache())
+    embeddings = embedder.embed(chunks)
+    print(embedder.report())
+    print(get_embedding_cache().report())
+
+    # Text first, so no search can return a vector whose body isn't stored yet
+    entries = [(chunk_id(file_name, chunk), chunk, file_name) for chunk in chunks]
+    chunk_store.add(entries)
+    lexical_index.add(entries)
+
     batch = []
-    for idx, chunk in enumerate(chunks):
-        chunk_id = f"{file_name}_{idx}"
-        embedding = get_embedding(chunk)
+    for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
         if not embedding:
             continue
 
         metadata = {
             "source": file_name,
-            "chunk_index": idx,
-            "text": chunk
+            "chunk_index": idx
         }
 
-        batch.append((chunk_id, embedding, metadata))
+        batch.append((chunk_id(file_name, chunk), embedding, metadata))
 
-        if len(batch) >= 20:
-            index.upsert(vectors=batch)
+        if len(batch) >= UPSERT_BATCH_SIZE:
+            store.upsert(batch)
             print(f"🔼 Uploaded {len(batch)} chunks...")
             batch.clear()
 
     if batch:
-        index.upsert(vectors=batch)
+        store.upsert(batch)
         print(f"🔼 Uploaded final {len(batch)} chunks for {file_name}.")
 
+# 🧹 Vectors written before the manifest existed used positional IDs ("cdc1_0", "cdc1_1", ...)
+def list_legacy_ids(file_name: str) -> list:
+    try:
+        return store.list_ids(f"{file_name}_")
+    except Exception as e:
+        print(f"⚠️ Could not list legacy vectors for {file_name}:", e)
+        return []
+
+# 🚚 Process many files at once: fetch, split, embed and upsert run as overlapping stages.
+# Each document is streamed line by line from S3 into the chunker, so memory stays flat.
+# Only chunks missing from the manifest are embedded; vanished chunks are deleted.
+# Every chunk read also lands in the local chunk-text store and BM25 index.
+def ingest_files(file_names):
+    runner = IngestionRunner(
+        fetch=iter_md_lines_from_s3,
+        split=lambda lines: MarkdownChunker().chunks(lines),
+        upsert=store.upsert,
+        embedder=BatchEmbedder(
+            max_batch_tokens=INGEST_EMBED_BATCH_TOKENS,
+            rate_limiter=RateLimiter(),
+            cache=get_embedding_cache()
+        ),
+        delete=store.delete,
+        manifest=IndexManifest(index_name=INDEX_NAME),
+        legacy_ids=list_legacy_ids,
+        text_stores=[chunk_store, lexical_index]
+    )
+    documents = runner.run(file_names)
+    print(get_embedding_cache().report())
+    return documents
+
 # 🚀 Process a file
 def process_file(file_name: str):
     print(f"\n📄 Processing: {file_name}")
-    markdown = load_md_from_s3(file_name)
-    if not markdown:
-        return
-
-    chunks = recursive_split(markdown)
-    print(f"🧱 Total chunks created: {len(chunks)}")
-    upload_chunks_to_pinecone(chunks, file_name)
+    return ingest_files([file_name])
 
 # 🏁 Main
 if __name__ == "__main__":
@@ -133,5 +175,4 @@ if __name__ == "__main__":
         "additional2"
     ]
 
-    for fname in files_to_process:
-        process_file(fname)
+    ingest_files(files_to_process)
@@ -0,0 +1,213 @@
+"""
+Batched OpenAI embeddings.
+
+Texts are packed into `embeddings.create` requests by token count, results are
+returned in input order, and failed requests are retried with exponential
+backoff; only the inputs missing from a partial response are re-sent. A batch
+the API rejects outright (4xx) is split in half until the offending input is
+isolated, so one bad chunk never costs the rest of its batch.
+"""
+import os
+import time
+import random
+import threading
+
+import openai
+from dotenv import load_dotenv
+
+from parsing_chunks.tokenizer import count_tokens
+
+load_dotenv()
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+
+# 📏 OpenAI limits: 8191 tokens per input, 300k tokens and 2048 inputs per request
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "100000"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "512"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+# Rejections caused by the inputs themselves; splitting the batch isolates the bad one
+INPUT_ERRORS = (
+    openai.BadRequestError,
+    openai.UnprocessableEntityError,
+)
+
+
+def retry_after_seconds(error) -> float:
+    """Server-suggested wait from a Retry-After header, if the error carries one."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class BatchEmbedder:
+    """
+    Safe to share between threads: per-call counters live in `stats` (last call)
+    and are accumulated into `totals()`. With a RateLimiter every request first
+    pays its token cost, and 429s pause all callers instead of each backing off alone.
+    With a cache (agents.rag_agent.embedding_cache.EmbeddingCache) only texts it
+    hasn't seen for this model are sent.
+    """
+
+    def __init__(self, client=None, model: str = EMBEDDING_MODEL, max_batch_tokens: int = EMBED_BATCH_TOKENS,
+                 max_batch_size: int = EMBED_BATCH_SIZE, max_retries: int = EMBED_MAX_RETRIES,
+                 backoff: float = 1.0, max_backoff: float = 30.0, token_counter=count_tokens,
+                 rate_limiter=None, cache=None):
+        # The openai module itself works as a client (and honours OPENAI_BASE_URL)
+        self.client = client or openai
+        self.model = model
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.token_counter = token_counter
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.stats = {}
+        self._totals = {"chunks": 0, "cached": 0, "requests": 0, "retries": 0, "splits": 0, "failed": 0,
+                        "seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def make_batches(self, texts, token_counts=None) -> list:
+        """Group input positions into batches that stay under the token and size limits."""
+        batches, current, current_tokens = [], [], 0
+        for i, text in enumerate(texts):
+            tokens = token_counts[i] if token_counts else self.token_counter(text)
+            if current and (current_tokens + tokens > self.max_batch_tokens or len(current) >= self.max_batch_size):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def embed(self, texts) -> list:
+        """
+        Embed texts in order. Returns one vector per input; inputs that are empty
+        or still fail after retries and splitting get [] (like get_embedding).
+        """
+        texts = list(texts)
+        start = time.perf_counter()
+        stats = {"chunks": len(texts), "cached": 0, "batches": 0, "requests": 0, "retries": 0, "splits": 0,
+                 "failed": 0}
+
+        results = [[] for _ in texts]
+        wanted = [i for i, text in enumerate(texts) if text and text.strip()]
+        stats["failed"] += len(texts) - len(wanted)
+        if self.cache and wanted:
+            cached = self.cache.get_many(self.model, [texts[i] for i in wanted])
+            for i, vector in zip(wanted, cached):
+                if vector is not None:
+                    results[i] = vector
+            stats["cached"] = sum(1 for vector in cached if vector is not None)
+            wanted = [i for i, vector in zip(wanted, cached) if vector is None]
+        tokens = {i: self.token_counter(texts[i]) for i in wanted}
+
+        batches = self.make_batches([texts[i] for i in wanted], [tokens[i] for i in wanted])
+        stats["batches"] = len(batches)
+        for batch in batches:
+            positions = [wanted[j] for j in batch]
+            self._embed_batch(texts, tokens, positions, results, stats)
+        if self.cache:
+            self.cache.put_many(self.model, [(texts[i], results[i]) for i in wanted])
+
+        elapsed = time.perf_counter() - start
+        stats["seconds"] = elapsed
+        stats["chunks_per_second"] = len(texts) / elapsed if elapsed else 0.0
+        self.stats = stats
+        with self._lock:
+            for key in self._totals:
+                self._totals[key] += stats[key]
+        return results
+
+    def totals(self) -> dict:
+        with self._lock:
+            totals = dict(self._totals)
+        return totals
+
+    def report(self, stats: dict = None) -> str:
+        s = stats or self.stats
+        rate = s["chunks"] / s["seconds"] if s["seconds"] else 0.0
+        return (f"🧠 Embedded {s['chunks'] - s['failed']}/{s['chunks']} chunks in {s['seconds']:.2f}s "
+                f"({rate:.1f} chunks/s, {s['cached']} cached, {s['requests']} requests, "
+                f"{s['retries']} retries, {s['splits']} splits, {s['failed']} failed)")
+
+    # ───────────── Requests ─────────────
+
+    def _embed_batch(self, texts, tokens, positions, results, stats):
+        pending, rejected = list(positions), False
+        for attempt in range(self.max_retries + 1):
+            try:
+                vectors = self._request([texts[i] for i in pending], sum(tokens[i] for i in pending), stats)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    break
+                self._backoff(attempt, e, stats)
+                continue
+            except INPUT_ERRORS as e:
+                # 400/422 won't succeed on retry; isolate the bad input instead
+                print(f"❌ Embedding request rejected ({len(pending)} inputs):", e)
+                rejected = True
+                break
+            except openai.APIStatusError as e:
+                # Auth, permission, unknown model: every input would fail the same way
+                print(f"❌ Embedding request failed, dropping batch of {len(pending)} chunk(s):", e)
+                stats["failed"] += len(pending)
+                return
+
+            for i, vector in zip(pending, vectors):
+                if vector is not None:
+                    results[i] = vector
+            pending = [i for i, vector in zip(pending, vectors) if vector is None]
+            if not pending:
+                return
+            # Partial response: retry only the inputs that came back empty
+            stats["retries"] += 1
+
+        if rejected and len(pending) > 1:
+            stats["splits"] += 1
+            mid = len(pending) // 2
+            self._embed_batch(texts, tokens, pending[:mid], results, stats)
+            self._embed_batch(texts, tokens, pending[mid:], results, stats)
+            return
+
+        print(f"❌ Giving up on {len(pending)} chunk(s) after {attempt + 1} attempt(s)")
+        stats["failed"] += len(pending)
+
+    def _request(self, inputs, tokens: int, stats) -> list:
+        if self.rate_limiter:
+            self.rate_limiter.acquire(tokens)
+        stats["requests"] += 1
+        response = self.client.embeddings.create(model=self.model, input=inputs)
+        if self.rate_limiter:
+            self.rate_limiter.on_success()
+        vectors = [None] * len(inputs)
+        # Items carry their input index; don't rely on response order
+        for item in response.data:
+            if 0 <= item.index < len(inputs):
+                vectors[item.index] = item.embedding
+        return vectors
+
+    def _backoff(self, attempt: int, error, stats):
+        stats["retries"] += 1
+        delay = retry_after_seconds(error)
+        if self.rate_limiter and isinstance(error, openai.RateLimitError):
+            # The shared limiter pauses every worker; the next acquire() does the waiting
+            self.rate_limiter.on_rate_limited(delay)
+            return
+        if delay is None:
+            delay = min(self.max_backoff, self.backoff * (2 ** attempt)) * random.uniform(0.5, 1.0)
+        print(f"⏳ Embedding retry {attempt + 1}/{self.max_retries} in {delay:.1f}s: {type(error).__name__}")
+        time.sleep(delay)
@@ -0,0 +1,206 @@
+"""
+Pipelined corpus ingestion: fetch → split → embed → upsert.
+
+Every stage runs on its own worker pool (INGEST_*_WORKERS) joined by bounded
+queues, so S3 downloads, splitting, embedding requests and Pinecone upserts for
+different documents overlap. All embed workers share one BatchEmbedder and one
+RateLimiter, which keeps the whole run inside the provider's RPM/TPM limits and
+slows everyone down together when a 429 comes back.
+
+Runs are incremental: chunks get content-hash IDs and an IndexManifest
+remembers what is already indexed, so only new chunks are embedded/upserted
+and vectors for chunks that disappeared are deleted. An unchanged corpus
+makes no embedding calls.
+
+Documents stream through the stages: split consumes the fetched lines lazily
+and hands embed work units on as they fill up, so a run holds a few batches
+per worker in memory rather than whole documents.
+
+Optional text_stores (the local chunk-text store and BM25 index) are kept in
+step with every chunk the splitter sees, including unchanged ones, so they can
+be built or rebuilt without re-embedding anything. Vectors then carry no chunk
+text in their metadata. Text is written before the chunk's vector is upserted,
+so a search never returns an ID whose body is missing.
+"""
+import os
+import threading
+
+from parsing_chunks.embedder import BatchEmbedder
+from parsing_chunks.manifest import IndexManifest, chunk_id
+from parsing_chunks.pipeline import Pipeline, Stage
+from parsing_chunks.rate_limiter import RateLimiter
+
+INGEST_FETCH_WORKERS = int(os.getenv("INGEST_FETCH_WORKERS", "4"))
+INGEST_SPLIT_WORKERS = int(os.getenv("INGEST_SPLIT_WORKERS", "2"))
+INGEST_EMBED_WORKERS = int(os.getenv("INGEST_EMBED_WORKERS", "4"))
+INGEST_UPSERT_WORKERS = int(os.getenv("INGEST_UPSERT_WORKERS", "4"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "16"))
+# Smaller than one full API batch so a single document still spreads over several embed workers
+INGEST_EMBED_BATCH_TOKENS = int(os.getenv("INGEST_EMBED_BATCH_TOKENS", "20000"))
+UPSERT_BATCH_SIZE = int(os.getenv("PINECONE_UPSERT_BATCH", "20"))
+DELETE_BATCH_SIZE = 1000  # Pinecone's per-request delete limit
+TEXT_STORE_BATCH_SIZE = 500
+
+
+class IngestionRunner:
+    """
+    fetch(file_name) -> markdown text or an iterable of lines, split(lines) ->
+    iterable of chunks, upsert(vectors) and delete(ids) are injected so the same
+    runner drives S3 + Pinecone or local fakes. legacy_ids(file_name), if given,
+    lists vectors a document had before it was tracked by the manifest (e.g. old
+    positional IDs) so they get deleted on its first incremental run.
+    Each of text_stores needs add([(id, text, file_name)]), delete(ids) and
+    ids(file_name); they receive every chunk of every document read.
+    """
+
+    def __init__(self, fetch, split, upsert, embedder: BatchEmbedder = None, delete=None,
+                 manifest: IndexManifest = None, legacy_ids=None, text_stores=(),
+                 fetch_workers: int = INGEST_FETCH_WORKERS, split_workers: int = INGEST_SPLIT_WORKERS,
+                 embed_workers: int = INGEST_EMBED_WORKERS, upsert_workers: int = INGEST_UPSERT_WORKERS,
+                 queue_size: int = INGEST_QUEUE_SIZE, upsert_batch_size: int = UPSERT_BATCH_SIZE):
+        self.fetch = fetch
+        self.split = split
+        self.upsert = upsert
+        self.delete = delete
+        self.manifest = manifest or IndexManifest(path=None)
+        self.legacy_ids = legacy_ids
+        self.text_stores = list(text_stores)
+        self.embedder = embedder or BatchEmbedder(max_batch_tokens=INGEST_EMBED_BATCH_TOKENS,
+                                                  rate_limiter=RateLimiter())
+        self.upsert_batch_size = upsert_batch_size
+        self.pipeline = Pipeline([
+            Stage("fetch", self._fetch, fetch_workers),
+            Stage("split", self._split, split_workers),
+            Stage("embed", self._embed, embed_workers),
+            Stage("upsert", self._upsert, upsert_workers),
+        ], queue_size=queue_size)
+
+        self._lock = threading.Lock()
+        self.documents = {}  # file_name -> {"chunks", "new", "upserted", "deleted"}
+
+    def run(self, file_names) -> dict:
+        try:
+            self.pipeline.run(file_names)
+        finally:
+            self.manifest.save()
+        print(self.pipeline.report())
+        # Embed calls overlap, so report throughput against wall-clock time
+        totals = dict(self.embedder.totals(), seconds=self.pipeline.elapsed)
+        print(self.embedder.report(totals))
+        if self.embedder.rate_limiter:
+            print(f"🚦 Rate limiter: {self.embedder.rate_limiter.stats()}")
+        for name, doc in self.documents.items():
+            print(f"  📄 {name:<20} {doc['chunks']} chunks: {doc['upserted']}/{doc['new']} new upserted, "
+                  f"{doc['deleted']} stale deleted")
+        return self.documents
+
+    # ───────────── Stages ─────────────
+
+    def _fetch(self, file_name):
+        source = self.fetch(file_name)
+        if source:
+            yield file_name, source
+
+    def _split(self, item):
+        """
+        Stream one document's chunks into embed work units as they are produced.
+
+        The fetch result may be a string or an iterable of lines (e.g. a streaming
+        S3 body); only the current work unit and the set of chunk IDs seen so far
+        are held in memory. Stale vectors are deleted once the document has been
+        read to the end.
+        """
+        file_name, source = item
+        lines = source.splitlines() if isinstance(source, str) else source
+        indexed = self.manifest.indexed_ids(file_name, self.embedder.model)
+        first_run = not self.manifest.is_known(file_name)
+        text_known = [text_store.ids(file_name) for text_store in self.text_stores]
+        text_pending = [[] for _ in self.text_stores]
+
+        def flush_text():
+            # Bodies must be stored before their unit can reach the (concurrent) upsert stage
+            for text_store, pending in zip(self.text_stores, text_pending):
+                if pending:
+                    text_store.add(pending)
+                    pending.clear()
+
+        with self._lock:
+            self.documents[file_name] = {"chunks": 0, "new": 0, "upserted": 0, "deleted": 0}
+
+        seen, unit, unit_tokens, chunks, new = set(), [], 0, 0, 0
+        for idx, chunk in enumerate(self.split(lines)):
+            chunks += 1
+            vector_id = chunk_id(file_name, chunk)
+            # Identical chunks share an ID; embed the first occurrence only
+            if vector_id in seen:
+                continue
+            seen.add(vector_id)
+            for text_store, known, pending in zip(self.text_stores, text_known, text_pending):
+                if vector_id not in known:
+                    pending.append((vector_id, chunk, file_name))
+            if any(len(pending) >= TEXT_STORE_BATCH_SIZE for pending in text_pending):
+                flush_text()
+            if vector_id in indexed:
+                continue
+
+            new += 1
+            tokens = self.embedder.token_counter(chunk)
+            if unit and (unit_tokens + tokens > self.embedder.max_batch_tokens
+                         or len(unit) >= self.embedder.max_batch_size):
+                flush_text()
+                yield "embed", file_name, unit
+                unit, unit_tokens = [], 0
+            unit.append((idx, vector_id, chunk))
+            unit_tokens += tokens
+        flush_text()
+        if unit:
+            yield "embed", file_name, unit
+
+        if not chunks:
+            # An empty read is treated as a failed fetch, never as "delete everything"
+            print(f"⚠️ {file_name}: no chunks read, skipping stale-vector cleanup")
+            return
+
+        stale_ids = sorted(self.manifest.known_ids(file_name) - seen)
+        if self.legacy_ids and first_run:
+            stale_ids += [i for i in self.legacy_ids(file_name) if i not in seen]
+        with self._lock:
+            self.documents[file_name].update(chunks=chunks, new=new)
+        print(f"🧱 {file_name}: {chunks} chunks, {new} new, {len(stale_ids)} stale")
+        for text_store, known in zip(self.text_stores, text_known):
+            text_store.delete(sorted(known - seen))
+
+        if stale_ids and self.delete:
+            for start in range(0, len(stale_ids), DELETE_BATCH_SIZE):
+                yield "delete", file_name, stale_ids[start:start + DELETE_BATCH_SIZE]
+
+    def _embed(self, item):
+        op, file_name, payload = item
+        if op != "embed":
+            yield item  # deletes pass straight through to the upsert stage
+            return
+        embeddings = self.embedder.embed([chunk for _, _, chunk in payload])
+        vectors = [
+            (vector_id, embedding, {"source": file_name, "chunk_index": idx})
+            for (idx, vector_id, chunk), embedding in zip(payload, embeddings)
+            if embedding
+        ]
+        for start in range(0, len(vectors), self.upsert_batch_size):
+            yield "upsert", file_name, vectors[start:start + self.upsert_batch_size]
+
+    def _upsert(self, item):
+        op, file_name, payload = item
+        if op == "delete":
+            self.delete(payload)
+            self.manifest.record_deleted(file_name, payload)
+            with self._lock:
+                self.documents[file_name]["deleted"] += len(payload)
+            return
+
+        self.upsert(payload)
+        self.manifest.record_upserted(
+            file_name, [(vector_id, metadata["chunk_index"]) for vector_id, _, metadata in payload],
+            self.embedder.model
+        )
+        with self._lock:
+            self.documents[file_name]["upserted"] += len(payload)
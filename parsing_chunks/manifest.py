@@ -0,0 +1,100 @@
+"""
+Local record of which chunks are already in the vector index.
+
+Chunk IDs are content-addressed (`{file_name}#{sha256(text)[:32]}`), so an edit
+only changes the IDs of the chunks it touches. The manifest maps each document
+to the chunk IDs indexed for it (and the embedding model used), which lets a
+re-run embed only new chunks and delete the ones that disappeared.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+
+INDEX_MANIFEST_PATH = os.getenv("INDEX_MANIFEST_PATH", ".cache/index_manifest.json")
+MANIFEST_VERSION = 1
+
+
+def chunk_id(file_name: str, text: str) -> str:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+    return f"{file_name}#{digest}"
+
+
+class IndexManifest:
+    def __init__(self, path: str = INDEX_MANIFEST_PATH, index_name: str = None):
+        self.path = path
+        self.index_name = index_name
+        self._lock = threading.Lock()
+        self._documents = {}  # file_name -> {"model", "chunks": {id: chunk_index}, "updated_at"}
+        self._load()
+
+    # ───────────── Diffing ─────────────
+
+    def is_known(self, file_name: str) -> bool:
+        with self._lock:
+            return file_name in self._documents
+
+    def indexed_ids(self, file_name: str, model: str) -> set:
+        """IDs already embedded with this model (a model change makes every vector stale)."""
+        with self._lock:
+            doc = self._documents.get(file_name)
+            return set(doc["chunks"]) if doc and doc.get("model") == model else set()
+
+    def known_ids(self, file_name: str) -> set:
+        """Every ID currently recorded for the document, whatever model produced it."""
+        with self._lock:
+            doc = self._documents.get(file_name)
+            return set(doc["chunks"]) if doc else set()
+
+    # ───────────── Updates ─────────────
+
+    def record_upserted(self, file_name: str, entries, model: str):
+        """entries: iterable of (chunk_id, chunk_index)."""
+        with self._lock:
+            doc = self._documents.get(file_name)
+            if doc is None or doc.get("model") != model:
+                doc = self._documents[file_name] = {"model": model, "chunks": {}}
+            doc["chunks"].update(entries)
+            doc["updated_at"] = time.time()
+
+    def record_deleted(self, file_name: str, ids):
+        with self._lock:
+            doc = self._documents.get(file_name)
+            if doc is None:
+                return
+            for i in ids:
+                doc["chunks"].pop(i, None)
+            doc["updated_at"] = time.time()
+
+    def documents(self) -> dict:
+        with self._lock:
+            return {name: len(doc["chunks"]) for name, doc in self._documents.items()}
+
+    # ───────────── Persistence ─────────────
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable manifest {self.path}:", e)
+            return
+        if data.get("version") != MANIFEST_VERSION or data.get("index") != self.index_name:
+            print(f"⚠️ Manifest {self.path} is for another index/version; starting fresh")
+            return
+        self._documents = data.get("documents", {})
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {"version": MANIFEST_VERSION, "index": self.index_name, "documents": self._documents}
+            raw = json.dumps(data, sort_keys=True)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(raw)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,194 @@
+"""
+Streaming, markdown-aware chunker.
+
+Lines are grouped into blocks (headings, paragraphs, tables, fenced code) in a
+single pass; prose is cut into sentence units, each tokenized exactly once with
+the embedding model's tokenizer, and units are packed greedily into chunks of
+at most max_tokens. Work is linear in the document size and chunks are yielded
+as soon as they're full, so the input can be any iterable of lines.
+
+- A heading always starts a new chunk, and chunks that continue a section
+  repeat its heading line for context.
+- Tables and code blocks are never cut mid-row; oversized tables are split by
+  rows with the header row repeated.
+- Consecutive chunks in a section share up to overlap_tokens of trailing prose.
+"""
+import os
+import re
+
+from parsing_chunks.tokenizer import count_tokens, split_by_tokens
+
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+
+_HEADING = re.compile(r"^#{1,6}\s+\S")
+_TABLE_ROW = re.compile(r"^\s*\|")
+_TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{3,}")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=\S)")
+
+
+def iter_blocks(lines):
+    """Group lines into (kind, [lines]) blocks: "heading", "text", "table" or "code"."""
+    kind, block, fence = None, [], None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if fence:
+            block.append(line)
+            if line.strip().startswith(fence) and len(block) > 1:
+                yield "code", block
+                kind, block, fence = None, [], None
+            continue
+
+        fence_match = _FENCE.match(line)
+        if fence_match or not line.strip() or _HEADING.match(line):
+            if block:
+                yield kind, block
+            kind, block = None, []
+            if fence_match:
+                kind, block, fence = "code", [line], fence_match.group(1)
+            elif line.strip():
+                yield "heading", [line]
+            continue
+
+        line_kind = "table" if _TABLE_ROW.match(line) else "text"
+        if block and kind != line_kind:
+            yield kind, block
+            block = []
+        kind = line_kind
+        block.append(line)
+
+    if block:
+        yield kind, block
+
+
+class MarkdownChunker:
+    def __init__(self, max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+                 heading_context: bool = True, token_counter=count_tokens):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.heading_context = heading_context
+        self.count = token_counter
+
+    def chunks(self, lines):
+        """Yield chunk strings for an iterable of markdown lines."""
+        units = []       # (separator, text, tokens, kind) of the chunk being built
+        total = 0        # tokens in units, counting one per separator
+        fresh = False    # units hold content not already emitted in a previous chunk
+        heading = None   # (text, tokens) of the current section's heading
+
+        for kind, block in iter_blocks(lines):
+            if kind == "heading":
+                text = block[0].strip()
+                if fresh and any(unit[3] != "heading" for unit in units):
+                    yield self._join(units)
+                    units, total, fresh = [], 0, False
+                elif not fresh:
+                    units, total = [], 0
+                # Headings with nothing under them yet stay together ("# Report" + "## Intro")
+                tokens = self.count(text)
+                units.append(("\n\n", text, tokens, "heading"))
+                total += tokens + (1 if len(units) > 1 else 0)
+                heading, fresh = (text, tokens), True
+                continue
+
+            reserve = self.overlap_tokens + (heading[1] if heading and self.heading_context else 0)
+            for unit in self._units(kind, block, max(1, self.max_tokens - reserve)):
+                cost = unit[2] + (1 if units else 0)
+                if units and total + cost > self.max_tokens:
+                    if fresh:
+                        yield self._join(units)
+                    units = self._carry_over(units, heading)
+                    total = sum(u[2] for u in units) + max(0, len(units) - 1)
+                    cost = unit[2] + (1 if units else 0)
+                    if units and total + cost > self.max_tokens:
+                        # No room even after trimming: drop the overlap, keep the heading
+                        units = units[:1] if units[0][3] == "heading" else []
+                        total = units[0][2] if units else 0
+                        cost = unit[2] + (1 if units else 0)
+                units.append(unit)
+                total += cost
+                fresh = True
+
+        if fresh:
+            yield self._join(units)
+
+    # ───────────── Units ─────────────
+
+    def _units(self, kind: str, block, limit: int):
+        if kind in ("table", "code"):
+            yield from self._line_group_units(kind, block, limit)
+            return
+
+        for line_number, line in enumerate(block):
+            separator = "\n\n" if line_number == 0 else "\n"
+            for sentence in _SENTENCE_END.split(line.strip()):
+                tokens = self.count(sentence)
+                pieces = [(sentence, tokens)] if tokens <= limit else [
+                    (piece, self.count(piece)) for piece in split_by_tokens(sentence, limit)
+                ]
+                for piece, piece_tokens in pieces:
+                    yield separator, piece, piece_tokens, "text"
+                    separator = " "
+
+    def _line_group_units(self, kind: str, block, limit: int):
+        text = "\n".join(block)
+        tokens = self.count(text)
+        if tokens <= limit:
+            yield "\n\n", text, tokens, kind
+            return
+
+        # Too big for one chunk: split between rows, repeating a table's header rows
+        header = []
+        if kind == "table" and len(block) > 1 and _TABLE_SEPARATOR.match(block[1]):
+            header, block = block[:2], block[2:]
+        header_tokens = self.count("\n".join(header)) + len(header) if header else 0
+
+        rows, rows_tokens = [], header_tokens
+        for line in block:
+            line_tokens = self.count(line) + 1
+            if rows and rows_tokens + line_tokens > limit:
+                yield "\n\n", "\n".join(header + rows), rows_tokens, kind
+                rows, rows_tokens = [], header_tokens
+            if line_tokens > limit:
+                # A single row longer than a chunk: fall back to token windows
+                for piece in split_by_tokens(line, max(1, limit - header_tokens)):
+                    part = "\n".join(header + [piece])
+                    yield "\n\n", part, self.count(part), kind
+                continue
+            rows.append(line)
+            rows_tokens += line_tokens
+        if rows:
+            yield "\n\n", "\n".join(header + rows), rows_tokens, kind
+
+    # ───────────── Chunks ─────────────
+
+    def _carry_over(self, units, heading):
+        """Units that open the next chunk: the section heading plus trailing prose up to overlap_tokens."""
+        carried, carried_tokens = [], 0
+        for unit in reversed(units):
+            if unit[3] != "text" or carried_tokens + unit[2] > self.overlap_tokens:
+                break
+            carried.append(unit)
+            carried_tokens += unit[2]
+        carried.reverse()
+        if carried:
+            # The overlap opens a new paragraph, whatever it was joined by before
+            carried[0] = ("\n\n",) + carried[0][1:]
+        if heading and self.heading_context:
+            carried.insert(0, ("\n\n", heading[0], heading[1], "heading"))
+        return carried
+
+    @staticmethod
+    def _join(units) -> str:
+        parts = [units[0][1]]
+        for separator, text, _, _ in units[1:]:
+            parts.append(separator)
+            parts.append(text)
+        return "".join(parts)
+
+
+def split_markdown(text: str, max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> list:
+    return list(MarkdownChunker(max_tokens, overlap_tokens).chunks(text.splitlines()))
@@ -2,15 +2,19 @@
 
 import os
 import io
-import base64
+import sys
 import logging
 from dotenv import load_dotenv
 from tempfile import NamedTemporaryFile
-from PIL import Image
 from mistralai import Mistral
 from mistralai import DocumentURLChunk
 from mistralai.models import OCRResponse
 import boto3
+from botocore.config import Config
+
+from parsing_chunks.ocr_batch import OCRBatchRunner, OCRJournal, RAW_PDF_PREFIX, OCR_MAX_CONCURRENT
+from parsing_chunks.ocr_images import pages_to_markdown, IMAGE_UPLOAD_WORKERS
+from parsing_chunks.ocr_images import replace_image_references as _replace_image_references
 
 # Load environment variables
 load_dotenv()
@@ -21,40 +25,32 @@ AWS_REGION = os.getenv("AWS_REGION")
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 
-# Init S3 client
+# Init S3 client (thread-safe; one connection per concurrent upload across concurrent documents)
 s3 = boto3.client(
     "s3",
     region_name=AWS_REGION,
     aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+    config=Config(max_pool_connections=max(10, IMAGE_UPLOAD_WORKERS * OCR_MAX_CONCURRENT))
 )
 
 logging.basicConfig(filename="mistral_conversion.log", level=logging.INFO, format="%(message)s")
 
-def upload_to_s3(bucket, key, data_bytes):
+def upload_to_s3(bucket, key, data_bytes, content_type=None):
     """Upload binary data to S3 under the given key"""
-    s3.upload_fileobj(io.BytesIO(data_bytes), bucket, key)
+    extra_args = {"ContentType": content_type} if content_type else None
+    s3.upload_fileobj(io.BytesIO(data_bytes), bucket, key, ExtraArgs=extra_args)
     logging.info(f"✅ Uploaded to s3://{bucket}/{key}")
 
-def replace_image_references(md: str, images: dict, base_path: str) -> str:
-    """Replaces in-markdown image references with public S3 URLs after uploading"""
-    for img_id, img_base64 in images.items():
-        img_data = base64.b64decode(img_base64.split(",")[-1])
-
-        image_filename = f"{img_id}.png"
-        s3_key = f"{base_path}/Images/{image_filename}"
-
-        image = Image.open(io.BytesIO(img_data)).convert("RGB")
-        buffer = io.BytesIO()
-        image.save(buffer, format="PNG")
-        buffer.seek(0)
+def upload_image(key, data_bytes, content_type=None):
+    upload_to_s3(AWS_BUCKET, key, data_bytes, content_type)
 
-        upload_to_s3(AWS_BUCKET, s3_key, buffer.read())
+def public_url(key):
+    return f"https://{AWS_BUCKET}.s3.amazonaws.com/{key}"
 
-        image_url = f"https://{AWS_BUCKET}.s3.amazonaws.com/{s3_key}"
-        md = md.replace(f"![{img_id}]({img_id})", f"![{image_filename}]({image_url})")
-
-    return md
+def replace_image_references(md: str, images: dict, base_path: str) -> str:
+    """Replaces in-markdown image references with public S3 URLs after uploading"""
+    return _replace_image_references(md, images, base_path, upload_image, public_url)
 
 def mistral_pdf_to_md(pdf_bytes: bytes, file_name: str):
     """Run Mistral OCR on PDF bytes and upload Markdown + images to S3"""
@@ -80,22 +76,16 @@ def mistral_pdf_to_md(pdf_bytes: bytes, file_name: str):
         raise e
 
     base_path = f"Markdown_Conversions/{file_name}"
-    full_markdown = ""
-    image_counter = 0
-
-    for page in result.pages:
-        images = {img.id: img.image_base64 for img in page.images}
-        md_with_links = replace_image_references(page.markdown, images, base_path)
-        full_markdown += md_with_links + "\n\n"
-        image_counter += len(images)
+    # 🖼️ Images are encoded and uploaded concurrently; pages come back in order
+    full_markdown, image_counter = pages_to_markdown(result.pages, base_path, upload_image, public_url)
 
     md_key = f"{base_path}/{file_name}.md"
-    upload_to_s3(AWS_BUCKET, md_key, full_markdown.encode("utf-8"))
+    upload_to_s3(AWS_BUCKET, md_key, full_markdown.encode("utf-8"), "text/markdown; charset=utf-8")
 
     return {
         "markdown_s3_path": md_key,
         "images_uploaded": image_counter,
-        "preview_url": f"https://{AWS_BUCKET}.s3.amazonaws.com/{md_key}"
+        "preview_url": public_url(md_key)
     }
 
 def process_pdf_from_s3(file_name: str):
@@ -117,19 +107,20 @@ def process_pdf_from_s3(file_name: str):
     print(f"📝 Markdown URL: {result['preview_url']}")
     print(f"🖼️ Images uploaded: {result['images_uploaded']}")
 
+# 📚 Batch OCR over Raw_Pdfs/: concurrent, resumable, skips unchanged PDFs
+def run_batch(keys=None):
+    runner = OCRBatchRunner(
+        client=Mistral(api_key=MISTRAL_API_KEY),
+        s3=s3,
+        bucket=AWS_BUCKET,
+        upload=upload_image,
+        public_url=public_url,
+        journal=OCRJournal()
+    )
+    return runner.run(keys)
+
 if __name__ == "__main__":
-    # List your Raw_Pdfs filenames here (or fetch dynamically)
-    pdf_files = [
-        "cdc1.pdf",
-        "cdc2.pdf",
-        "sdoh_strategies1.pdf",
-        "sdoh_strategies2.pdf",
-        "who1.pdf",
-        "additional.pdf",
-        "who2.pdf",
-        "additional2.pdf"
-    ]
-
-    for pdf in pdf_files:
-        print(f"\n📄 Processing file: {pdf}")
-        process_pdf_from_s3(pdf)
+    # Optional file names restrict the run, e.g. `python -m parsing_chunks.mistral_parser cdc1.pdf who1.pdf`;
+    # by default every PDF under Raw_Pdfs/ is discovered
+    pdf_files = sys.argv[1:]
+    run_batch([f"{RAW_PDF_PREFIX}{pdf}" for pdf in pdf_files] if pdf_files else None)
@@ -0,0 +1,243 @@
+"""
+Resumable batch OCR over every PDF under Raw_Pdfs/.
+
+Each document moves through three steps, each recorded in a local JSON journal
+as soon as it completes:
+
+    uploaded  - the PDF was uploaded to Mistral (file_id saved)
+    ocr       - ocr.process finished; its pages are cached under OCR_CACHE_DIR
+    markdown  - images and markdown were written to S3
+
+A rerun resumes each document from its last completed step. Documents whose
+source is unchanged since their markdown was written are skipped: the S3 ETag
+from the listing is checked first, and when it differs the PDF's sha256
+decides, so a re-upload of identical bytes costs one download and no OCR.
+
+Up to OCR_MAX_CONCURRENT documents are processed at once. The Mistral client,
+S3 client and upload/public_url helpers are injected, so the runner works
+against stubs as well as the real services.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from parsing_chunks.ocr_images import pages_to_markdown
+
+RAW_PDF_PREFIX = "Raw_Pdfs/"
+OCR_MODEL = os.getenv("MISTRAL_OCR_MODEL", "mistral-ocr-latest")
+OCR_MAX_CONCURRENT = int(os.getenv("OCR_MAX_CONCURRENT", "3"))
+OCR_JOURNAL_PATH = os.getenv("OCR_JOURNAL_PATH", ".cache/ocr_journal.json")
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", ".cache/ocr")
+JOURNAL_VERSION = 1
+
+
+class OCRJournal:
+    def __init__(self, path: str = OCR_JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._documents = {}  # pdf key -> {"etag", "sha256", "step", "file_id", "markdown_key", ...}
+        self._load()
+
+    def get(self, key: str) -> dict:
+        with self._lock:
+            return dict(self._documents.get(key, {}))
+
+    def update(self, key: str, **fields):
+        """Merge fields into the document's entry and persist immediately."""
+        with self._lock:
+            entry = self._documents.setdefault(key, {})
+            entry.update(fields, updated_at=time.time())
+        self.save()
+
+    def reset(self, key: str, **fields):
+        with self._lock:
+            self._documents[key] = dict(fields, updated_at=time.time())
+        self.save()
+
+    def documents(self) -> dict:
+        with self._lock:
+            return {key: dict(entry) for key, entry in self._documents.items()}
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable OCR journal {self.path}:", e)
+            return
+        if data.get("version") == JOURNAL_VERSION:
+            self._documents = data.get("documents", {})
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            raw = json.dumps({"version": JOURNAL_VERSION, "documents": self._documents}, sort_keys=True)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(raw)
+            os.replace(tmp_path, self.path)
+
+
+def list_pdfs(s3, bucket: str, prefix: str = RAW_PDF_PREFIX) -> list:
+    """[(key, etag)] for every .pdf under the prefix."""
+    pdfs = []
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            if obj["Key"].lower().endswith(".pdf"):
+                pdfs.append((obj["Key"], obj.get("ETag", "").strip('"')))
+    return pdfs
+
+
+class OCRBatchRunner:
+    def __init__(self, client, s3, bucket: str, upload, public_url, journal: OCRJournal = None,
+                 max_concurrent: int = OCR_MAX_CONCURRENT, cache_dir: str = OCR_CACHE_DIR,
+                 model: str = OCR_MODEL, prefix: str = RAW_PDF_PREFIX):
+        self.client = client
+        self.s3 = s3
+        self.bucket = bucket
+        self.upload = upload
+        self.public_url = public_url
+        self.journal = journal or OCRJournal(path=None)
+        self.max_concurrent = max(1, max_concurrent)
+        self.cache_dir = cache_dir
+        self.model = model
+        self.prefix = prefix
+
+    def run(self, keys=None) -> dict:
+        """
+        Process the given Raw_Pdfs/ keys (default: everything under the prefix).
+        Returns {key: "skipped" | "done" | "failed"}.
+        """
+        listing = list_pdfs(self.s3, self.bucket, self.prefix)
+        if keys is not None:
+            wanted = set(keys)
+            listing = [(key, etag) for key, etag in listing if key in wanted]
+        print(f"📚 {len(listing)} PDF(s) under s3://{self.bucket}/{self.prefix}, "
+              f"up to {self.max_concurrent} at a time")
+
+        start = time.perf_counter()
+        outcomes = {}
+        with ThreadPoolExecutor(self.max_concurrent, thread_name_prefix="ocr") as pool:
+            futures = {pool.submit(self.process, key, etag): key for key, etag in listing}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    outcomes[key] = future.result()
+                except Exception as e:
+                    print(f"❌ {key}: {e}")
+                    self.journal.update(key, error=str(e))
+                    outcomes[key] = "failed"
+
+        counts = {status: sum(1 for s in outcomes.values() if s == status)
+                  for status in ("done", "skipped", "failed")}
+        print(f"🏁 OCR batch finished in {time.perf_counter() - start:.1f}s: {counts}")
+        return outcomes
+
+    # ───────────── One document ─────────────
+
+    def process(self, key: str, etag: str = "") -> str:
+        entry = self.journal.get(key)
+        if entry.get("step") == "markdown" and etag and entry.get("etag") == etag:
+            print(f"⏭️ {key}: unchanged (etag), skipping")
+            return "skipped"
+
+        pdf_bytes = self.s3.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+        sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+        if entry.get("sha256") != sha256:
+            # New or changed source: earlier progress belongs to other bytes
+            entry = {}
+            self.journal.reset(key, etag=etag, sha256=sha256)
+        elif entry.get("step") == "markdown":
+            print(f"⏭️ {key}: unchanged (sha256), skipping")
+            self.journal.update(key, etag=etag)
+            return "skipped"
+
+        name = os.path.splitext(os.path.basename(key))[0]
+        step = entry.get("step")
+
+        resumed = step is not None
+        if resumed:
+            print(f"↩️ {key}: resuming after step '{step}'")
+        else:
+            entry["file_id"], step = self._upload_pdf(key, name, pdf_bytes), "uploaded"
+
+        pages = self._load_pages(sha256) if step == "ocr" else None
+        if pages is None:
+            try:
+                signed_url = self.client.files.get_signed_url(file_id=entry["file_id"], expiry=2)
+            except Exception as e:
+                if not resumed:
+                    raise
+                # The file uploaded by an earlier run may have expired: upload it again
+                print(f"⚠️ {key}: saved file_id unusable ({e}), re-uploading")
+                entry["file_id"] = self._upload_pdf(key, name, pdf_bytes)
+                signed_url = self.client.files.get_signed_url(file_id=entry["file_id"], expiry=2)
+            result = self.client.ocr.process(
+                document={"type": "document_url", "document_url": signed_url.url},
+                model=self.model,
+                include_image_base64=True
+            )
+            pages = [SimpleNamespace(markdown=page.markdown,
+                                     images=[SimpleNamespace(id=img.id, image_base64=img.image_base64)
+                                             for img in page.images])
+                     for page in result.pages]
+            self._save_pages(sha256, pages)
+            self.journal.update(key, step="ocr", pages=len(pages))
+            print(f"✅ {key}: OCR finished ({len(pages)} pages)")
+
+        base_path = f"Markdown_Conversions/{name}"
+        markdown, images = pages_to_markdown(pages, base_path, self.upload, self.public_url)
+        md_key = f"{base_path}/{name}.md"
+        self.upload(md_key, markdown.encode("utf-8"), "text/markdown; charset=utf-8")
+        self.journal.update(key, step="markdown", markdown_key=md_key, images=images)
+        self._drop_pages(sha256)
+        print(f"📝 {key}: markdown written to {self.public_url(md_key)} ({images} images)")
+        return "done"
+
+    def _upload_pdf(self, key: str, name: str, pdf_bytes: bytes) -> str:
+        uploaded = self.client.files.upload(file={"file_name": f"{name}.pdf", "content": pdf_bytes},
+                                            purpose="ocr")
+        self.journal.update(key, step="uploaded", file_id=uploaded.id, error=None)
+        print(f"🔁 {key}: uploaded to Mistral (file_id={uploaded.id})")
+        return uploaded.id
+
+    # ───────────── OCR result cache ─────────────
+
+    def _pages_path(self, sha256: str):
+        return os.path.join(self.cache_dir, f"{sha256}.json") if self.cache_dir else None
+
+    def _save_pages(self, sha256: str, pages):
+        path = self._pages_path(sha256)
+        if not path:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data = [{"markdown": page.markdown,
+                 "images": [{"id": img.id, "image_base64": img.image_base64} for img in page.images]}
+                for page in pages]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _load_pages(self, sha256: str):
+        path = self._pages_path(sha256)
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return [SimpleNamespace(markdown=page["markdown"],
+                                images=[SimpleNamespace(**img) for img in page["images"]])
+                for page in data]
+
+    def _drop_pages(self, sha256: str):
+        path = self._pages_path(sha256)
+        if path and os.path.exists(path):
+            os.remove(path)
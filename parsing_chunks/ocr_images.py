@@ -0,0 +1,126 @@
+"""
+Concurrent handling of the images in a Mistral OCR result.
+
+Decoding (and transcoding, when needed) is CPU-bound and runs on one thread
+pool; uploads are network-bound and run on another, so an image starts
+uploading as soon as it is ready while other pages are still being decoded.
+PNG and JPEG bytes, what Mistral normally returns, are uploaded exactly as
+received; only other formats are re-encoded to PNG. Pages are stitched back
+together in their original order once their own uploads have finished, with
+each page's image references rewritten in one regex pass.
+
+upload(key, data, content_type) and public_url(key) are injected, which keeps
+this module free of the Mistral SDK and lets the same code run against S3 or
+a stand-in.
+"""
+import io
+import os
+import re
+import base64
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+IMAGE_ENCODE_WORKERS = int(os.getenv("MISTRAL_IMAGE_WORKERS", str(min(8, os.cpu_count() or 1))))
+IMAGE_UPLOAD_WORKERS = int(os.getenv("MISTRAL_UPLOAD_WORKERS", "16"))
+
+# Formats uploaded as-is, keyed by magic bytes: (file extension, content type)
+PASSTHROUGH_FORMATS = {
+    b"\x89PNG\r\n\x1a\n": ("png", "image/png"),
+    b"\xff\xd8\xff": ("jpg", "image/jpeg"),
+}
+
+_IMAGE_REFERENCE = re.compile(r"!\[([^\]\n]*)\]\(([^)\s]+)\)")
+
+
+def encode_png(img_data: bytes) -> bytes:
+    """Re-encode image bytes of any format PIL can read as PNG."""
+    image = Image.open(io.BytesIO(img_data)).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def prepare_image(img_base64: str) -> tuple:
+    """
+    Decode a base64 (or data URI) image from Mistral. Returns
+    (data, extension, content_type); PNG and JPEG bytes pass through untouched.
+    """
+    img_data = base64.b64decode(img_base64.split(",")[-1])
+    for magic, (extension, content_type) in PASSTHROUGH_FORMATS.items():
+        if img_data.startswith(magic):
+            return img_data, extension, content_type
+    return encode_png(img_data), "png", "image/png"
+
+
+def start_image_uploads(images: dict, base_path: str, upload, public_url, encode_pool, upload_pool) -> dict:
+    """
+    Queue every image for decoding; each encode worker hands its bytes to the
+    upload pool as soon as they are ready. upload is called as
+    upload(key, data, content_type). Returns
+    {img_id: future of (filename, url, upload future)}.
+    """
+    def encode_and_queue(img_id, img_base64):
+        data, extension, content_type = prepare_image(img_base64)
+        image_filename = f"{img_id}.{extension}"
+        key = f"{base_path}/Images/{image_filename}"
+        uploaded = upload_pool.submit(upload, key, data, content_type)
+        return image_filename, public_url(key), uploaded
+
+    return {img_id: encode_pool.submit(encode_and_queue, img_id, img_base64)
+            for img_id, img_base64 in images.items()}
+
+
+def link_images(md: str, pending: dict) -> str:
+    """Wait for a page's uploads and point its image references at the uploaded URLs."""
+    links = {}
+    for img_id, encoded in pending.items():
+        image_filename, image_url, uploaded = encoded.result()
+        uploaded.result()  # re-raises a failed upload
+        links[img_id] = f"![{image_filename}]({image_url})"
+    if not links:
+        return md
+
+    def substitute(match):
+        img_id = match.group(2)
+        # Mistral writes references as ![id](id); leave anything else alone
+        if match.group(1) == img_id and img_id in links:
+            return links[img_id]
+        return match.group(0)
+
+    return _IMAGE_REFERENCE.sub(substitute, md)
+
+
+def replace_image_references(md: str, images: dict, base_path: str, upload, public_url,
+                             encode_workers: int = IMAGE_ENCODE_WORKERS,
+                             upload_workers: int = IMAGE_UPLOAD_WORKERS) -> str:
+    """Upload one page's images concurrently and rewrite its references."""
+    with ThreadPoolExecutor(encode_workers) as encode_pool, ThreadPoolExecutor(upload_workers) as upload_pool:
+        return link_images(md, start_image_uploads(images, base_path, upload, public_url,
+                                                   encode_pool, upload_pool))
+
+
+def pages_to_markdown(pages, base_path: str, upload, public_url,
+                      encode_workers: int = IMAGE_ENCODE_WORKERS,
+                      upload_workers: int = IMAGE_UPLOAD_WORKERS):
+    """
+    Upload the images of every page concurrently, then reassemble the pages in
+    order. Returns (markdown, images_uploaded).
+    """
+    with ThreadPoolExecutor(encode_workers, thread_name_prefix="encode") as encode_pool, \
+            ThreadPoolExecutor(upload_workers, thread_name_prefix="upload") as upload_pool:
+        # Submit the whole document first so later pages upload while earlier ones are linked
+        pending = [
+            (page.markdown, start_image_uploads({img.id: img.image_base64 for img in page.images},
+                                                base_path, upload, public_url, encode_pool, upload_pool))
+            for page in pages
+        ]
+
+        parts = []
+        image_counter = 0
+        for md, page_images in pending:
+            parts.append(link_images(md, page_images))
+            parts.append("\n\n")
+            image_counter += len(page_images)
+
+    return "".join(parts), image_counter
@@ -1,6 +1,14 @@
 import boto3
 import os
 import sys
+import glob
+import time
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 
 # Load AWS credentials from .env file
@@ -9,41 +17,142 @@ load_dotenv()
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_REGION = os.getenv("AWS_REGION")
+# Point at MinIO/moto/localstack for local runs, e.g. http://localhost:9000
+AWS_ENDPOINT_URL = os.getenv("AWS_ENDPOINT_URL") or None
 BUCKET_NAME = os.getenv("AWS_BUCKET_NAME")
 RAW_PDF_PREFIX = "Raw_Pdfs/"
 
-# Initialize the S3 client
+# 🚚 Bulk upload tuning: files in flight, and multipart parts in flight per file
+PDF_UPLOAD_WORKERS = int(os.getenv("PDF_UPLOAD_WORKERS", "8"))
+MB = 1024 * 1024
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "16")) * MB,
+    multipart_chunksize=int(os.getenv("S3_MULTIPART_CHUNK_MB", "16")) * MB,
+    max_concurrency=int(os.getenv("S3_MULTIPART_CONCURRENCY", "4")),
+    use_threads=True,
+)
+
+# Initialize the S3 client (shared by all upload threads)
 s3_client = boto3.client(
     "s3",
     aws_access_key_id=AWS_ACCESS_KEY_ID,
     aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
     region_name=AWS_REGION,
+    endpoint_url=AWS_ENDPOINT_URL,
+    config=Config(max_pool_connections=max(10, PDF_UPLOAD_WORKERS * TRANSFER_CONFIG.max_concurrency)),
 )
 
-def upload_pdf_to_s3(file_path):
-    """Uploads a single PDF file to the Raw_Pdfs/ folder in the S3 bucket."""
+def expand_inputs(inputs) -> list:
+    """Resolve files, directories (searched recursively) and glob patterns to a de-duplicated PDF list."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(glob.glob(os.path.join(item, "**", "*"), recursive=True))
+        elif glob.has_magic(item):
+            matches = sorted(glob.glob(item, recursive=True))
+        else:
+            matches = [item]
+        paths.extend(m for m in matches if not os.path.isdir(m))
+
+    seen, unique = set(), []
+    for path in paths:
+        real = os.path.realpath(path)
+        if real not in seen:
+            seen.add(real)
+            unique.append(path)
+    return unique
+
+def file_sha256(file_path, block_size=MB) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def is_up_to_date(client, s3_key, size, sha256) -> bool:
+    """True if the object exists with the same size and sha256 metadata."""
+    try:
+        head = client.head_object(Bucket=BUCKET_NAME, Key=s3_key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+    return head.get("ContentLength") == size and head.get("Metadata", {}).get("sha256") == sha256
+
+def upload_pdf_to_s3(file_path, client=None):
+    """Uploads a single PDF file to the Raw_Pdfs/ folder in the S3 bucket.
+
+    Returns (status, bytes_sent) with status "uploaded", "skipped" or "failed".
+    """
+    client = client or s3_client
     if not os.path.exists(file_path):
         print(f"❌ File not found: {file_path}")
-        return
+        return "failed", 0
 
     if not file_path.lower().endswith(".pdf"):
         print(f"❌ Skipped (not a PDF): {file_path}")
-        return
+        return "failed", 0
 
     file_name = os.path.basename(file_path)
     s3_key = f"{RAW_PDF_PREFIX}{file_name}"
 
     try:
-        s3_client.upload_file(file_path, BUCKET_NAME, s3_key)
+        size = os.path.getsize(file_path)
+        sha256 = file_sha256(file_path)
+        if is_up_to_date(client, s3_key, size, sha256):
+            print(f"⏭️ Unchanged: {file_path} (s3://{BUCKET_NAME}/{s3_key})")
+            return "skipped", 0
+
+        client.upload_file(
+            file_path, BUCKET_NAME, s3_key,
+            ExtraArgs={"Metadata": {"sha256": sha256}, "ContentType": "application/pdf"},
+            Config=TRANSFER_CONFIG,
+        )
         print(f"✅ Uploaded: {file_path} → s3://{BUCKET_NAME}/{s3_key}")
+        return "uploaded", size
     except Exception as e:
         print(f"❌ Failed to upload {file_path}: {e}")
+        return "failed", 0
+
+def bulk_upload(inputs, workers=PDF_UPLOAD_WORKERS, client=None) -> dict:
+    """Upload every PDF matched by inputs concurrently and print aggregate throughput."""
+    paths = expand_inputs(inputs)
+    pdfs, by_name = [], {}
+    for path in paths:
+        if not path.lower().endswith(".pdf"):
+            continue
+        name = os.path.basename(path)
+        if name in by_name:
+            # Both would land on the same Raw_Pdfs/ key
+            print(f"⚠️ Skipped {path}: same file name as {by_name[name]}")
+            continue
+        by_name[name] = path
+        pdfs.append(path)
+    print(f"📦 {len(pdfs)} PDF(s) to sync to s3://{BUCKET_NAME}/{RAW_PDF_PREFIX} with {workers} workers")
+
+    counts = {"uploaded": 0, "skipped": 0, "failed": 0}
+    sent = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max(1, workers), thread_name_prefix="pdf-upload") as pool:
+        futures = [pool.submit(upload_pdf_to_s3, path, client) for path in pdfs]
+        for future in as_completed(futures):
+            status, size = future.result()
+            counts[status] += 1
+            sent += size
+    elapsed = time.perf_counter() - start
+
+    throughput = sent / MB / elapsed if elapsed else 0.0
+    print(f"🏁 {counts['uploaded']} uploaded, {counts['skipped']} unchanged, {counts['failed']} failed: "
+          f"{sent / MB:.1f} MB in {elapsed:.2f}s ({throughput:.1f} MB/s)")
+    return dict(counts, bytes=sent, seconds=elapsed)
 
 if __name__ == "__main__":
-    # Get file path from user input
-    if len(sys.argv) != 2:
-        print("Usage: python pdf_to_s3.py <path_to_pdf>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Upload PDFs to the Raw_Pdfs/ folder in S3; unchanged files are skipped."
+    )
+    parser.add_argument("paths", nargs="+", help="PDF files, directories or glob patterns (quote globs)")
+    parser.add_argument("--workers", type=int, default=PDF_UPLOAD_WORKERS, help="files uploaded concurrently")
+    args = parser.parse_args()
 
-    pdf_path = sys.argv[1]
-    upload_pdf_to_s3(pdf_path)
+    result = bulk_upload(args.paths, workers=args.workers)
+    sys.exit(1 if result["failed"] else 0)
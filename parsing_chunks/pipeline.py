@@ -0,0 +1,100 @@
+"""
+Staged, threaded pipeline: each stage has its own worker pool and hands work
+to the next stage through a bounded queue, so a slow stage applies
+backpressure instead of letting work pile up in memory.
+
+A stage function takes one item and returns an iterable of items for the next
+stage (or None); generators stream, each output is queued as soon as it is
+yielded. Exceptions are logged and counted per stage; the rest of that item's
+outputs are dropped and the run continues.
+"""
+import time
+import queue
+import threading
+
+_DONE = object()
+
+
+class Stage:
+    def __init__(self, name: str, func, workers: int = 1):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.stats = {"in": 0, "out": 0, "errors": 0, "busy": 0.0}
+        self.lock = threading.Lock()
+
+
+class Pipeline:
+    def __init__(self, stages, queue_size: int = 16):
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.elapsed = 0.0
+
+    def run(self, items) -> dict:
+        """Push items through every stage; returns per-stage stats once everything has drained."""
+        start = time.perf_counter()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        queues.append(None)  # the last stage's output is discarded
+
+        threads = []
+        for i, stage in enumerate(self.stages):
+            stage_threads = [
+                threading.Thread(target=self._worker, args=(stage, queues[i], queues[i + 1]),
+                                 name=f"{stage.name}-{n}", daemon=True)
+                for n in range(stage.workers)
+            ]
+            for thread in stage_threads:
+                thread.start()
+            threads.append(stage_threads)
+
+        for item in items:
+            queues[0].put(item)
+
+        # Close stages front to back: once a stage's workers exit, nothing more reaches the next one
+        for i, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                queues[i].put(_DONE)
+            for thread in threads[i]:
+                thread.join()
+
+        self.elapsed = time.perf_counter() - start
+        return self.stats()
+
+    def stats(self) -> dict:
+        return {stage.name: dict(stage.stats, workers=stage.workers) for stage in self.stages}
+
+    def report(self) -> str:
+        lines = [f"⏱️ Pipeline finished in {self.elapsed:.2f}s"]
+        for name, s in self.stats().items():
+            utilization = s["busy"] / (self.elapsed * s["workers"]) if self.elapsed else 0.0
+            lines.append(f"  {name:<8} workers={s['workers']:<2} in={s['in']:<6} out={s['out']:<6} "
+                         f"errors={s['errors']:<3} busy={utilization:5.1%}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _worker(stage: Stage, inbox: queue.Queue, outbox):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                return
+            busy, produced, error = 0.0, 0, False
+            started = time.perf_counter()
+            try:
+                # Outputs are handed on as they are produced, so a generator stage
+                # streams through the pipeline instead of materializing its results
+                for output in stage.func(item) or ():
+                    busy += time.perf_counter() - started
+                    produced += 1
+                    if outbox is not None:
+                        outbox.put(output)
+                    started = time.perf_counter()
+                busy += time.perf_counter() - started
+            except Exception as e:
+                print(f"❌ [{stage.name}] failed:", e)
+                busy += time.perf_counter() - started
+                error = True
+            with stage.lock:
+                stage.stats["in"] += 1
+                stage.stats["out"] += produced
+                stage.stats["errors"] += error
+                stage.stats["busy"] += busy
@@ -0,0 +1,100 @@
+import os
+import time
+import threading
+
+# 🚦 Provider limits for the embedding model (OpenAI tier 1 for text-embedding-3-small)
+OPENAI_RPM = float(os.getenv("OPENAI_RPM", "3000"))
+OPENAI_TPM = float(os.getenv("OPENAI_TPM", "1000000"))
+
+# Buckets hold this many seconds of budget, so bursts stay well inside a minute window
+BURST_SECONDS = float(os.getenv("RATE_LIMIT_BURST_SECONDS", "6"))
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter for requests-per-minute and tokens-per-minute, shared by
+    every thread that calls the API.
+
+    acquire(tokens) blocks until both buckets can pay for one request. On a 429
+    the limiter pauses all callers (Retry-After, or an escalating backoff) and
+    halves its effective rate; each success then recovers a little of it
+    (additive increase / multiplicative decrease).
+    """
+
+    def __init__(self, rpm: float = OPENAI_RPM, tpm: float = OPENAI_TPM, burst_seconds: float = BURST_SECONDS,
+                 min_rate_factor: float = 0.05, recovery_step: float = 0.02, base_backoff: float = 1.0,
+                 max_backoff: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.burst_seconds = burst_seconds
+        self.min_rate_factor = min_rate_factor
+        self.recovery_step = recovery_step
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._rate_factor = 1.0
+        self._paused_until = 0.0
+        self._consecutive_limits = 0
+        self._updated = time.monotonic()
+        self._requests = self._capacity(rpm)
+        self._tokens = self._capacity(tpm)
+        self._stats = {"acquired": 0, "tokens": 0, "rate_limited": 0, "wait_time": 0.0}
+
+    def _capacity(self, per_minute: float) -> float:
+        return max(1.0, per_minute * self.burst_seconds / 60.0)
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        factor = self._rate_factor / 60.0
+        self._requests = min(self._capacity(self.rpm), self._requests + elapsed * self.rpm * factor)
+        self._tokens = min(self._capacity(self.tpm), self._tokens + elapsed * self.tpm * factor)
+
+    def acquire(self, tokens: int = 0):
+        """Block until one request costing `tokens` fits in both budgets."""
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                # A request bigger than the bucket is let through once the bucket is full
+                need_tokens = min(tokens, self._capacity(self.tpm))
+                wait = self._paused_until - now
+                if wait <= 0:
+                    factor = self._rate_factor / 60.0
+                    wait = max(
+                        (1 - self._requests) / (self.rpm * factor),
+                        (need_tokens - self._tokens) / (self.tpm * factor),
+                    )
+                if wait <= 0:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    self._stats["acquired"] += 1
+                    self._stats["tokens"] += tokens
+                    self._stats["wait_time"] += now - start
+                    return
+            time.sleep(min(wait, 1.0))
+
+    def on_rate_limited(self, retry_after: float = None):
+        """Record a 429: pause everyone and cut the sending rate."""
+        with self._lock:
+            self._stats["rate_limited"] += 1
+            self._consecutive_limits += 1
+            if retry_after is None:
+                retry_after = min(self.max_backoff, self.base_backoff * 2 ** (self._consecutive_limits - 1))
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._rate_factor = max(self.min_rate_factor, self._rate_factor / 2)
+
+    def on_success(self):
+        with self._lock:
+            self._consecutive_limits = 0
+            self._rate_factor = min(1.0, self._rate_factor + self.recovery_step)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["rate_factor"] = self._rate_factor
+        stats["rpm"] = self.rpm
+        stats["tpm"] = self.tpm
+        return stats
@@ -0,0 +1,52 @@
+import os
+import codecs
+
+S3_READ_CHUNK_SIZE = int(os.getenv("S3_READ_CHUNK_SIZE", str(1024 * 1024)))
+
+
+def iter_text_lines(byte_chunks, encoding: str = "utf-8"):
+    """
+    Decode an iterable of byte chunks into lines (without newlines).
+
+    An incremental decoder handles multi-byte characters split across chunks,
+    and a line spanning many chunks is collected as a list of parts, so memory
+    is bounded by the longest line rather than the whole body.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    parts = []
+    for block in byte_chunks:
+        text = decoder.decode(block)
+        if not text:
+            continue
+        lines = text.split("\n")
+        if len(lines) == 1:
+            parts.append(text)
+            continue
+        parts.append(lines[0])
+        yield "".join(parts)
+        yield from lines[1:-1]
+        parts = [lines[-1]]
+
+    parts.append(decoder.decode(b"", final=True))
+    tail = "".join(parts)
+    if tail:
+        yield tail
+
+
+def open_s3_lines(s3, bucket: str, key: str, chunk_size: int = S3_READ_CHUNK_SIZE):
+    """
+    Start a GetObject and return an iterator over the body's lines.
+
+    The request is made eagerly, so a missing key or auth error raises here;
+    the body itself is only read as the iterator is consumed.
+    """
+    response = s3.get_object(Bucket=bucket, Key=key)
+    body = response["Body"]
+
+    def lines():
+        try:
+            yield from iter_text_lines(body.iter_chunks(chunk_size))
+        finally:
+            body.close()
+
+    return lines()
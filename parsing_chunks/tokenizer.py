@@ -0,0 +1,82 @@
+import re
+import math
+import threading
+
+# 🔤 text-embedding-3-* and gpt-4o-mini context budgets are measured in cl100k_base tokens
+ENCODING_NAME = "cl100k_base"
+
+# Rough BPE stand-in: one token per word / punctuation mark, at least one per 4 chars
+_ROUGH_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+_encoding_lock = threading.Lock()
+_encoding = None
+_encoding_loaded = False
+
+
+def get_encoding():
+    """The tiktoken encoding, or None when tiktoken / its BPE file is unavailable (e.g. offline)."""
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+    with _encoding_lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(ENCODING_NAME)
+            except Exception as e:
+                print(f"⚠️ tiktoken {ENCODING_NAME} unavailable, estimating token counts:", e)
+                _encoding = None
+            _encoding_loaded = True
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    return max(len(_ROUGH_TOKEN.findall(text)), math.ceil(len(text) / 4))
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_by_tokens(text: str, max_tokens: int) -> list:
+    """Cut text into pieces of at most max_tokens tokens (last resort for run-on sentences)."""
+    encoding = get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+    return _split_by_estimate(text, max_tokens)
+
+
+def _split_by_estimate(text: str, max_tokens: int) -> list:
+    """
+    Character windows that stay within estimate_tokens: at most 4 * max_tokens
+    characters and max_tokens word/punctuation matches each. Each cut moves back
+    to the last whitespace in the window when there is one, so words stay whole;
+    unbroken runs (URLs, base64, "xxxx…") are cut mid-run. The pieces concatenate
+    back to the original text, spacing and newlines included.
+    """
+    max_tokens = max(1, max_tokens)
+    if estimate_tokens(text) <= max_tokens:
+        return [text] if text else []
+    window = 4 * max_tokens
+    spans = [m.span() for m in _ROUGH_TOKEN.finditer(text)]
+
+    pieces, start, first = [], 0, 0
+    while start < len(text):
+        # first: the first match still (partly) inside the rest of the text
+        while first < len(spans) and spans[first][1] <= start:
+            first += 1
+        end = min(len(text), start + window)
+        if first + max_tokens < len(spans):
+            end = min(end, spans[first + max_tokens][0])
+        if end < len(text):
+            cut = max(text.rfind(" ", start, end), text.rfind("\n", start, end), text.rfind("\t", start, end))
+            if cut > start:
+                end = cut + 1
+        pieces.append(text[start:end])
+        start = end
+    return pieces